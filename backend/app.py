@@ -1,7 +1,18 @@
+from datetime import datetime, timedelta
 from flask import Flask
 from flask_cors import CORS
 from config import Config
 from models import db
+from migrations import run_migrations
+import replicas
+import rollup
+import versioning
+import tombstones
+import stream
+import profiling
+import encoding
+import metrics
+from cache import payload_cache
 
 def create_app(config_class=Config):
     """Application factory pattern"""
@@ -9,8 +20,18 @@ def create_app(config_class=Config):
     app.config.from_object(config_class)
 
     # Initialize extensions
+    replicas.init_app(app)
     db.init_app(app)
-    CORS(app, origins=config_class.CORS_ORIGINS)
+    rollup.register_listeners()
+    versioning.register_listeners()
+    tombstones.register_listeners()
+    stream.init_app(app)
+    payload_cache.init_app(app)
+    # Before profiling, which times the provider's dumps()
+    encoding.init_app(app)
+    profiling.init_app(app)
+    metrics.init_app(app)
+    CORS(app, origins=config_class.CORS_ORIGINS, expose_headers=['ETag', 'Server-Timing'])
 
     # Register blueprints
     from routes.riders import riders_bp
@@ -19,6 +40,10 @@ def create_app(config_class=Config):
     from routes.availability import availability_bp
     from routes.schedule import schedule_bp
     from routes.stats import stats_bp
+    from routes.slots import slots_bp
+    from routes.calendar import calendar_bp
+    from routes.changes import changes_bp
+    from routes.stream import stream_bp
 
     app.register_blueprint(riders_bp, url_prefix='/api')
     app.register_blueprint(horses_bp, url_prefix='/api')
@@ -26,21 +51,59 @@ def create_app(config_class=Config):
     app.register_blueprint(availability_bp, url_prefix='/api')
     app.register_blueprint(schedule_bp, url_prefix='/api')
     app.register_blueprint(stats_bp, url_prefix='/api')
+    app.register_blueprint(slots_bp, url_prefix='/api')
+    app.register_blueprint(calendar_bp, url_prefix='/api')
+    app.register_blueprint(changes_bp, url_prefix='/api')
+    app.register_blueprint(stream_bp, url_prefix='/api')
 
     # Health check endpoint
     @app.route('/health')
     def health():
         return {'status': 'healthy'}, 200
 
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Schema changes normally run as a separate step (`flask --app app migrate`)
+    if app.config.get('MIGRATE_ON_START'):
+        with app.app_context():
+            run_migrations()
+
+    @app.cli.command('migrate')
+    def migrate():
+        """Apply pending schema migrations"""
+        applied = run_migrations()
+        print(f'Applied migrations: {applied}' if applied else 'Schema is up to date')
+
+    @app.cli.command('rollup-backfill')
+    def rollup_backfill():
+        """Rebuild schedule_daily_stats from the schedule table"""
+        with db.engine.begin() as conn:
+            rows = rollup.backfill(conn)
+        print(f'Rebuilt {rows} rollup rows')
+
+    @app.cli.command('prune-tombstones')
+    def prune_tombstones():
+        """Drop deletion-log entries older than CHANGES_RETENTION_DAYS"""
+        before = datetime.utcnow() - timedelta(days=app.config['CHANGES_RETENTION_DAYS'])
+        with db.engine.begin() as conn:
+            rows = tombstones.prune(conn, before)
+        print(f'Pruned {rows} tombstones')
 
     return app
 
-# This is what gunicorn uses
-application = create_app()
 
+def dispose_engines(app):
+    """Drop pooled connections inherited from a parent process (call after fork)
+
+    close=False leaves the parent's sockets open for the parent; the child
+    simply starts with empty pools.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+# gunicorn builds the app once in the master: gunicorn 'app:create_app()' (see gunicorn.conf.py)
 if __name__ == '__main__':
     app = create_app()
+    with app.app_context():
+        run_migrations()
     app.run(debug=True)
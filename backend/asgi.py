@@ -0,0 +1,258 @@
+"""
+Async serving mode
+ASGI entry point for an event-loop server (uvicorn). GET/HEAD requests to
+the calendar read endpoints (ASYNC_READ_PREFIXES) run the regular Flask views
+and models inside AsyncSession.run_sync() on an async engine (psycopg async
+or aiosqlite). Every database round trip then suspends only that request,
+so one process keeps many slow queries in flight. Everything else (writes,
+riders, horses, exports, ...) runs the same Flask app on the sync engine in
+a thread pool, except that an event stream (GET /api/stream) is handed
+back to the event loop once Flask has built its headers, so open streams
+cost a task each rather than a thread.
+
+    uvicorn --factory asgi:create_asgi_app --workers 4
+
+ASYNC_DATABASE_URL overrides the async URL, which is otherwise derived from
+SQLALCHEMY_DATABASE_URI. Pool options are shared with the sync engine.
+Async reads use the replicas of SQLALCHEMY_REPLICA_URIS (through their async
+drivers) the same way db.session does, falling back to the primary.
+"""
+import asyncio
+import contextvars
+import io
+import sys
+from flask import request
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app import create_app
+from config import Config
+from models import db
+import metrics
+import profiling
+import replicas
+import stream
+
+# Paths (under /api) served on the event loop; subpaths included
+ASYNC_READ_PREFIXES = ('/api/schedule', '/api/availability', '/api/statistics', '/api/calendar')
+ASYNC_METHODS = ('GET', 'HEAD')
+
+# Async driver per database backend
+ASYNC_DRIVERS = {
+    'postgresql': 'psycopg',
+    'sqlite': 'aiosqlite'
+}
+
+# WSGI environ key carrying the request's sync view of its AsyncSession
+SESSION_ENVIRON_KEY = 'equestrian.async_session'
+
+
+def async_database_url(url):
+    """The same database addressed through its async driver"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver configured for {backend}')
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}')
+
+
+def is_async_read(method, path):
+    """Whether a request is served on the event loop"""
+    return method in ASYNC_METHODS and any(
+        path == prefix or path.startswith(prefix + '/') for prefix in ASYNC_READ_PREFIXES
+    )
+
+
+def _bind_async_session():
+    """Point db.session (and Model.query) at the request's async-backed session"""
+    session = request.environ.get(SESSION_ENVIRON_KEY)
+    if session is not None:
+        db.session.registry.set(session)
+
+
+def _environ(scope, body):
+    """WSGI environ for an ASGI http scope (PEP 3333 strings are latin-1)"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+class AsyncReadApp:
+    """ASGI application: async calendar reads, everything else via the sync app"""
+
+    def __init__(self, flask_app, engine, replica_set=None):
+        self.flask_app = flask_app
+        self.engine = engine
+        self.replicas = replica_set or replicas.ReplicaSet([], 0)
+
+    def _start(self, environ):
+        """Run the Flask app up to the response; returns (status, headers, body iterable)"""
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+        body = self.flask_app(environ, start_response)
+        return started['status'], started['headers'], body
+
+    def _respond_sync(self, session, environ):
+        """Whole response of an async read, computed in run_sync()'s greenlet"""
+        environ[SESSION_ENVIRON_KEY] = session
+        status, headers, body = self._start(environ)
+        try:
+            return status, headers, b''.join(body)
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+
+    async def _read_session(self, environ):
+        """AsyncSession for an async read: on the first reachable replica, else the primary"""
+        for engine in self.replicas.candidates():
+            session = AsyncSession(engine)
+            try:
+                await session.connection()
+            except DBAPIError:
+                await session.close()
+                replicas.logger.warning('Replica %s unreachable; skipping it for %ss', engine.url, self.replicas.retry_seconds)
+                self.replicas.mark_down(engine)
+                continue
+            environ[replicas.ENVIRON_KEY] = engine
+            return session
+        environ[replicas.ENVIRON_KEY] = None
+        return AsyncSession(self.engine)
+
+    async def _async_read(self, environ, send):
+        async with await self._read_session(environ) as session:
+            status, headers, content = await session.run_sync(self._respond_sync, environ)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def _event_stream(self, subscription, status, headers, receive, send):
+        """Serve a stream.Subscription on the event loop until the client disconnects"""
+        async def pump():
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            async for chunk in subscription.aiter():
+                await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+
+        async def disconnected():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(disconnected())]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            task.result()
+
+    async def _threaded(self, environ, receive, send):
+        """Regular sync request in the default executor, streaming chunk by chunk
+
+        Every step runs in one contextvars context, which streamed responses
+        (stream_with_context) rely on across chunks.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.Context()
+        status, headers, body = await loop.run_in_executor(None, context.run, self._start, environ)
+        subscription = environ.get(stream.ENVIRON_KEY)
+        if subscription is not None and status == 200:
+            # The WSGI body is never started, so it holds no subscription
+            if hasattr(body, 'close'):
+                body.close()
+            return await self._event_stream(subscription, status, headers, receive, send)
+
+        chunks = iter(body)
+        try:
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            while True:
+                chunk = await loop.run_in_executor(None, context.run, next, chunks, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(body, 'close'):
+                await loop.run_in_executor(None, context.run, body.close)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                for engine in self.replicas.members:
+                    await engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope {scope['type']}")
+
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        environ = _environ(scope, body)
+        if is_async_read(scope['method'], scope['path']):
+            await self._async_read(environ, send)
+        else:
+            await self._threaded(environ, receive, send)
+
+
+def create_asgi_app(config_class=Config):
+    """Flask app plus async engine, wrapped for an ASGI server"""
+    flask_app = create_app(config_class)
+    options = flask_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    url = flask_app.config.get('ASYNC_DATABASE_URL') or async_database_url(flask_app.config['SQLALCHEMY_DATABASE_URI'])
+    engine = create_async_engine(url, **options)
+    replica_engines = [
+        create_async_engine(async_database_url(replica_url), **options)
+        for replica_url in flask_app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+    ]
+
+    # Must run before any other hook that could touch db.session
+    flask_app.before_request_funcs.setdefault(None, []).insert(0, _bind_async_session)
+    for async_engine in [engine, *replica_engines]:
+        metrics.instrument_engine(async_engine.sync_engine)
+        if flask_app.config.get('PROFILE_REQUESTS'):
+            profiling.instrument_engine(async_engine.sync_engine)
+
+    replica_set = replicas.ReplicaSet(replica_engines, flask_app.config.get('REPLICA_RETRY_SECONDS', 30))
+    return AsyncReadApp(flask_app, engine, replica_set)
@@ -0,0 +1,231 @@
+"""
+Seeded synthetic barn generator
+
+Fills a database with riders, horses, weekly recurring lessons and their
+exceptions, availability, and `--years` of schedule history ending around
+`--anchor` (materialized lesson occurrences plus ad-hoc sessions). The same
+seed and scale always produce the same rows, so benchmark query counts are
+reproducible.
+
+Usage (from backend/):
+    python benchmarks/datagen.py --db /tmp/barn.db --riders 2000 --horses 150 --years 3
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Monday; history runs up to it, a few future weeks are scheduled after it
+DEFAULT_ANCHOR = date(2025, 1, 6)
+
+FIRST_NAMES = [
+    'Hélène', 'Éloïse', 'Zoé', 'Chloé', 'Léa', 'Jérôme', 'François', 'Noël', 'Anaïs', 'Gaëlle',
+    'Benoît', 'Céline', 'Amélie', 'Mathéo', 'Inès', 'Loïc', 'Camille', 'Manon', 'Lucas', 'Hugo',
+    'Louise', 'Jade', 'Emma', 'Arthur', 'Jules', 'Margaux', 'Clémence', 'Théo', 'Maëlys', 'Océane'
+]
+LAST_NAMES = [
+    'Lefèvre', 'Bénard', 'Garçon', 'Dupré', 'Côté', 'Moreau', 'Fabre', 'Martin', 'Bernard',
+    'Dubois', 'Durand', 'Leroy', 'Girard', 'Bonnet', 'Mercier', 'Rousseau', 'Blanc', 'Guérin',
+    'Muller', 'Faure', 'André', 'Chevalier', 'François', 'Legrand', 'Gauthier', 'Perrin'
+]
+HORSE_NAMES = [
+    'Éclair', 'Tempête', 'Quartz', 'Ulysse', 'Vénus', 'Bijou', 'Caramel', 'Diamant', 'Étoile',
+    'Fanfan', 'Galant', 'Hermès', 'Iris', 'Jasmin', 'Kali', 'Lune', 'Mistral', 'Nuage', 'Opale',
+    'Perle', 'Rubis', 'Saphir', 'Tonnerre', 'Uranie', 'Valse', 'Zéphyr'
+]
+HORSE_TYPES = ['Selle Français', 'Poney Welsh', 'Connemara', 'Pur-sang', 'Trotteur', 'Haflinger', 'Lusitanien']
+LESSON_TYPES = ['private', 'group', 'dressage', 'jumping', 'trail']
+COLORS = ['#4f46e5', '#059669', '#d97706', '#dc2626', '#7c3aed', '#0891b2']
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+LESSON_TIMES = [f'{hour:02d}:{minute:02d}' for hour in range(8, 20) for minute in (0, 30)]
+
+CHUNK_SIZE = 5000
+
+
+def _chunks(rows):
+    for i in range(0, len(rows), CHUNK_SIZE):
+        yield rows[i:i + CHUNK_SIZE]
+
+
+def _insert(conn, table, rows):
+    for chunk in _chunks(rows):
+        conn.execute(table.insert(), chunk)
+
+
+def generate(engine, riders=200, horses=40, lessons=80, years=2, adhoc_per_week=25,
+             anchor=DEFAULT_ANCHOR, seed=42):
+    """Fill an empty, migrated database; returns {table: rows inserted}"""
+    sys.path.insert(0, BACKEND_DIR)
+    from models import (
+        Availability, Horse, RecurringLesson, RecurringLessonException, Rider, Schedule
+    )
+    from recurrence import expand
+    import rollup
+
+    rng = random.Random(seed)
+    created = datetime.combine(anchor - timedelta(days=365 * years), datetime.min.time())
+
+    rider_rows = []
+    for i in range(riders):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        rider_rows.append({
+            'id': i + 1,
+            'name': f'{first} {last}',
+            'email': f'{first.lower()}.{last.lower()}{i}@example.fr',
+            'phone': f'06{rng.randrange(10 ** 8):08d}',
+            'active': rng.random() > 0.1,
+            'created_at': created, 'updated_at': created
+        })
+
+    horse_rows = [{
+        'id': i + 1,
+        'name': f'{rng.choice(HORSE_NAMES)} {i + 1}',
+        'type': rng.choice(HORSE_TYPES),
+        'owner_id': rng.randint(1, riders) if rng.random() < 0.3 else None,
+        'active': rng.random() > 0.05,
+        'created_at': created, 'updated_at': created
+    } for i in range(horses)]
+
+    lesson_rows = [{
+        'id': i + 1,
+        'rider_id': rng.randint(1, riders),
+        'horse_id': rng.randint(1, horses),
+        'day': rng.choice(DAYS[:6]),
+        'time': rng.choice(LESSON_TIMES),
+        'duration': rng.choice([30, 45, 60, 60, 90]),
+        'lesson_type': rng.choice(LESSON_TYPES),
+        'color': rng.choice(COLORS),
+        'active': rng.random() > 0.1,
+        'created_at': created, 'updated_at': created
+    } for i in range(lessons)]
+
+    availability_rows = []
+    for day in DAYS[:6]:
+        availability_rows.append({'day': day, 'start_time': '08:00', 'end_time': '12:30', 'occupied': False, 'created_at': created})
+        availability_rows.append({'day': day, 'start_time': '13:30', 'end_time': '20:00', 'occupied': False, 'created_at': created})
+
+    # Occurrences over the whole window, some cancelled/overridden by exceptions
+    start = anchor - timedelta(days=365 * years)
+    end = anchor + timedelta(weeks=4)
+    # expand() only reads attributes, so plain namespaces stand in for rows
+    active_lessons = [SimpleNamespace(**row, rider=None, horse=None) for row in lesson_rows if row['active']]
+    exception_rows = []
+    exceptions = {}
+    for lesson in active_lessons:
+        for _ in range(rng.randint(0, 6)):
+            day = start + timedelta(days=rng.randrange((end - start).days))
+            if (lesson.id, day) in exceptions:
+                continue
+            row = {'lesson_id': lesson.id, 'date': day, 'cancelled': rng.random() < 0.7,
+                   'time': None, 'duration': None, 'horse_id': None, 'created_at': created}
+            if not row['cancelled']:
+                row['time'] = rng.choice(LESSON_TIMES)
+            exception_rows.append(row)
+            exceptions[(lesson.id, day)] = SimpleNamespace(**row, horse=None)
+
+    anchor_dt = datetime.combine(anchor, datetime.min.time())
+    schedule_rows = []
+    for occurrence in expand(active_lessons, start, end, exceptions):
+        # The past is materialized; future weeks only partly
+        if occurrence['start_time'] >= anchor_dt and rng.random() < 0.5:
+            continue
+        schedule_rows.append({
+            'lesson_id': occurrence['lesson_id'],
+            'rider_id': occurrence['rider_id'],
+            'horse_id': occurrence['horse_id'],
+            'lesson_type': occurrence['lesson_type'],
+            'start_time': occurrence['start_time'],
+            'end_time': occurrence['end_time'],
+            'notes': None,
+            'status': 'scheduled'
+        })
+
+    weeks = (end - start).days // 7
+    for week in range(weeks):
+        monday = datetime.combine(start + timedelta(weeks=week), datetime.min.time())
+        for _ in range(adhoc_per_week):
+            begin = monday + timedelta(days=rng.randrange(6), hours=rng.randint(8, 18), minutes=rng.choice([0, 15, 30, 45]))
+            schedule_rows.append({
+                'lesson_id': None,
+                'rider_id': rng.randint(1, riders),
+                'horse_id': rng.randint(1, horses),
+                'lesson_type': rng.choice(LESSON_TYPES),
+                'start_time': begin,
+                'end_time': begin + timedelta(minutes=rng.choice([30, 45, 60])),
+                'notes': rng.choice([None, None, None, 'Travail sur le plat', 'Sortie en extérieur']),
+                'status': 'scheduled'
+            })
+
+    for row in schedule_rows:
+        if row['start_time'] < anchor_dt:
+            row['status'] = 'cancelled' if rng.random() < 0.08 else 'completed'
+        row['created_at'] = row['updated_at'] = min(row['start_time'], anchor_dt)
+    schedule_rows.sort(key=lambda r: r['start_time'])
+
+    with engine.begin() as conn:
+        _insert(conn, Rider.__table__, rider_rows)
+        _insert(conn, Horse.__table__, horse_rows)
+        _insert(conn, RecurringLesson.__table__, lesson_rows)
+        _insert(conn, RecurringLessonException.__table__, exception_rows)
+        _insert(conn, Availability.__table__, availability_rows)
+        _insert(conn, Schedule.__table__, schedule_rows)
+        rollup.backfill(conn)
+
+    return {
+        'riders': len(rider_rows),
+        'horses': len(horse_rows),
+        'recurring_lessons': len(lesson_rows),
+        'recurring_lesson_exceptions': len(exception_rows),
+        'availability': len(availability_rows),
+        'schedule': len(schedule_rows)
+    }
+
+
+def add_arguments(parser):
+    """Scale options shared with the benchmark suite"""
+    parser.add_argument('--riders', type=int, default=200)
+    parser.add_argument('--horses', type=int, default=40)
+    parser.add_argument('--lessons', type=int, default=80, help='weekly recurring lessons')
+    parser.add_argument('--years', type=int, default=2, help='years of schedule history')
+    parser.add_argument('--adhoc', type=int, default=25, help='ad-hoc sessions per week')
+    parser.add_argument('--anchor', type=date.fromisoformat, default=DEFAULT_ANCHOR, help='YYYY-MM-DD')
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def scale(args):
+    """generate() keyword arguments from parsed add_arguments() options"""
+    return {
+        'riders': args.riders, 'horses': args.horses, 'lessons': args.lessons,
+        'years': args.years, 'adhoc_per_week': args.adhoc, 'anchor': args.anchor, 'seed': args.seed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', required=True, help='SQLite file to create (must not exist)')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        parser.error(f'{args.db} already exists')
+
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(args.db)}'
+    sys.path.insert(0, BACKEND_DIR)
+    from app import create_app
+    from migrations import run_migrations
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        run_migrations()
+        counts = generate(db.engine, **scale(args))
+    for table_name, count in counts.items():
+        print(f'{table_name:<28} {count}')
+
+
+if __name__ == '__main__':
+    main()
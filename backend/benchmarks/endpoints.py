@@ -0,0 +1,294 @@
+"""
+Endpoint benchmark suite
+
+Generates a seeded barn (benchmarks/datagen.py) in a throwaway SQLite file,
+drives every blueprint through the Flask test client and records, per
+endpoint: fastest, median and p95 latency, SQL statements per request and peak
+Python memory (tracemalloc) of one request. Results are compared with
+benchmarks/baseline.json; the run exits 1 when an endpoint regresses.
+
+By default only query counts are gated: they do not depend on the machine
+and must not grow at all. Latency and memory are printed next to the
+baseline's but only fail the run with --strict, and only mean something
+against a baseline recorded on the same machine: latency (fastest sample
+over several interleaved rounds, rescaled by a CPU calibration loop) and
+memory then fail when they exceed the baseline by more than --tolerance
+and a small absolute slack, so timer noise and machine load do not trip
+the check.
+
+Usage (from backend/):
+    python benchmarks/endpoints.py                  # compare query counts with baseline.json
+    python benchmarks/endpoints.py --strict         # ... and latency/memory (same-machine baseline)
+    python benchmarks/endpoints.py --save-baseline  # record a new baseline
+    python benchmarks/endpoints.py --only schedule  # cases whose name contains 'schedule'
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import datagen  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+# Absolute slack on top of --tolerance before a slowdown counts
+LATENCY_SLACK_MS = 1.0
+MEMORY_SLACK_KIB = 64
+
+
+def calibrate():
+    """Milliseconds for a fixed pure-Python workload (fastest of several tries)"""
+    best = None
+    for _ in range(5):
+        started = time.perf_counter()
+        total = 0
+        for i in range(200_000):
+            total += i % 7
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def cases(anchor):
+    """(name, method, path, options) for every benchmarked request"""
+    from pagination import encode_cursor  # backend/ is on sys.path once build_app() ran
+    week_end = anchor + timedelta(days=6)
+    month_start = anchor - timedelta(days=28)
+    year_start = anchor - timedelta(days=365)
+    future = anchor + timedelta(weeks=2)
+    week = {'start_date': anchor.isoformat(), 'end_date': week_end.isoformat()}
+    month = {'start_date': month_start.isoformat(), 'end_date': anchor.isoformat()}
+    year = {'start_date': year_start.isoformat(), 'end_date': anchor.isoformat()}
+
+    return [
+        ('riders.list', 'GET', '/api/riders', {}),
+        ('riders.page', 'GET', '/api/riders', {'query_string': {'limit': 100}}),
+        ('riders.active', 'GET', '/api/riders', {'query_string': {'active': 'true'}}),
+        ('riders.detail', 'GET', '/api/riders/1', {}),
+        ('riders.search', 'GET', '/api/riders/search', {'query_string': {'q': 'hel', 'mode': 'prefix'}}),
+        ('riders.update', 'PUT', '/api/riders/1', {'json': {'phone': '0600000000'}}),
+        ('horses.list', 'GET', '/api/horses', {}),
+        ('horses.owner', 'GET', '/api/horses', {'query_string': {'owner_id': 1}}),
+        ('horses.detail', 'GET', '/api/horses/1', {}),
+        ('horses.search', 'GET', '/api/horses/search', {'query_string': {'q': 'eclair'}}),
+        ('lessons.list', 'GET', '/api/recurring-lessons', {}),
+        ('lessons.by_day', 'GET', '/api/recurring-lessons', {'query_string': {'day': 'monday', 'active': 'true'}}),
+        ('lessons.detail', 'GET', '/api/recurring-lessons/1', {}),
+        ('lessons.occurrences', 'GET', '/api/recurring-lessons/occurrences', {'query_string': month}),
+        ('lessons.exceptions', 'GET', '/api/recurring-lessons/1/exceptions', {}),
+        ('lessons.materialize', 'POST', '/api/recurring-lessons/occurrences/materialize',
+         {'json': {'start_date': future.isoformat(), 'end_date': (future + timedelta(days=6)).isoformat(),
+                   'allow_conflicts': True}}),
+        ('availability.week', 'GET', '/api/availability', {'query_string': {'date': anchor.isoformat()}}),
+        ('availability.day', 'GET', '/api/availability/monday', {'query_string': {'date': anchor.isoformat()}}),
+        ('availability.put', 'PUT', '/api/availability/monday',
+         {'json': {'slots': [{'start': '08:00', 'end': '12:30'}, {'start': '13:30', 'end': '20:00'}]}}),
+        ('schedule.month', 'GET', '/api/schedule', {'query_string': month}),
+        ('schedule.month_fields', 'GET', '/api/schedule',
+         {'query_string': {**month, 'fields': 'id,start_time,end_time,rider_name,horse_name'}}),
+        ('schedule.month_gzip', 'GET', '/api/schedule', {'query_string': month, 'headers': {'Accept-Encoding': 'gzip'}}),
+        ('schedule.page', 'GET', '/api/schedule', {'query_string': {'limit': 200}}),
+        ('schedule.detail', 'GET', '/api/schedule/1', {}),
+        ('schedule.rider', 'GET', '/api/schedule/rider', {'query_string': {'rider_id': 1, **year}}),
+        ('schedule.horse', 'GET', '/api/schedule/horse', {'query_string': {'horse_id': 1, **year}}),
+        ('schedule.conflicts', 'GET', '/api/schedule/conflicts', {'query_string': month}),
+        ('schedule.batch', 'POST', '/api/schedule/batch',
+         {'json': {'operations': [{'op': 'update', 'id': 1, 'notes': 'benchmark'}], 'allow_conflicts': True}}),
+        ('calendar.week', 'GET', '/api/calendar', {'query_string': week}),
+        ('changes.full', 'GET', '/api/changes', {}),
+        # Cursor from before the run: only the benchmark's own writes come back
+        ('changes.delta', 'GET', '/api/changes', {'query_string': {'since': encode_cursor([datetime.utcnow()])}}),
+        ('slots.free', 'GET', '/api/slots/free', {'query_string': {**week, 'duration': 60, 'horse_id': 1}}),
+        ('stats.all', 'GET', '/api/statistics', {}),
+        ('stats.year', 'GET', '/api/statistics', {'query_string': year}),
+        ('stats.rider', 'GET', '/api/statistics/riders/1', {}),
+        ('stats.horse', 'GET', '/api/statistics/horses/1', {}),
+        ('stats.lesson', 'GET', '/api/statistics/lessons/1', {}),
+        ('reports.utilization', 'GET', '/api/reports/utilization', {}),
+        ('reports.utilization_weekly', 'GET', '/api/reports/utilization', {'query_string': {**year, 'bucket': 'week'}}),
+        ('reports.attendance', 'GET', '/api/reports/attendance', {'query_string': year}),
+        ('export.schedule_csv', 'GET', '/api/export/schedule', {'query_string': {**year, 'format': 'csv'}}),
+    ]
+
+
+def build_app(path, args):
+    """Seed a fresh SQLite file at path and return the app"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    # Measure the database and serialization paths, not payload-cache hits
+    os.environ.setdefault('CACHE_ENABLED', 'false')
+    sys.path.insert(0, BACKEND_DIR)
+    from app import create_app
+    from migrations import run_migrations
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        run_migrations()
+        datagen.generate(db.engine, **datagen.scale(args))
+    return app
+
+
+def measure(app, client, method, path, options, repeat, memory=True):
+    """Latencies (ms) of `repeat` timed calls, SQL statements per call and peak KiB
+
+    The untimed first call warms caches and compiles statements. Peak memory
+    (tracemalloc) is taken from one extra call when memory is set.
+    """
+    from sqlalchemy import event
+    from models import db
+
+    def call():
+        response = client.open(path, method=method, **options)
+        response.get_data()
+        if response.status_code >= 400:
+            raise RuntimeError(f'{method} {path} -> {response.status_code}: {response.get_data(as_text=True)[:200]}')
+        return response
+
+    call()
+
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        latencies = []
+        for _ in range(repeat):
+            statements[0] = 0
+            started = time.perf_counter()
+            call()
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries = statements[0]
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            call()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak = round(peak / 1024, 1)
+    return latencies, queries, peak
+
+
+def summarize(latencies, queries, peak):
+    """Result record stored in the baseline"""
+    latencies = sorted(latencies)
+    return {
+        'min_ms': round(latencies[0], 3),
+        'median_ms': round(statistics.median(latencies), 3),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+        'queries': queries,
+        'peak_kib': peak
+    }
+
+
+def regressions(current, baseline, speed, tolerance, strict=False):
+    """Human-readable reasons current is worse than baseline (empty when fine)
+
+    speed: this run's calibration time over the baseline's, used to rescale
+    the baseline latency to the machine's current pace.
+    strict: also compare latency and peak memory.
+    """
+    reasons = []
+    if current['queries'] > baseline['queries']:
+        reasons.append(f"queries {baseline['queries']} -> {current['queries']}")
+    if not strict:
+        return reasons
+    expected = baseline['min_ms'] * speed
+    if current['min_ms'] > expected * (1 + tolerance) and current['min_ms'] - expected > LATENCY_SLACK_MS:
+        reasons.append(f"latency {expected:.2f} -> {current['min_ms']:.2f} ms")
+    limit = baseline['peak_kib'] * (1 + tolerance)
+    if current['peak_kib'] > limit and current['peak_kib'] - baseline['peak_kib'] > MEMORY_SLACK_KIB:
+        reasons.append(f"peak memory {baseline['peak_kib']:.0f} -> {current['peak_kib']:.0f} KiB")
+    return reasons
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    datagen.add_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per endpoint per round')
+    parser.add_argument('--rounds', type=int, default=3, help='passes over the whole suite')
+    parser.add_argument('--only', help='run cases whose name contains this text')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='write results as the new baseline')
+    parser.add_argument('--strict', action='store_true',
+                        help='also fail on latency and memory (baseline recorded on this machine)')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='allowed relative slowdown with --strict (0.5 = 50%%)')
+    args = parser.parse_args()
+
+    meta = {'scale': {k: str(v) for k, v in datagen.scale(args).items()}}
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['meta']['scale'] != meta['scale']:
+            parser.error('baseline was recorded at a different scale; rerun with --save-baseline')
+
+    app = build_app(os.path.join(tempfile.mkdtemp(), 'bench.db'), args)
+    client = app.test_client()
+    selected = [case for case in cases(args.anchor) if not args.only or args.only in case[0]]
+
+    # Interleaved rounds spread each endpoint's samples over the whole run,
+    # so a burst of machine load cannot inflate all of them at once
+    samples = {name: [] for name, *_ in selected}
+    queries = {}
+    peaks = {}
+    calibration = []
+    for round_number in range(args.rounds):
+        calibration.append(calibrate())
+        for name, method, path, options in selected:
+            latencies, queries[name], peak = measure(
+                app, client, method, path, options, args.repeat, memory=round_number == 0
+            )
+            samples[name].extend(latencies)
+            if peak is not None:
+                peaks[name] = peak
+    calibration_ms = round(min(calibration), 3)
+
+    results = {}
+    failures = {}
+    print(f"{'endpoint':<28} {'min ms':>8} {'median ms':>10} {'p95 ms':>9} {'queries':>8} {'peak KiB':>9}")
+    for name, *_ in selected:
+        result = results[name] = summarize(samples[name], queries[name], peaks[name])
+        reasons = []
+        if baseline and name in baseline['results']:
+            speed = calibration_ms / baseline['meta']['calibration_ms']
+            reasons = regressions(result, baseline['results'][name], speed, args.tolerance, args.strict)
+            if reasons:
+                failures[name] = reasons
+        flag = '  REGRESSED: ' + '; '.join(reasons) if reasons else ''
+        print(f"{name:<28} {result['min_ms']:>8.2f} {result['median_ms']:>10.2f} {result['p95_ms']:>9.2f} "
+              f"{result['queries']:>8} {result['peak_kib']:>9.0f}{flag}")
+
+    if args.save_baseline:
+        meta['calibration_ms'] = calibration_ms
+        with open(args.baseline, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'baseline written to {args.baseline}')
+    elif baseline is None:
+        print(f'no baseline at {args.baseline}; run with --save-baseline to record one')
+    elif failures:
+        print(f'{len(failures)} endpoint(s) regressed')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Peak-RSS benchmark for the streaming schedule export
+
+Seeds a throwaway SQLite database with --rows schedule sessions in a child
+process, then streams /api/export/schedule through the Flask test client and
+reports the peak resident set size of the exporting process.
+
+Usage (from backend/):
+    python benchmarks/export_rss.py --rows 1000000 --format csv
+"""
+import argparse
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(path, rows, riders=200, horses=40):
+    """Fill a fresh SQLite file with riders, horses and schedule rows"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    sys.path.insert(0, BACKEND_DIR)
+    from app import create_app
+    create_app()
+
+    conn = sqlite3.connect(path)
+    now = datetime.utcnow().isoformat(sep=' ')
+    conn.executemany(
+        'INSERT INTO riders (name, active, created_at, updated_at) VALUES (?, 1, ?, ?)',
+        ((f'Rider {i}', now, now) for i in range(riders))
+    )
+    conn.executemany(
+        'INSERT INTO horses (name, active, created_at, updated_at) VALUES (?, 1, ?, ?)',
+        ((f'Horse {i}', now, now) for i in range(horses))
+    )
+
+    origin = datetime(2020, 1, 1, 8, 0)
+
+    def sessions():
+        for i in range(rows):
+            start = origin + timedelta(minutes=15 * i)
+            yield (
+                i % riders + 1, i % horses + 1, 'private',
+                start.isoformat(sep=' '), (start + timedelta(minutes=45)).isoformat(sep=' '),
+                'scheduled', now, now
+            )
+
+    conn.executemany(
+        'INSERT INTO schedule (rider_id, horse_id, lesson_type, start_time, end_time, '
+        'status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        sessions()
+    )
+    conn.commit()
+    conn.close()
+
+
+def peak_rss_mb():
+    """Peak RSS of this process in MiB (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def export(path, format_type):
+    """Stream the schedule export and return (bytes, seconds, baseline MiB, peak MiB)"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    sys.path.insert(0, BACKEND_DIR)
+    from app import create_app
+    app = create_app()
+    client = app.test_client()
+
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    response = client.get(f'/api/export/schedule?format={format_type}', buffered=False)
+    size = 0
+    for chunk in response.response:
+        size += len(chunk)
+    response.close()
+    elapsed = time.perf_counter() - started
+    return size, elapsed, baseline, peak_rss_mb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--format', default='csv', choices=['csv', 'ndjson', 'json'])
+    parser.add_argument('--db', help='reuse an already seeded SQLite file')
+    parser.add_argument('--seed-only', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed_only:
+        seed(args.db, args.rows)
+        return
+
+    path = args.db
+    if not path:
+        path = os.path.join(tempfile.mkdtemp(), 'export_bench.db')
+        # Seed in a child process so its memory does not count against the export
+        subprocess.run(
+            [sys.executable, __file__, '--seed-only', '--db', path, '--rows', str(args.rows)],
+            check=True
+        )
+
+    size, elapsed, baseline, peak = export(path, args.format)
+    print(f'rows:          {args.rows}')
+    print(f'format:        {args.format}')
+    print(f'bytes:         {size}')
+    print(f'elapsed:       {elapsed:.2f}s')
+    print(f'baseline RSS:  {baseline:.1f} MiB')
+    print(f'peak RSS:      {peak:.1f} MiB (+{peak - baseline:.1f} MiB during export)')
+
+
+if __name__ == '__main__':
+    main()
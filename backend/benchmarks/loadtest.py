@@ -0,0 +1,225 @@
+"""
+Sync vs async load test
+
+Runs the calendar read endpoints served by asgi.py (schedule, availability,
+statistics, calendar) under concurrent load against two servers with the
+same number of worker processes, and reports throughput and latency
+percentiles:
+
+    sync    gunicorn sync workers (gunicorn.conf.py), one request per worker
+    async   uvicorn running asgi.py, reads on the event loop
+
+--query-delay-ms adds a fixed wait to every SQL statement to model a slow
+or distant Postgres: a blocking sleep on the sync engine (the worker waits,
+as on a socket) and an awaited one on the async engine (the event loop is
+free meanwhile). Without it, SQLite answers in microseconds and the run
+measures CPU cost only.
+
+Usage (from backend/):
+    python benchmarks/loadtest.py
+    python benchmarks/loadtest.py --query-delay-ms 20 --concurrency 100 --duration 15
+    python benchmarks/loadtest.py --database-url postgresql://... --query-delay-ms 0
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+STARTUP_TIMEOUT = 60  # seconds
+
+DELAY_ENV = 'LOADTEST_QUERY_DELAY_MS'
+
+
+def _delay_seconds():
+    return float(os.environ.get(DELAY_ENV) or 0) / 1000
+
+
+def sync_app():
+    """create_app() with the simulated statement delay (gunicorn factory)"""
+    from sqlalchemy import event
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    delay = _delay_seconds()
+    if delay:
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', lambda *_: time.sleep(delay))
+    return app
+
+
+def async_app():
+    """create_asgi_app() with the simulated statement delay (uvicorn factory)"""
+    import asyncio
+    from sqlalchemy import event
+    from sqlalchemy.util import await_
+    from asgi import create_asgi_app
+    from models import db
+
+    app = create_asgi_app()
+    delay = _delay_seconds()
+    if delay:
+        # Awaited inside run_sync()'s greenlet: only this request waits
+        event.listen(app.engine.sync_engine, 'before_cursor_execute', lambda *_: await_(asyncio.sleep(delay)))
+        # Requests outside the async read path still use the blocking sync engine
+        with app.flask_app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', lambda *_: time.sleep(delay))
+    return app
+
+
+def _servers(workers, port):
+    """Command line per mode"""
+    return {
+        'sync': [sys.executable, '-m', 'gunicorn', '-c', os.path.join(BACKEND_DIR, 'gunicorn.conf.py'),
+                 '--pythonpath', BENCH_DIR, '-w', str(workers), '-b', f'127.0.0.1:{port}',
+                 '--log-level', 'warning', 'loadtest:sync_app()'],
+        'async': [sys.executable, '-m', 'uvicorn', '--factory', '--app-dir', BENCH_DIR,
+                  '--workers', str(workers), '--host', '127.0.0.1', '--port', str(port),
+                  '--log-level', 'warning', '--no-access-log', 'loadtest:async_app']
+    }
+
+
+def paths(anchor):
+    """Request mix: calendar reads served by the async path"""
+    week_end = anchor + timedelta(days=6)
+    month_start = anchor - timedelta(days=28)
+    return [
+        f'/api/schedule?start_date={anchor}&end_date={week_end}',
+        f'/api/schedule?start_date={month_start}&end_date={anchor}',
+        f'/api/schedule/rider?rider_id=1&start_date={month_start}&end_date={anchor}',
+        f'/api/schedule/horse?horse_id=1&start_date={month_start}&end_date={anchor}',
+        f'/api/availability?date={anchor}',
+        f'/api/calendar?start_date={anchor}&end_date={week_end}',
+        '/api/statistics',
+        '/api/statistics/riders/1'
+    ]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _seed(path, args):
+    """Create, migrate and fill a SQLite database at path"""
+    sys.path[:0] = [BACKEND_DIR, BENCH_DIR]
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    import datagen
+    from app import create_app
+    from migrations import run_migrations
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        run_migrations()
+        datagen.generate(db.engine, **datagen.scale(args))
+        db.engine.dispose()
+
+
+def _wait_ready(server, url):
+    started = time.perf_counter()
+    while time.perf_counter() - started < STARTUP_TIMEOUT:
+        if server.poll() is not None:
+            raise RuntimeError(f'server exited with {server.returncode}')
+        try:
+            with urllib.request.urlopen(url, timeout=5):
+                return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.05)
+    raise RuntimeError(f'no response within {STARTUP_TIMEOUT}s')
+
+
+def run_load(base_url, urls, concurrency, duration):
+    """(latencies ms, errors) of `concurrency` clients looping over urls for duration seconds"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(offset):
+        mine = []
+        failed = 0
+        i = offset
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(base_url + urls[i % len(urls)], timeout=60) as response:
+                    response.read()
+                mine.append((time.perf_counter() - started) * 1000)
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                failed += 1
+            i += 1
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def main():
+    sys.path.insert(0, BENCH_DIR)
+    import datagen
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    datagen.add_arguments(parser)
+    parser.add_argument('--database-url', help='existing, migrated database (default: seed a temporary SQLite file)')
+    parser.add_argument('--workers', type=int, default=2, help='worker processes per server')
+    parser.add_argument('--concurrency', type=int, default=50, help='simultaneous clients')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load per mode')
+    parser.add_argument('--query-delay-ms', type=float, default=10, help='simulated latency per SQL statement')
+    parser.add_argument('--modes', default='sync,async')
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if not database_url:
+        path = os.path.join(tempfile.mkdtemp(), 'loadtest.db')
+        _seed(path, args)
+        database_url = f'sqlite:///{path}'
+
+    urls = paths(args.anchor)
+    env = dict(os.environ, DATABASE_URL=database_url, CACHE_ENABLED='false', MIGRATE_ON_START='false')
+    env[DELAY_ENV] = str(args.query_delay_ms)
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+
+    print(f'{args.workers} workers, {args.concurrency} clients, {args.duration:.0f}s per mode, '
+          f'{args.query_delay_ms:g} ms per statement')
+    print(f"{'mode':<6} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for mode in args.modes.split(','):
+        port = _free_port()
+        server = subprocess.Popen(_servers(args.workers, port)[mode], cwd=BACKEND_DIR, env=env)
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            _wait_ready(server, base_url + urls[0])
+            latencies, errors = run_load(base_url, urls, args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+        if not latencies:
+            print(f'{mode:<6} no successful requests ({errors} errors)')
+            continue
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95)]
+        p99 = latencies[int(len(latencies) * 0.99)]
+        print(f'{mode:<6} {len(latencies):>9} {len(latencies) / args.duration:>8.1f} '
+              f'{statistics.median(latencies):>8.1f} {p95:>8.1f} {p99:>8.1f} {errors:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Startup benchmark
+
+Times a gunicorn cold start to the first served request: spawn the server,
+poll GET /api/riders until it answers 200, stop it. Two modes are compared
+against the same seeded, already migrated SQLite file:
+
+    per-worker  every worker imports and builds the app and checks the schema
+                (MIGRATE_ON_START=true, no preload), the previous behaviour
+    preload     gunicorn.conf.py: the master builds the app once, workers are
+                forked from it and migrations are left to `flask --app app migrate`
+
+Also reports the in-process cost of importing app.py and calling create_app().
+
+Usage (from backend/):
+    python benchmarks/startup.py
+    python benchmarks/startup.py --workers 8 --runs 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+STARTUP_TIMEOUT = 60  # seconds
+
+# mode: (config file, extra gunicorn arguments, environment); None stands for
+# an empty config file, i.e. gunicorn defaults without preload or post_fork
+MODES = {
+    'per-worker': (None, ['app:create_app()'], {'MIGRATE_ON_START': 'true'}),
+    'preload': (os.path.join(BACKEND_DIR, 'gunicorn.conf.py'), [], {'MIGRATE_ON_START': 'false'}),
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _seed(path):
+    """Create, migrate and fill a small SQLite database at path"""
+    code = (
+        'import sys; sys.path[:0] = [{backend!r}, {bench!r}]\n'
+        'from app import create_app\n'
+        'from migrations import run_migrations\n'
+        'from models import db\n'
+        'import datagen\n'
+        'app = create_app()\n'
+        'with app.app_context():\n'
+        '    run_migrations()\n'
+        '    datagen.generate(db.engine, years=1)\n'
+    ).format(backend=BACKEND_DIR, bench=BENCH_DIR)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{path}')
+    subprocess.run([sys.executable, '-c', code], env=env, check=True, cwd=BACKEND_DIR)
+
+
+def cold_start(mode, workers, database_url, empty_config):
+    """Seconds from spawning gunicorn to the first 200 from /api/riders"""
+    config, arguments, extra_env = MODES[mode]
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, **extra_env)
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    command = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+               '--log-level', 'warning', '-c', config or empty_config] + arguments
+    url = f'http://127.0.0.1:{port}/api/riders'
+
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f'gunicorn exited with {server.returncode} ({mode})')
+            if time.perf_counter() - started > STARTUP_TIMEOUT:
+                raise RuntimeError(f'no response within {STARTUP_TIMEOUT}s ({mode})')
+            try:
+                with urllib.request.urlopen(url, timeout=5) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def create_app_cost(database_url):
+    """Seconds to import app.py and call create_app() in a fresh interpreter"""
+    code = (
+        'import sys, time; sys.path.insert(0, {backend!r})\n'
+        'started = time.perf_counter()\n'
+        'from app import create_app\n'
+        'create_app()\n'
+        'print(time.perf_counter() - started)\n'
+    ).format(backend=BACKEND_DIR)
+    env = dict(os.environ, DATABASE_URL=database_url, MIGRATE_ON_START='false')
+    result = subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--runs', type=int, default=3, help='cold starts per mode')
+    parser.add_argument('--db', help='existing, migrated SQLite file (default: seed a temporary one)')
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.db) if args.db else os.path.join(tempfile.mkdtemp(), 'startup.db')
+    if not args.db:
+        _seed(path)
+    database_url = f'sqlite:///{path}'
+    empty_config = os.path.join(tempfile.mkdtemp(), 'empty.conf.py')
+    open(empty_config, 'w').close()
+
+    imports = [create_app_cost(database_url) for _ in range(args.runs)]
+    print(f'import + create_app(): {min(imports) * 1000:.0f} ms (fastest of {args.runs})')
+
+    print(f"{'mode':<12} {'workers':>8} {'fastest ms':>11} {'median ms':>10}")
+    samples = {mode: [] for mode in MODES}
+    # Alternate modes so machine load affects both alike
+    for _ in range(args.runs):
+        for mode in MODES:
+            samples[mode].append(cold_start(mode, args.workers, database_url, empty_config) * 1000)
+    for mode, times in samples.items():
+        print(f'{mode:<12} {args.workers:>8} {min(times):>11.0f} {statistics.median(times):>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
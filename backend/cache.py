@@ -0,0 +1,215 @@
+"""
+Serialized payload cache for reference data (riders, horses, lessons)
+Two tiers: a per-process LRU with TTL, backed by a shared tier so all
+gunicorn workers see the same payloads. The shared tier is Redis when
+CACHE_REDIS_URL is set; otherwise an in-memory, per-process stand-in that
+only its own worker sees. Invalidation is per namespace: the namespace
+generation lives in the shared tier and is part of every key, so bumping it
+retires the entries of every worker sharing that tier at once.
+"""
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, g, request
+
+
+class LocalCache:
+    """Thread-safe LRU dict with per-entry TTL"""
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class LocalSharedTier:
+    """In-process stand-in for the shared tier (tests, single worker)
+
+    Per-process: it is NOT shared across gunicorn workers, so without
+    CACHE_REDIS_URL each worker invalidates only its own entries. Payloads
+    are bounded like LocalCache (LRU with max_entries, expired entries
+    pruned on write); the generation counters are kept apart and never
+    evicted, since losing one would resurrect retired payloads.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._values = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._values[key]
+                return None
+            self._values.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            now = time.monotonic()
+            self._values[key] = (value, now + ttl)
+            self._values.move_to_end(key)
+            for stale in [k for k, (_, expires) in self._values.items() if expires < now]:
+                del self._values[stale]
+            while len(self._values) > self.max_entries:
+                self._values.popitem(last=False)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def get_int(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def __len__(self):
+        return len(self._values)
+
+
+class RedisSharedTier:
+    """Shared tier on Redis (requires the optional `redis` package)"""
+
+    def __init__(self, url, prefix='equestrian:cache:'):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        value = self._client.get(self._prefix + key)
+        return value.decode() if value is not None else None
+
+    def set(self, key, value, ttl):
+        self._client.set(self._prefix + key, value, ex=int(ttl))
+
+    def incr(self, key):
+        return self._client.incr(self._prefix + key)
+
+    def get_int(self, key):
+        return int(self._client.get(self._prefix + key) or 0)
+
+
+class PayloadCache:
+    """Namespaced two-tier cache of serialized response bodies"""
+
+    def __init__(self):
+        self.local = LocalCache()
+        self.shared = LocalSharedTier()
+        self.enabled = True
+        self._counters = {}
+        self._lock = threading.Lock()
+        # fn(namespace, outcome) callbacks, e.g. the Prometheus counters in metrics.py
+        self.observers = []
+
+    def init_app(self, app):
+        """Configure tiers from CACHE_* settings"""
+        self.enabled = app.config.get('CACHE_ENABLED', True)
+        self.local = LocalCache(
+            max_entries=app.config.get('CACHE_MAX_ENTRIES', 256),
+            ttl=app.config.get('CACHE_TTL', 300)
+        )
+        redis_url = app.config.get('CACHE_REDIS_URL')
+        if redis_url:
+            self.shared = RedisSharedTier(redis_url)
+        else:
+            self.shared = LocalSharedTier(max_entries=app.config.get('CACHE_MAX_ENTRIES', 256))
+        app.extensions['payload_cache'] = self
+
+    def _count(self, namespace, outcome):
+        with self._lock:
+            counters = self._counters.setdefault(namespace, {'hits': 0, 'shared_hits': 0, 'misses': 0})
+            counters[outcome] += 1
+        for observer in self.observers:
+            observer(namespace, outcome)
+
+    def get_or_set(self, namespace, key, loader):
+        """Cached payload for (namespace, key), computing it with loader() on a miss"""
+        if not self.enabled:
+            return loader()
+
+        generation = self.shared.get_int(f'gen:{namespace}')
+        full_key = f'{namespace}:{generation}:{key}'
+
+        value = self.local.get(full_key)
+        if value is not None:
+            self._count(namespace, 'hits')
+            return value
+
+        value = self.shared.get(full_key)
+        if value is not None:
+            self._count(namespace, 'shared_hits')
+            self.local.set(full_key, value)
+            return value
+
+        self._count(namespace, 'misses')
+        value = loader()
+        self.local.set(full_key, value)
+        self.shared.set(full_key, value, self.local.ttl)
+        return value
+
+    def invalidate(self, *namespaces):
+        """Retire every cached entry of the namespaces, in all workers"""
+        for namespace in namespaces:
+            self.shared.incr(f'gen:{namespace}')
+            self.local.delete_prefix(f'{namespace}:')
+
+    def stats(self):
+        """{namespace: {'hits', 'shared_hits', 'misses'}} since process start"""
+        with self._lock:
+            return {namespace: dict(counters) for namespace, counters in self._counters.items()}
+
+
+payload_cache = PayloadCache()
+
+
+def request_key():
+    """Cache key for the current GET
+
+    Prefers the ETag computed by @conditional, which already folds in the URL
+    and the table versions, so a worker can never pair a stale payload with a
+    fresh ETag even when only the local tier is in use.
+    """
+    return g.get('etag') or request.full_path
+
+
+def serialize(data):
+    """JSON body exactly as jsonify() would render it"""
+    return current_app.json.response(data).get_data(as_text=True)
@@ -6,6 +6,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _sqlalchemy_url(url):
+    """Render's postgres:// URLs as postgresql:// (SQLAlchemy requirement)"""
+    if url and url.startswith('postgres://'):
+        return url.replace('postgres://', 'postgresql://', 1)
+    return url
+
+
 class Config:
     """Application configuration"""
 
@@ -15,11 +23,7 @@ class Config:
 
     # Database configuration
     # Render provides DATABASE_URL for PostgreSQL
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
-
-    # Fix Render's postgres:// URL to postgresql:// (SQLAlchemy requirement)
-    if SQLALCHEMY_DATABASE_URI and SQLALCHEMY_DATABASE_URI.startswith("postgres://"):
-        SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace("postgres://", "postgresql://", 1)
+    SQLALCHEMY_DATABASE_URI = _sqlalchemy_url(os.environ.get('DATABASE_URL'))
 
     # Fallback to SQLite for local development
     if not SQLALCHEMY_DATABASE_URI:
@@ -34,5 +38,50 @@ class Config:
         'max_overflow': 20
     }
 
+    # Async serving mode (asgi.py); derived from DATABASE_URL when unset
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
+
+    # Apply pending migrations in create_app(); off by default so workers boot
+    # without touching the schema (run `flask --app app migrate` on deploy instead)
+    MIGRATE_ON_START = os.environ.get('MIGRATE_ON_START', 'False').lower() == 'true'
+
+    # Reference-data payload cache (cache.py); set CACHE_REDIS_URL to share it across workers
+    CACHE_ENABLED = os.environ.get('CACHE_ENABLED', 'True').lower() == 'true'
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 256))
+    CACHE_TTL = int(os.environ.get('CACHE_TTL', 300))  # seconds
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+
+    # Per-request SQL profiling (profiling.py): Server-Timing headers and a slow-request log
+    PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS', 'False').lower() == 'true'
+    SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 500))
+    SLOW_REQUEST_LOG = os.environ.get('SLOW_REQUEST_LOG')  # file path; stderr when unset
+
+    # Response compression (encoding.py): gzip, or brotli when installed, above COMPRESS_MIN_SIZE bytes
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'True').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+
+    # Changes feed (routes/changes.py): the next cursor trails the read by
+    # CHANGES_SETTLE_SECONDS so writes stamped just before it but committed after
+    # are picked up by the following call; tombstones are kept CHANGES_RETENTION_DAYS
+    CHANGES_SETTLE_SECONDS = int(os.environ.get('CHANGES_SETTLE_SECONDS', 10))
+    CHANGES_RETENTION_DAYS = int(os.environ.get('CHANGES_RETENTION_DAYS', 90))
+
+    # Change events (stream.py, GET /api/stream): Postgres NOTIFY fan-out unless
+    # disabled, otherwise in-process delivery; keepalive comment interval
+    STREAM_NOTIFY = os.environ.get('STREAM_NOTIFY', 'True').lower() == 'true'
+    STREAM_HEARTBEAT_SECONDS = int(os.environ.get('STREAM_HEARTBEAT_SECONDS', 15))
+
+    # Read replicas (replicas.py): comma-separated URLs; the queries of GET/HEAD
+    # requests go to a reachable replica, skipping one that failed for
+    # REPLICA_RETRY_SECONDS. Replication lag must stay under REPLICA_LAG_SECONDS,
+    # by which cursors handed out by replica reads trail as well
+    SQLALCHEMY_REPLICA_URIS = [
+        _sqlalchemy_url(url.strip()) for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()
+    ]
+    REPLICA_RETRY_SECONDS = int(os.environ.get('REPLICA_RETRY_SECONDS', 30))
+    REPLICA_LAG_SECONDS = int(os.environ.get('REPLICA_LAG_SECONDS', 30))
+
     # CORS configuration
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
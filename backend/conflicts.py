@@ -0,0 +1,119 @@
+"""
+Double-booking detection
+A horse or rider cannot be in two non-cancelled sessions whose intervals
+overlap. Single writes check candidates fetched through the (horse_id,
+start_time) / (rider_id, start_time) indexes; whole windows are checked with
+a sort-and-sweep pass instead of pairwise comparison.
+"""
+import heapq
+from datetime import timedelta
+from sqlalchemy import or_
+from models import Schedule, eager_names
+
+# Sessions longer than this are rejected, which bounds how far back a
+# conflicting session can start and keeps the index range scan short
+MAX_SESSION_LENGTH = timedelta(hours=12)
+
+
+def validate_interval(start, end):
+    """Raise ValueError unless start < end within MAX_SESSION_LENGTH"""
+    if end <= start:
+        raise ValueError('end_time must be after start_time')
+    if end - start > MAX_SESSION_LENGTH:
+        raise ValueError(f'Sessions cannot be longer than {MAX_SESSION_LENGTH.total_seconds() / 3600:g} hours')
+
+
+def find_conflicts(start, end, horse_id=None, rider_id=None, exclude_id=None):
+    """Non-cancelled sessions sharing the horse or rider that overlap [start, end)"""
+    resources = []
+    if horse_id is not None:
+        resources.append(Schedule.horse_id == horse_id)
+    if rider_id is not None:
+        resources.append(Schedule.rider_id == rider_id)
+    if not resources:
+        return []
+
+    query = Schedule.query.filter(
+        or_(*resources),
+        Schedule.start_time > start - MAX_SESSION_LENGTH,
+        Schedule.start_time < end,
+        or_(Schedule.status.is_(None), Schedule.status != 'cancelled')
+    )
+    if exclude_id is not None:
+        query = query.filter(Schedule.id != exclude_id)
+
+    return [s for s in query.order_by(Schedule.start_time) if s.end_time > start]
+
+
+def sweep_overlaps(intervals):
+    """Overlapping pairs among intervals that share a resource
+
+    intervals: iterable of (resource, start, end, item); entries whose resource
+    is None are ignored. Returns [(resource, earlier_item, later_item)] in
+    O(n log n + k) using one min-heap of end times per resource.
+    """
+    active = {}
+    pairs = []
+    for order, (resource, start, end, item) in enumerate(sorted(intervals, key=lambda i: i[1])):
+        if resource is None:
+            continue
+        heap = active.setdefault(resource, [])
+        while heap and heap[0][0] <= start:
+            heapq.heappop(heap)
+        for _, _, other in heap:
+            pairs.append((resource, other, item))
+        heapq.heappush(heap, (end, order, item))
+    return pairs
+
+
+def session_intervals(sessions):
+    """(resource, start, end, session) entries for horses and riders of sessions"""
+    for s in sessions:
+        if s.horse_id is not None:
+            yield ('horse', s.horse_id), s.start_time, s.end_time, s
+        if s.rider_id is not None:
+            yield ('rider', s.rider_id), s.start_time, s.end_time, s
+
+
+def pending_conflicts(pending, replaced_ids=()):
+    """{index: [conflicts]} for pending sessions (objects with index, horse_id, rider_id, start_time, end_time, status)
+
+    Checks against stored sessions (except replaced_ids, which the caller
+    updates or deletes) and between the pending sessions themselves, using
+    one range query over their horses and riders and one sweep. A stored
+    conflict is reported as its to_dict(), a pending one as {'index': i}.
+    """
+    active = [p for p in pending if p.status != 'cancelled']
+    horses = {p.horse_id for p in active if p.horse_id is not None}
+    riders = {p.rider_id for p in active if p.rider_id is not None}
+    resources = []
+    if horses:
+        resources.append(Schedule.horse_id.in_(horses))
+    if riders:
+        resources.append(Schedule.rider_id.in_(riders))
+    if not resources:
+        return {}
+
+    query = Schedule.query.options(*eager_names(Schedule)).filter(
+        or_(*resources),
+        Schedule.start_time > min(p.start_time for p in active) - MAX_SESSION_LENGTH,
+        Schedule.start_time < max(p.end_time for p in active),
+        or_(Schedule.status.is_(None), Schedule.status != 'cancelled')
+    )
+    if replaced_ids:
+        query = query.filter(Schedule.id.notin_(replaced_ids))
+
+    conflicts = {}
+    reported = set()
+    for _, first, second in sweep_overlaps(session_intervals([*query.all(), *active])):
+        for mine, other in ((first, second), (second, first)):
+            if isinstance(mine, Schedule):
+                continue
+            if isinstance(other, Schedule):
+                key, entry = ('stored', other.id), other.to_dict()
+            else:
+                key, entry = ('batch', other.index), {'index': other.index}
+            if (mine.index, key) not in reported:
+                reported.add((mine.index, key))
+                conflicts.setdefault(mine.index, []).append(entry)
+    return conflicts
@@ -0,0 +1,84 @@
+"""
+Response encoding
+JSON is produced by orjson when it is installed (same output types as
+Flask's encoder: sorted keys, dates via Flask's default hook, UTF-8 instead
+of \\u escapes), otherwise by the standard library. Compressible responses
+of at least COMPRESS_MIN_SIZE bytes are sent brotli- (when the Brotli
+package is installed) or gzip-encoded, following the client's
+Accept-Encoding.
+"""
+import gzip
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html'}
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider whose dumps() goes through orjson"""
+
+    def dumps(self, obj, **kwargs):
+        indent = kwargs.pop('indent', None)
+        kwargs.pop('separators', None)  # orjson output is always compact
+        if orjson is None or kwargs:
+            if indent:
+                kwargs['indent'] = indent
+            return super().dumps(obj, **kwargs)
+        # Datetimes go through Flask's default() so they render as before
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def _encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def _compress(min_size, gzip_level, brotli_quality):
+    def compress(response):
+        if (response.direct_passthrough or response.is_streamed
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or not 200 <= response.status_code < 300
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(_encodings())
+        if encoding is None or response.content_length is None or response.content_length < min_size:
+            return response
+
+        data = response.get_data()
+        if encoding == 'br':
+            response.set_data(brotli.compress(data, quality=brotli_quality))
+        else:
+            response.set_data(gzip.compress(data, compresslevel=gzip_level, mtime=0))
+        response.headers['Content-Encoding'] = encoding
+        return response
+    return compress
+
+
+def init_app(app):
+    """Install the JSON provider and, unless disabled, response compression"""
+    app.json = FastJSONProvider(app)
+    if app.config.get('COMPRESS_ENABLED', True):
+        app.after_request(_compress(
+            app.config.get('COMPRESS_MIN_SIZE', 1024),
+            app.config.get('COMPRESS_GZIP_LEVEL', 6),
+            app.config.get('COMPRESS_BROTLI_QUALITY', 4)
+        ))
@@ -0,0 +1,90 @@
+"""
+Sparse fieldsets
+?fields=id,name,start_time limits a model endpoint's objects to those keys of
+to_dict(). The selection is pushed into the SELECT: only the columns behind
+the requested keys are loaded, and rider/horse names are only joined when
+rider_name/horse_name are asked for.
+"""
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only
+from models import eager_names
+
+# to_dict() keys showing a related row's name: key -> relationship
+RELATED_NAMES = {'rider_name': 'rider', 'horse_name': 'horse'}
+
+_keys = {}
+
+
+class FieldsetError(ValueError):
+    """Raised for unknown or empty ?fields="""
+
+
+def available_fields(model):
+    """to_dict() keys of model, in to_dict() order"""
+    if model not in _keys:
+        # A transient instance serializes without touching the database
+        _keys[model] = tuple(model().to_dict())
+    return _keys[model]
+
+
+class Fieldset:
+    """Requested to_dict() keys of one model"""
+
+    def __init__(self, model, names):
+        self.model = model
+        self.names = [name for name in available_fields(model) if name in names]
+
+    def options(self, *required):
+        """Loader options: the requested columns plus required ones (e.g. cursor columns)"""
+        mapper = inspect(self.model)
+        keys = [mapper.get_property_by_column(c).key for c in mapper.primary_key]
+        keys += [attribute.key for attribute in required]
+        related = []
+        for name in self.names:
+            if name in RELATED_NAMES:
+                relationship = getattr(self.model, RELATED_NAMES[name])
+                target = relationship.property.mapper.class_
+                keys += [mapper.get_property_by_column(c).key for c in relationship.property.local_columns]
+                related.append(joinedload(relationship).load_only(target.name))
+            else:
+                keys.append(name)
+        return (load_only(*[getattr(self.model, key) for key in dict.fromkeys(keys)]), *related)
+
+    def dump(self, obj):
+        """The requested part of obj.to_dict(), reading only loaded attributes"""
+        result = {}
+        for name in self.names:
+            if name in RELATED_NAMES:
+                related = getattr(obj, RELATED_NAMES[name])
+                result[name] = related.name if related else None
+            else:
+                value = getattr(obj, name)
+                result[name] = value.isoformat() if hasattr(value, 'isoformat') else value
+        return result
+
+
+def parse_fields(model, args):
+    """?fields= as a Fieldset, or None when absent; raises FieldsetError"""
+    raw = args.get('fields')
+    if raw is None:
+        return None
+    names = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = names - set(available_fields(model))
+    if not names or unknown:
+        raise FieldsetError(
+            f"Unknown field(s) {', '.join(sorted(unknown)) or '(none given)'}; "
+            f"available: {', '.join(available_fields(model))}"
+        )
+    return Fieldset(model, names)
+
+
+def query_options(model, fieldset, *required):
+    """Loader options for serializing with fieldset (None: full to_dict())"""
+    if fieldset is not None:
+        return fieldset.options(*required)
+    return eager_names(model) if hasattr(model, 'rider') else ()
+
+
+def dump(obj, fieldset):
+    """obj.to_dict(), restricted to fieldset when given"""
+    return obj.to_dict() if fieldset is None else fieldset.dump(obj)
@@ -0,0 +1,60 @@
+"""
+List filters
+?active=, ?owner_id=, ?day= and ?lesson_type= narrow the riders, horses and
+recurring lessons listings in SQL, so only matching rows are loaded and
+serialized. Each filter is an equality test served by an index (see the
+models' __table_args__).
+"""
+from sqlalchemy import false, true
+from models import Horse, RecurringLesson, Rider
+from recurrence import WEEKDAYS
+
+
+class FilterError(ValueError):
+    """Raised for an unknown or malformed filter value"""
+
+
+def _boolean(name, raw):
+    value = raw.strip().lower()
+    if value in ('true', '1', 'yes'):
+        return true()
+    if value in ('false', '0', 'no'):
+        return false()
+    raise FilterError(f'{name} must be true or false')
+
+
+def _integer(name, raw):
+    try:
+        return int(raw)
+    except ValueError:
+        raise FilterError(f'{name} must be an integer')
+
+
+def _weekday(name, raw):
+    value = raw.strip().lower()
+    if value not in WEEKDAYS:
+        raise FilterError(f"{name} must be one of {', '.join(WEEKDAYS)}")
+    return value
+
+
+def _text(name, raw):
+    if not raw.strip():
+        raise FilterError(f'{name} must not be empty')
+    return raw.strip()
+
+
+# Accepted query arguments per model: name -> value parser
+FILTERS = {
+    Rider: {'active': _boolean},
+    Horse: {'active': _boolean, 'owner_id': _integer},
+    RecurringLesson: {'active': _boolean, 'day': _weekday, 'lesson_type': _text}
+}
+
+
+def apply_filters(query, model, args):
+    """query restricted by the model's filters present in args; raises FilterError"""
+    for name, parse in FILTERS[model].items():
+        raw = args.get(name)
+        if raw is not None:
+            query = query.filter(getattr(model, name) == parse(name, raw))
+    return query
@@ -0,0 +1,45 @@
+"""
+Gunicorn settings
+Picked up automatically when gunicorn is started from backend/:
+    flask --app app migrate && gunicorn
+
+The app is built once in the master (preload_app) and forked into the
+workers, so worker boots skip imports and app construction entirely.
+Migrations are not part of startup; run them as a separate deploy step.
+Connection pools inherited from the master are dropped after fork.
+
+Each open /api/stream holds a worker thread: with the default sync workers
+(WEB_THREADS=1) that is a whole worker, so set WEB_THREADS to run gthread
+workers, or serve streams through asgi.py.
+
+With PROMETHEUS_MULTIPROC_DIR set, worker metrics are written there and
+aggregated by /metrics (see metrics.py); the directory is emptied on start
+and the samples of exited workers are retired.
+"""
+import glob
+import os
+
+wsgi_app = 'app:create_app()'
+preload_app = True
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+threads = int(os.environ.get('WEB_THREADS', 1))
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+
+# Emptied here rather than in on_starting: the preloaded app creates its
+# metric files before that hook runs
+multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if multiproc_dir:
+    os.makedirs(multiproc_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(multiproc_dir, '*.db')):
+        os.remove(path)
+
+
+def post_fork(server, worker):
+    from app import dispose_engines
+    dispose_engines(server.app.wsgi())
+
+
+def child_exit(server, worker):
+    if multiproc_dir:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
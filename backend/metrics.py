@@ -0,0 +1,164 @@
+"""
+Prometheus metrics
+Per-route request counters, latency histograms and in-flight gauges, SQL
+connection pool checkout wait and usage, and payload-cache lookups, served
+in text format at /metrics.
+
+Under gunicorn set PROMETHEUS_MULTIPROC_DIR to an empty, writable directory
+(gunicorn.conf.py wipes it on start and retires dead workers): every worker
+then writes its samples there and /metrics aggregates all of them, whichever
+worker answers the scrape. Without it, /metrics reports this process only.
+"""
+import os
+import time
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+    generate_latest, multiprocess
+)
+from sqlalchemy import event
+from models import db
+from cache import payload_cache
+
+REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests handled',
+    ['method', 'route', 'status']
+)
+LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time from request start to response',
+    ['method', 'route'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+IN_FLIGHT = Gauge(
+    'http_requests_in_progress', 'Requests currently being handled',
+    ['method', 'route'], multiprocess_mode='livesum'
+)
+POOL_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds', 'Time to obtain a pooled database connection',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+POOL_CHECKED_OUT = Gauge(
+    'db_pool_connections_in_use', 'Pooled connections currently checked out',
+    multiprocess_mode='livesum'
+)
+POOL_CAPACITY = Gauge(
+    'db_pool_capacity', 'pool_size + max_overflow of live workers',
+    multiprocess_mode='livesum'
+)
+CACHE_LOOKUPS = Counter(
+    'payload_cache_lookups_total', 'Payload cache lookups by outcome (hits, shared_hits, misses)',
+    ['namespace', 'outcome']
+)
+
+_instrumented_pools = {}
+_engines = []
+# Process that last published POOL_CAPACITY; a preloaded gunicorn master
+# forks workers that must publish their own
+_capacity_pid = None
+
+
+def _instrumented(pool_class):
+    """Subclass of pool_class timing connect(); survives engine.dispose()"""
+    if pool_class not in _instrumented_pools:
+        class InstrumentedPool(pool_class):
+            def connect(self):
+                started = time.perf_counter()
+                try:
+                    return super().connect()
+                finally:
+                    POOL_WAIT.observe(time.perf_counter() - started)
+
+        InstrumentedPool.__name__ = f'Instrumented{pool_class.__name__}'
+        _instrumented_pools[pool_class] = InstrumentedPool
+    return _instrumented_pools[pool_class]
+
+
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+    POOL_CHECKED_OUT.inc()
+
+
+def _checkin(dbapi_connection, connection_record):
+    POOL_CHECKED_OUT.dec()
+
+
+def _cache_lookup(namespace, outcome):
+    CACHE_LOOKUPS.labels(namespace, outcome).inc()
+
+
+def _pool_capacity():
+    total = 0
+    for engine in _engines:
+        pool = engine.pool
+        size = pool.size() if hasattr(pool, 'size') else 1
+        total += size + max(getattr(pool, '_max_overflow', 0), 0)
+    return total
+
+
+def _route():
+    return request.url_rule.rule if request.url_rule else '<unmatched>'
+
+
+def _before_request():
+    global _capacity_pid
+    if _capacity_pid != os.getpid():
+        _capacity_pid = os.getpid()
+        POOL_CAPACITY.set(_pool_capacity())
+    if request.path == '/metrics':
+        return
+    g._metrics_started = time.perf_counter()
+    g._metrics_labels = (request.method, _route())
+    IN_FLIGHT.labels(*g._metrics_labels).inc()
+
+
+def _after_request(response):
+    labels = g.get('_metrics_labels')
+    if labels is not None:
+        LATENCY.labels(*labels).observe(time.perf_counter() - g._metrics_started)
+        REQUESTS.labels(*labels, str(response.status_code)).inc()
+    return response
+
+
+def _teardown_request(exc):
+    # Pop both, so neither leaks into a later request sharing this g
+    g.pop('_metrics_started', None)
+    labels = g.pop('_metrics_labels', None)
+    if labels is not None:
+        IN_FLIGHT.labels(*labels).dec()
+
+
+def _metrics():
+    """Prometheus scrape endpoint"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def instrument_engine(engine):
+    """Report engine's pool (checkout wait, connections in use, capacity)"""
+    global _capacity_pid
+    pool = engine.pool
+    if not type(pool).__name__.startswith('Instrumented'):
+        pool.__class__ = _instrumented(type(pool))
+        if not event.contains(engine, 'checkout', _checkout):
+            event.listen(engine, 'checkout', _checkout)
+            event.listen(engine, 'checkin', _checkin)
+        _engines.append(engine)
+        _capacity_pid = None
+
+
+def init_app(app):
+    """Register the request hooks, pool and cache instrumentation and /metrics"""
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+    if _cache_lookup not in payload_cache.observers:
+        payload_cache.observers.append(_cache_lookup)
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', _metrics)
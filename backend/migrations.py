@@ -0,0 +1,171 @@
+"""
+Versioned schema migrations
+Each migration runs once, in order, inside its own transaction and is recorded
+in the schema_version table. Replaces db.create_all() at startup.
+
+Adding a migration: append a function decorated with @migration(<next
+version>, '<description>'). Migrations must be idempotent against databases
+that were created by the old db.create_all() (use checkfirst / inspect).
+"""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from models import (
+    db, Rider, Horse, RecurringLesson, Schedule, Availability, RecurringLessonException,
+    ScheduleDailyStat, TableVersion, DeletedRow
+)
+import rollup
+import search
+import versioning
+
+schema_version = Table(
+    'schema_version', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+MIGRATIONS = []
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent workers migrate one at a time
+_LOCK_KEY = 0x45515549
+
+
+def migration(version, description):
+    """Register fn(conn) as migration number `version`"""
+    def register(fn):
+        assert not MIGRATIONS or MIGRATIONS[-1][0] < version, 'migrations must be declared in order'
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+
+def _create_indexes(conn, table, *names):
+    """Create the named indexes declared on table unless they already exist"""
+    for index in table.indexes:
+        if index.name in names:
+            index.create(conn, checkfirst=True)
+
+
+def _add_column(conn, table, column):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists"""
+    existing = {c['name'] for c in inspect(conn).get_columns(table.name)}
+    if column.name in existing:
+        return
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+
+@migration(1, 'baseline tables')
+def _baseline(conn):
+    db.metadata.create_all(conn, tables=[
+        Rider.__table__, Horse.__table__, RecurringLesson.__table__,
+        Schedule.__table__, Availability.__table__
+    ])
+
+
+@migration(2, 'schedule access-path and active partial indexes')
+def _hot_path_indexes(conn):
+    _create_indexes(
+        conn, Schedule.__table__,
+        'ix_schedule_start_time', 'ix_schedule_rider_start',
+        'ix_schedule_horse_start', 'ix_schedule_status_start'
+    )
+    _create_indexes(conn, Rider.__table__, 'ix_riders_active_name')
+    _create_indexes(conn, Horse.__table__, 'ix_horses_active_name')
+    _create_indexes(conn, RecurringLesson.__table__, 'ix_recurring_lessons_active_day_time')
+
+
+@migration(3, 'recurring lesson exceptions and schedule.lesson_id')
+def _recurring_exceptions(conn):
+    _add_column(conn, Schedule.__table__, Schedule.__table__.c.lesson_id)
+    _create_indexes(conn, Schedule.__table__, 'ix_schedule_lesson_start')
+    RecurringLessonException.__table__.create(conn, checkfirst=True)
+
+
+@migration(4, 'schedule daily statistics rollup')
+def _daily_rollup(conn):
+    ScheduleDailyStat.__table__.create(conn, checkfirst=True)
+    rollup.backfill(conn)
+
+
+@migration(5, 'per-table version counters')
+def _table_versions(conn):
+    TableVersion.__table__.create(conn, checkfirst=True)
+    existing = set(conn.execute(select(TableVersion.name)).scalars())
+    missing = [name for name in versioning.TRACKED_TABLES if name not in existing]
+    if missing:
+        conn.execute(TableVersion.__table__.insert(), [
+            {'name': name, 'version': 1, 'updated_at': datetime.utcnow()} for name in missing
+        ])
+
+
+@migration(6, 'rider and horse search indexes')
+def _search_indexes(conn):
+    search.install(conn)
+
+
+@migration(7, 'list filter indexes and lowercase recurring lesson days')
+def _filter_indexes(conn):
+    # ?day= matches the stored value exactly, so store it the way it is parsed
+    lessons = RecurringLesson.__table__
+    conn.execute(
+        lessons.update()
+        .where(lessons.c.day != db.func.lower(lessons.c.day))
+        .values(day=db.func.lower(lessons.c.day), updated_at=lessons.c.updated_at)
+    )
+    _create_indexes(conn, Rider.__table__, 'ix_riders_active_id')
+    _create_indexes(conn, Horse.__table__, 'ix_horses_active_id', 'ix_horses_owner_id')
+    _create_indexes(
+        conn, RecurringLesson.__table__,
+        'ix_recurring_lessons_day_time', 'ix_recurring_lessons_type_day_time'
+    )
+
+
+def _stamp_updated_at(conn, table):
+    """Backfill updated_at and index it: rows without a timestamp would never show up in incremental syncs"""
+    conn.execute(
+        table.update()
+        .where(table.c.updated_at.is_(None))
+        .values(updated_at=db.func.coalesce(table.c.created_at, datetime.utcnow()))
+    )
+    _create_indexes(conn, table, f'ix_{table.name}_updated_at')
+
+
+@migration(8, 'changes feed: deletion log and updated_at indexes')
+def _changes_feed(conn):
+    DeletedRow.__table__.create(conn, checkfirst=True)
+    _add_column(conn, Availability.__table__, Availability.__table__.c.updated_at)
+    # The tables synced as of this version (later ones get their own migration)
+    for model in (Rider, Horse, RecurringLesson, Availability, Schedule):
+        _stamp_updated_at(conn, model.__table__)
+
+
+@migration(9, 'changes feed: recurring lesson exceptions')
+def _synced_exceptions(conn):
+    table = RecurringLessonException.__table__
+    _add_column(conn, table, table.c.updated_at)
+    _stamp_updated_at(conn, table)
+
+
+def current_version(conn):
+    """Highest applied migration, 0 for an unmanaged database"""
+    schema_version.create(conn, checkfirst=True)
+    return conn.execute(select(db.func.max(schema_version.c.version))).scalar() or 0
+
+
+def run_migrations(engine=None):
+    """Apply every pending migration; returns the list of versions applied"""
+    engine = engine or db.engine
+    applied = []
+    for version, description, fn in MIGRATIONS:
+        with engine.begin() as conn:
+            if conn.dialect.name == 'postgresql':
+                conn.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': _LOCK_KEY})
+            if current_version(conn) >= version:
+                continue
+            fn(conn)
+            conn.execute(schema_version.insert().values(
+                version=version, description=description, applied_at=datetime.utcnow()
+            ))
+            applied.append(version)
+    return applied
@@ -8,9 +8,12 @@ All French terms translated to English:
 - disponibilites → availability
 """
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import true
+from sqlalchemy.orm import joinedload
 from datetime import datetime
+from replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class Rider(db.Model):
     """Rider model (formerly cavaliers)"""
@@ -25,6 +28,16 @@ class Rider(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Partial: only active riders are listed, counted and booked
+        db.Index('ix_riders_active_name', 'name',
+                 postgresql_where=active == true(), sqlite_where=active == true()),
+        # ?active= listings, paged by id (filters.py)
+        db.Index('ix_riders_active_id', 'active', 'id'),
+        # Changes feed (routes/changes.py)
+        db.Index('ix_riders_updated_at', 'updated_at'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -50,6 +63,15 @@ class Horse(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_horses_active_name', 'name',
+                 postgresql_where=active == true(), sqlite_where=active == true()),
+        # ?active= and ?owner_id= listings, paged by id (filters.py)
+        db.Index('ix_horses_active_id', 'active', 'id'),
+        db.Index('ix_horses_owner_id', 'owner_id', 'id'),
+        db.Index('ix_horses_updated_at', 'updated_at'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -69,7 +91,7 @@ class RecurringLesson(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     rider_id = db.Column(db.Integer, db.ForeignKey('riders.id'))
     horse_id = db.Column(db.Integer, db.ForeignKey('horses.id'), nullable=True)
-    day = db.Column(db.String(20))  # Day of week (Monday, Tuesday, etc.)
+    day = db.Column(db.String(20))  # Day of week, lowercase (monday, tuesday, etc.)
     time = db.Column(db.String(10))  # Time (HH:MM format)
     duration = db.Column(db.Integer)  # Duration in minutes
     lesson_type = db.Column(db.String(50))
@@ -81,6 +103,15 @@ class RecurringLesson(db.Model):
     rider = db.relationship('Rider', backref='recurring_lessons')
     horse = db.relationship('Horse', backref='recurring_lessons')
 
+    __table_args__ = (
+        db.Index('ix_recurring_lessons_active_day_time', 'day', 'time',
+                 postgresql_where=active == true(), sqlite_where=active == true()),
+        # ?day= and ?lesson_type= listings regardless of active (filters.py)
+        db.Index('ix_recurring_lessons_day_time', 'day', 'time'),
+        db.Index('ix_recurring_lessons_type_day_time', 'lesson_type', 'day', 'time'),
+        db.Index('ix_recurring_lessons_updated_at', 'updated_at'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -104,6 +135,7 @@ class Schedule(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     rider_id = db.Column(db.Integer, db.ForeignKey('riders.id'))
     horse_id = db.Column(db.Integer, db.ForeignKey('horses.id'))
+    lesson_id = db.Column(db.Integer, db.ForeignKey('recurring_lessons.id'), nullable=True)  # Set when materialized from a recurring lesson
     lesson_type = db.Column(db.String(50))
     start_time = db.Column(db.DateTime, nullable=False)
     end_time = db.Column(db.DateTime, nullable=False)
@@ -115,6 +147,17 @@ class Schedule(db.Model):
     rider = db.relationship('Rider', backref='sessions')
     horse = db.relationship('Horse', backref='sessions')
 
+    # Every schedule read is a start_time range, optionally narrowed by
+    # rider, horse or status (see routes/schedule.py and routes/stats.py)
+    __table_args__ = (
+        db.Index('ix_schedule_start_time', 'start_time'),
+        db.Index('ix_schedule_rider_start', 'rider_id', 'start_time'),
+        db.Index('ix_schedule_horse_start', 'horse_id', 'start_time'),
+        db.Index('ix_schedule_status_start', 'status', 'start_time'),
+        db.Index('ix_schedule_lesson_start', 'lesson_id', 'start_time'),
+        db.Index('ix_schedule_updated_at', 'updated_at'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -122,6 +165,7 @@ class Schedule(db.Model):
             'rider_name': self.rider.name if self.rider else None,
             'horse_id': self.horse_id,
             'horse_name': self.horse.name if self.horse else None,
+            'lesson_id': self.lesson_id,
             'lesson_type': self.lesson_type,
             'start_time': self.start_time.isoformat() if self.start_time else None,
             'end_time': self.end_time.isoformat() if self.end_time else None,
@@ -130,6 +174,90 @@ class Schedule(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class RecurringLessonException(db.Model):
+    """Per-date cancellation or override of a recurring lesson"""
+    __tablename__ = 'recurring_lesson_exceptions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    lesson_id = db.Column(db.Integer, db.ForeignKey('recurring_lessons.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)  # Date of the occurrence being changed
+    cancelled = db.Column(db.Boolean, default=False)
+    time = db.Column(db.String(10))  # Override time (HH:MM format)
+    duration = db.Column(db.Integer)  # Override duration in minutes
+    horse_id = db.Column(db.Integer, db.ForeignKey('horses.id'), nullable=True)  # Override horse
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    lesson = db.relationship('RecurringLesson', backref='exceptions')
+    horse = db.relationship('Horse')
+
+    __table_args__ = (
+        db.UniqueConstraint('lesson_id', 'date', name='uq_recurring_lesson_exceptions_lesson_date'),
+        db.Index('ix_recurring_lesson_exceptions_updated_at', 'updated_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'lesson_id': self.lesson_id,
+            'date': self.date.isoformat() if self.date else None,
+            'cancelled': self.cancelled,
+            'time': self.time,
+            'duration': self.duration,
+            'horse_id': self.horse_id
+        }
+
+def eager_names(model):
+    """Loader options fetching rider/horse names in the same SELECT as the rows
+
+    Schedule and RecurringLesson serialize rider_name/horse_name; without this
+    every row of a listing lazy-loads its rider and horse separately.
+    """
+    return (
+        joinedload(model.rider).load_only(Rider.name),
+        joinedload(model.horse).load_only(Horse.name)
+    )
+
+class ScheduleDailyStat(db.Model):
+    """Daily rollup of schedule sessions, maintained by rollup.py
+
+    Missing rider/horse/status are stored as 0/0/'' so the key stays unique.
+    """
+    __tablename__ = 'schedule_daily_stats'
+
+    date = db.Column(db.Date, primary_key=True)
+    rider_id = db.Column(db.Integer, primary_key=True, default=0)
+    horse_id = db.Column(db.Integer, primary_key=True, default=0)
+    status = db.Column(db.String(20), primary_key=True, default='')
+    session_count = db.Column(db.Integer, nullable=False, default=0)
+    minutes = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_schedule_daily_stats_rider_date', 'rider_id', 'date'),
+        db.Index('ix_schedule_daily_stats_horse_date', 'horse_id', 'date'),
+    )
+
+class TableVersion(db.Model):
+    """Write counter per table, bumped by versioning.py and used for ETags"""
+    __tablename__ = 'table_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class DeletedRow(db.Model):
+    """Tombstone of a hard-deleted row, written by tombstones.py for the changes feed"""
+    __tablename__ = 'deleted_rows'
+
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_deleted_rows_deleted_at', 'deleted_at'),
+    )
+
 class Availability(db.Model):
     """Availability model (formerly disponibilites)"""
     __tablename__ = 'availability'
@@ -138,13 +266,18 @@ class Availability(db.Model):
     day = db.Column(db.String(20), nullable=False)  # Day of week
     start_time = db.Column(db.String(10), nullable=False)  # HH:MM format
     end_time = db.Column(db.String(10), nullable=False)  # HH:MM format
-    occupied = db.Column(db.Boolean, default=False)
+    occupied = db.Column(db.Boolean, default=False)  # Last computed value; routes derive it from bookings (slots.py)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    def to_dict(self):
+    __table_args__ = (
+        db.Index('ix_availability_updated_at', 'updated_at'),
+    )
+
+    def to_dict(self, occupied=None):
         return {
             'id': self.id,
             'start': self.start_time,
             'end': self.end_time,
-            'occupied': self.occupied
+            'occupied': self.occupied if occupied is None else occupied
         }
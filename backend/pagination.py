@@ -0,0 +1,94 @@
+"""
+Keyset pagination helpers
+List endpoints accept ?limit= and an opaque ?after= cursor and return
+{"items": [...], "next_cursor": "..."}; next_cursor is null on the last page.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+class PaginationError(ValueError):
+    """Raised for a malformed limit or cursor"""
+
+
+def is_paginated(args):
+    """True when the client asked for a page rather than the whole list"""
+    return 'limit' in args or 'after' in args
+
+
+def parse_limit(args):
+    """Read ?limit=, clamped to MAX_LIMIT"""
+    raw = args.get('limit')
+    if raw is None:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PaginationError('limit must be an integer')
+    if limit < 1:
+        raise PaginationError('limit must be positive')
+    return min(limit, MAX_LIMIT)
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last row as an opaque URL-safe token"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Decode a token produced by encode_cursor back into column values"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise PaginationError('Invalid cursor')
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise PaginationError('Invalid cursor')
+
+    decoded = []
+    for column, value in zip(columns, values):
+        try:
+            if column.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            else:
+                value = column.type.python_type(value)
+        except (TypeError, ValueError):
+            raise PaginationError('Invalid cursor')
+        decoded.append(value)
+    return decoded
+
+
+def _after(columns, values):
+    """Row-value comparison (c1, c2, ...) > (v1, v2, ...) spelled portably"""
+    column, value = columns[0], values[0]
+    if len(columns) == 1:
+        return column > value
+    return or_(column > value, and_(column == value, _after(columns[1:], values[1:])))
+
+
+def paginate(query, args, columns):
+    """Fetch one page of query ordered by columns
+
+    The last column must be unique (normally the primary key) so the cursor
+    identifies exactly one position. Returns (rows, next_cursor).
+    """
+    limit = parse_limit(args)
+    after = args.get('after')
+    if after:
+        query = query.filter(_after(columns, decode_cursor(after, columns)))
+
+    rows = query.order_by(*columns).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], c.key) for c in columns])
+    return rows, next_cursor
@@ -0,0 +1,135 @@
+"""
+Opt-in per-request SQL profiling
+With PROFILE_REQUESTS on, every request records its SQL statements (count and
+time, via engine cursor events), JSON serialization time and total time.
+They are reported as Server-Timing headers, and requests slower than
+SLOW_REQUEST_MS are logged with their slowest statements. "db" covers
+statement execution; fetching rows and building ORM objects count as "app".
+When the setting is off nothing is registered, so there is no per-request
+cost at all.
+"""
+import logging
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from models import db
+
+logger = logging.getLogger('equestrian.slow_requests')
+
+# Statements kept per request for the slow log; later ones are only counted
+MAX_RECORDED_STATEMENTS = 200
+SLOW_LOG_STATEMENTS = 10
+SLOW_LOG_SQL_CHARS = 500
+
+
+def _profile():
+    """This request's profile, or None outside a profiled request"""
+    return g.get('_profile') if has_request_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _profile() is not None:
+        conn.info.setdefault('_profile_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _profile()
+    started = conn.info.get('_profile_started')
+    if profile is None or not started:
+        return
+    elapsed = (time.perf_counter() - started.pop()) * 1000
+    profile['statements'] += 1
+    profile['db_ms'] += elapsed
+    if len(profile['sql']) < MAX_RECORDED_STATEMENTS:
+        profile['sql'].append((elapsed, statement))
+
+
+def _handle_error(exception_context):
+    """Drop the start time of a statement that raised"""
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('_profile_started'):
+        connection.info['_profile_started'].pop()
+
+
+def _start():
+    g._profile = {
+        'started': time.perf_counter(),
+        'statements': 0,
+        'db_ms': 0.0,
+        'serialize_ms': 0.0,
+        'sql': []
+    }
+
+
+def _log_slow(profile, response, total_ms):
+    slowest = sorted(profile['sql'], key=lambda s: s[0], reverse=True)[:SLOW_LOG_STATEMENTS]
+    lines = [
+        f'{request.method} {request.full_path.rstrip("?")} -> {response.status_code} '
+        f'in {total_ms:.1f} ms ({profile["statements"]} statements, {profile["db_ms"]:.1f} ms SQL, '
+        f'{profile["serialize_ms"]:.1f} ms serialization)'
+    ]
+    lines += [f'  {ms:8.2f} ms  {" ".join(sql.split())[:SLOW_LOG_SQL_CHARS]}' for ms, sql in slowest]
+    logger.warning('\n'.join(lines))
+
+
+def _finish(slow_ms, timing_origins):
+    def finish(response):
+        profile = g.pop('_profile', None)
+        if profile is None:
+            return response
+        total_ms = (time.perf_counter() - profile['started']) * 1000
+        response.headers.add('Server-Timing', f'db;dur={profile["db_ms"]:.2f};desc="{profile["statements"]} statements"')
+        response.headers.add('Server-Timing', f'serialize;dur={profile["serialize_ms"]:.2f}')
+        response.headers.add('Server-Timing', f'app;dur={total_ms:.2f}')
+        response.headers['Timing-Allow-Origin'] = timing_origins
+        if total_ms >= slow_ms:
+            _log_slow(profile, response, total_ms)
+        return response
+    return finish
+
+
+def _timed_dumps(dumps):
+    """Wrap the JSON provider's dumps() to accumulate serialization time"""
+    def timed(obj, **kwargs):
+        profile = _profile()
+        if profile is None:
+            return dumps(obj, **kwargs)
+        started = time.perf_counter()
+        try:
+            return dumps(obj, **kwargs)
+        finally:
+            profile['serialize_ms'] += (time.perf_counter() - started) * 1000
+    return timed
+
+
+def instrument_engine(engine):
+    """Time the engine's statements for profiled requests"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+
+
+def init_app(app):
+    """Instrument the app and its engine when PROFILE_REQUESTS is set"""
+    if not app.config.get('PROFILE_REQUESTS'):
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+    app.json.dumps = _timed_dumps(app.json.dumps)
+    app.before_request(_start)
+    # Lets cross-origin frontends read the timings in the browser's devtools
+    timing_origins = ', '.join(app.config.get('CORS_ORIGINS') or ['*'])
+    app.after_request(_finish(app.config.get('SLOW_REQUEST_MS', 500), timing_origins))
+
+    log_path = app.config.get('SLOW_REQUEST_LOG')
+    if log_path:
+        handler = logging.FileHandler(log_path)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        logger.addHandler(handler)
+    elif not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.WARNING)
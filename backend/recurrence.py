@@ -0,0 +1,166 @@
+"""
+Recurring lesson expansion
+Turns weekly RecurringLesson templates (day + HH:MM time + duration) into
+concrete dated occurrences, applying per-date cancellations and overrides.
+expand() is pure; load_occurrences() fetches everything for a window in
+three queries and expands it.
+"""
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import true
+from sqlalchemy.orm import joinedload
+from models import db, Horse, RecurringLesson, RecurringLessonException, Schedule, eager_names
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+ONE_WEEK = timedelta(days=7)
+
+# Largest window the API will expand in one call
+MAX_EXPANSION_DAYS = 400
+
+
+def parse_hhmm(value):
+    """'HH:MM' -> datetime.time; raises ValueError on malformed input"""
+    hours, minutes = value.split(':')
+    return time(int(hours), int(minutes))
+
+
+def parse_window(source):
+    """Read start_date/end_date (YYYY-MM-DD) from args or a JSON body; raises ValueError"""
+    if not source.get('start_date') or not source.get('end_date'):
+        raise ValueError('start_date and end_date are required')
+    start = date.fromisoformat(source['start_date'])
+    end = date.fromisoformat(source['end_date'])
+    if end < start:
+        raise ValueError('end_date must not be before start_date')
+    if (end - start).days > MAX_EXPANSION_DAYS:
+        raise ValueError(f'Date range is limited to {MAX_EXPANSION_DAYS} days')
+    return start, end
+
+
+def expand(lessons, start_date, end_date, exceptions=None):
+    """Occurrences of lessons between start_date and end_date (inclusive)
+
+    lessons: RecurringLesson rows (rider/horse eager-loaded for names)
+    exceptions: {(lesson_id, date): RecurringLessonException}
+    Lessons with an unknown day or malformed time are skipped. Returns a list
+    of dicts sorted by start_time.
+    """
+    by_lesson = {}
+    for (lesson_id, day), exception in (exceptions or {}).items():
+        by_lesson.setdefault(lesson_id, {})[day] = exception
+
+    # Per-lesson constants, ordered by position within a week starting on
+    # start_date so that walking week by week emits occurrences in order
+    prepared = []
+    for lesson in lessons:
+        try:
+            weekday = WEEKDAYS.index((lesson.day or '').lower())
+            default_time = parse_hhmm(lesson.time or '')
+        except ValueError:
+            continue
+
+        offset = (weekday - start_date.weekday()) % 7
+        duration = lesson.duration or 0
+        base = {
+            'lesson_id': lesson.id,
+            'rider_id': lesson.rider_id,
+            'rider_name': lesson.rider.name if lesson.rider else None,
+            'horse_id': lesson.horse_id,
+            'horse_name': lesson.horse.name if lesson.horse else None,
+            'lesson_type': lesson.lesson_type,
+            'color': lesson.color,
+            'duration': duration
+        }
+        start_offset = timedelta(days=offset, hours=default_time.hour, minutes=default_time.minute)
+        prepared.append((start_offset, offset, timedelta(minutes=duration), base, by_lesson.get(lesson.id)))
+    prepared.sort(key=lambda p: p[0])
+
+    occurrences = []
+    week_start = start_date
+    while week_start <= end_date:
+        week_origin = datetime.combine(week_start, time.min)
+        days = [week_start + timedelta(days=i) for i in range(7)]
+        labels = [day.isoformat() for day in days]
+
+        for start_offset, offset, length, base, lesson_exceptions in prepared:
+            day = days[offset]
+            if day > end_date:
+                break
+
+            exception = lesson_exceptions.get(day) if lesson_exceptions else None
+            if exception is None:
+                start = week_origin + start_offset
+                occurrences.append({
+                    **base,
+                    'date': labels[offset],
+                    'start_time': start,
+                    'end_time': start + length,
+                    'overridden': False
+                })
+                continue
+
+            if exception.cancelled:
+                continue
+            occurrence = {**base, 'date': labels[offset], 'overridden': True}
+            start = week_origin + start_offset
+            if exception.time:
+                start = datetime.combine(day, parse_hhmm(exception.time))
+            if exception.duration:
+                occurrence['duration'] = exception.duration
+                length = timedelta(minutes=exception.duration)
+            if exception.horse_id is not None and exception.horse_id != base['horse_id']:
+                occurrence['horse_id'] = exception.horse_id
+                occurrence['horse_name'] = exception.horse.name if exception.horse else None
+            occurrence['start_time'] = start
+            occurrence['end_time'] = start + length
+            occurrences.append(occurrence)
+
+        week_start += ONE_WEEK
+
+    # Already in order except for time overrides; timsort is linear on that
+    occurrences.sort(key=lambda o: (o['start_time'], o['lesson_id']))
+    return occurrences
+
+
+def load_occurrences(start_date, end_date, materialized=None):
+    """Expand every active recurring lesson over the window
+
+    Each occurrence also carries `materialized`: whether a schedule session
+    already exists for that lesson on that date. The date, not the start
+    time: a time override added after materializing must not yield the
+    occurrence again. Callers that already hold the window's sessions pass
+    their {(lesson_id, date)} set as materialized to skip the schedule query.
+    """
+    lessons = (
+        RecurringLesson.query
+        .options(*eager_names(RecurringLesson))
+        .filter(RecurringLesson.active == true())
+        .all()
+    )
+    exceptions = {
+        (e.lesson_id, e.date): e
+        for e in RecurringLessonException.query
+        .options(joinedload(RecurringLessonException.horse).load_only(Horse.name))
+        .filter(RecurringLessonException.date.between(start_date, end_date))
+    }
+    if materialized is None:
+        materialized = {
+            (lesson_id, start_time.date())
+            for lesson_id, start_time in db.session.query(Schedule.lesson_id, Schedule.start_time)
+            .filter(Schedule.lesson_id.isnot(None))
+            .filter(Schedule.start_time >= datetime.combine(start_date, time.min))
+            .filter(Schedule.start_time <= datetime.combine(end_date, time.max))
+        }
+
+    occurrences = expand(lessons, start_date, end_date, exceptions)
+    for occurrence in occurrences:
+        occurrence['materialized'] = (occurrence['lesson_id'], occurrence['start_time'].date()) in materialized
+    return occurrences
+
+
+def occurrence_to_dict(occurrence):
+    """JSON-ready copy of an occurrence"""
+    return {
+        **occurrence,
+        'start_time': occurrence['start_time'].isoformat(),
+        'end_time': occurrence['end_time'].isoformat()
+    }
@@ -0,0 +1,111 @@
+"""
+Read replicas
+With SQLALCHEMY_REPLICA_URIS set, SELECTs issued while serving a GET or HEAD
+request run on a read replica; everything else (writes, flushes, other
+methods, CLI commands) stays on the primary. Once a GET request writes,
+the rest of it reads from the primary too, and views that must see the
+primary's latest state opt out with @use_primary.
+
+Replicas are taken in turn. The first read of a request checks out the
+replica's connection; when that fails the replica is skipped for
+REPLICA_RETRY_SECONDS and the next one (finally the primary) is used.
+
+Locally, a copy of the SQLite file opened read-only will do:
+    DATABASE_REPLICA_URLS='sqlite:///file:/tmp/replica.db?mode=ro&uri=true'
+"""
+import itertools
+import logging
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.exc import DBAPIError
+
+SAFE_METHODS = ('GET', 'HEAD')
+BIND_PREFIX = 'replica_'
+
+# WSGI environ key: the engine this request reads from (None: the primary)
+ENVIRON_KEY = 'equestrian.read_engine'
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaSet:
+    """Replicas in round-robin order, leaving out the ones that failed recently"""
+
+    def __init__(self, members, retry_seconds):
+        self.members = list(members)
+        self.retry_seconds = retry_seconds
+        self._down_until = {}
+        self._turn = itertools.count()
+
+    def candidates(self):
+        if not self.members:
+            return []
+        start = next(self._turn) % len(self.members)
+        now = time.monotonic()
+        ordered = self.members[start:] + self.members[:start]
+        return [member for member in ordered if self._down_until.get(member, 0) <= now]
+
+    def mark_down(self, member):
+        self._down_until[member] = time.monotonic() + self.retry_seconds
+
+
+class RoutingSession(Session):
+    """db.session: sends the SELECTs of safe requests to a replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if getattr(clause, 'is_select', False):
+                engine = self._read_engine()
+                if engine is not None:
+                    return engine
+            else:
+                # A flush, DML or a raw connection(): the rest of the request reads its own writes
+                g.read_primary = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _read_engine(self):
+        """Replica engine for this request's reads, or None for the primary"""
+        if request.method not in SAFE_METHODS or g.get('read_primary'):
+            return None
+        if ENVIRON_KEY in request.environ:
+            return request.environ[ENVIRON_KEY]
+
+        engine = None
+        replica_set = current_app.extensions.get('replicas')
+        for key in replica_set.candidates() if replica_set else ():
+            candidate = self._db.engines[key]
+            try:
+                # Opens the transaction's connection, so the reads that follow reuse it
+                self.connection(bind_arguments={'bind': candidate})
+            except DBAPIError:
+                logger.warning('Replica %s unreachable; skipping it for %ss', key, replica_set.retry_seconds)
+                replica_set.mark_down(key)
+                continue
+            engine = candidate
+            break
+        request.environ[ENVIRON_KEY] = engine
+        return engine
+
+
+def use_primary(view):
+    """Serve a read view from the primary (e.g. when it hands out cursors into live data)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_primary = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def reads_from_replica():
+    """Whether the current request's reads were served by a replica"""
+    return has_request_context() and request.environ.get(ENVIRON_KEY) is not None
+
+
+def init_app(app):
+    """Register the replicas as binds (call before db.init_app)"""
+    urls = app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+    keys = [f'{BIND_PREFIX}{n}' for n in range(1, len(urls) + 1)]
+    app.config['SQLALCHEMY_BINDS'] = {**(app.config.get('SQLALCHEMY_BINDS') or {}), **dict(zip(keys, urls))}
+    app.extensions['replicas'] = ReplicaSet(keys, app.config.get('REPLICA_RETRY_SECONDS', 30))
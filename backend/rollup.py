@@ -0,0 +1,166 @@
+"""
+Daily schedule statistics rollup
+Keeps schedule_daily_stats (date, rider_id, horse_id, status) -> session
+count and minutes in step with the schedule table. ORM writes are picked up
+by an after_flush listener, so the rollup changes in the same transaction as
+the session itself; Core bulk writes call add_sessions() explicitly.
+"""
+from collections import defaultdict
+from sqlalchemy import delete, event, insert, inspect, select, update
+from sqlalchemy.orm import Session
+from models import Schedule, ScheduleDailyStat
+
+_KEY_FIELDS = ('start_time', 'end_time', 'rider_id', 'horse_id', 'status')
+
+
+def _key(start_time, rider_id, horse_id, status):
+    return start_time.date(), rider_id or 0, horse_id or 0, status or ''
+
+
+def _minutes(start_time, end_time):
+    return int((end_time - start_time).total_seconds() // 60)
+
+
+def _add(deltas, values, sign):
+    """Accumulate one session (dict of _KEY_FIELDS) into deltas with sign +1/-1"""
+    if values['start_time'] is None or values['end_time'] is None:
+        return
+    key = _key(values['start_time'], values['rider_id'], values['horse_id'], values['status'])
+    count, minutes = deltas[key]
+    deltas[key] = (count + sign, minutes + sign * _minutes(values['start_time'], values['end_time']))
+
+
+def _old_values(state):
+    """Values of a dirty Schedule as they were before this flush"""
+    values = {}
+    for field in _KEY_FIELDS:
+        history = state.attrs[field].history
+        if history.deleted:
+            values[field] = history.deleted[0]
+        elif history.unchanged:
+            values[field] = history.unchanged[0]
+        else:
+            values[field] = history.added[0] if history.added else None
+    return values
+
+
+def apply_deltas(connection, deltas):
+    """Upsert {key: (count_delta, minutes_delta)} into the rollup table"""
+    rows = [
+        {'date': day, 'rider_id': rider_id, 'horse_id': horse_id, 'status': status,
+         'session_count': count, 'minutes': minutes}
+        for (day, rider_id, horse_id, status), (count, minutes) in deltas.items()
+        if count or minutes
+    ]
+    if not rows:
+        return
+
+    table = ScheduleDailyStat.__table__
+    stmt = _upsert(connection.dialect.name, table)
+    if stmt is None:
+        _update_then_insert(connection, table, rows)
+    else:
+        connection.execute(stmt, rows)
+
+
+def _upsert(dialect, table):
+    """Native add-to-existing upsert of rollup rows for dialect, or None when it has none"""
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.date, table.c.rider_id, table.c.horse_id, table.c.status],
+            set_={
+                'session_count': table.c.session_count + stmt.excluded.session_count,
+                'minutes': table.c.minutes + stmt.excluded.minutes
+            }
+        )
+    if dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        return stmt.on_duplicate_key_update(
+            session_count=table.c.session_count + stmt.inserted.session_count,
+            minutes=table.c.minutes + stmt.inserted.minutes
+        )
+    return None
+
+
+def _update_then_insert(connection, table, rows):
+    """Portable upsert: add to the existing row, insert the row when there is none
+
+    Two writers creating the same (date, rider, horse, status) row at once
+    can still collide on the primary key; the losing transaction fails.
+    """
+    key = [table.c.date, table.c.rider_id, table.c.horse_id, table.c.status]
+    for row in rows:
+        updated = connection.execute(
+            update(table)
+            .where(*(column == row[column.name] for column in key))
+            .values(session_count=table.c.session_count + row['session_count'],
+                    minutes=table.c.minutes + row['minutes'])
+        ).rowcount
+        if not updated:
+            connection.execute(insert(table), row)
+
+
+def add_sessions(connection, rows):
+    """Count schedule rows written with Core bulk statements (dicts with _KEY_FIELDS)"""
+    deltas = defaultdict(lambda: (0, 0))
+    for row in rows:
+        _add(deltas, {field: row.get(field) for field in _KEY_FIELDS}, +1)
+    apply_deltas(connection, deltas)
+
+
+def remove_sessions(connection, rows):
+    """Inverse of add_sessions, for Core bulk deletes/updates"""
+    deltas = defaultdict(lambda: (0, 0))
+    for row in rows:
+        _add(deltas, {field: row.get(field) for field in _KEY_FIELDS}, -1)
+    apply_deltas(connection, deltas)
+
+
+def _after_flush(session, flush_context):
+    """Fold this flush's Schedule inserts, updates and deletes into the rollup"""
+    deltas = defaultdict(lambda: (0, 0))
+
+    for obj in session.new:
+        if isinstance(obj, Schedule):
+            _add(deltas, {f: getattr(obj, f) for f in _KEY_FIELDS}, +1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Schedule):
+            _add(deltas, _old_values(inspect(obj)), -1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Schedule) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[f].history.has_changes() for f in _KEY_FIELDS):
+            continue
+        _add(deltas, _old_values(state), -1)
+        _add(deltas, {f: getattr(obj, f) for f in _KEY_FIELDS}, +1)
+
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+def register_listeners():
+    """Hook the rollup into every ORM flush (idempotent)"""
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+
+
+def backfill(connection):
+    """Rebuild the whole rollup from schedule; returns the number of rollup rows"""
+    deltas = defaultdict(lambda: (0, 0))
+    columns = [getattr(Schedule.__table__.c, f) for f in _KEY_FIELDS]
+    result = connection.execution_options(stream_results=True, yield_per=5000).execute(select(*columns))
+    for row in result:
+        _add(deltas, row._mapping, +1)
+
+    connection.execute(delete(ScheduleDailyStat.__table__))
+    apply_deltas(connection, deltas)
+    return len(deltas)
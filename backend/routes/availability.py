@@ -0,0 +1,219 @@
+"""
+Availability API Routes
+Manages weekly availability slots
+"""
+from flask import Blueprint, request, jsonify
+from models import db, Availability
+from recurrence import parse_hhmm
+from slots import slot_occupancy
+from tombstones import record_deletions
+from stream import publish
+from versioning import bump, conditional
+from sqlalchemy import delete, insert
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import date, timedelta
+
+availability_bp = Blueprint('availability', __name__)
+
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+# Occupancy is derived from bookings, so those tables feed the ETag too
+OCCUPANCY_TABLES = ('availability', 'schedule', 'recurring_lessons', 'recurring_lesson_exceptions')
+
+
+def _reference_date():
+    """?date= or today: the week whose occupancy is reported"""
+    return request.args.get('date') or date.today().isoformat()
+
+
+def _occupancy(slots):
+    """Occupied flag per slot for the week containing ?date= (default today)"""
+    reference = date.fromisoformat(_reference_date())
+    return slot_occupancy(slots, reference - timedelta(days=reference.weekday()))
+
+
+def _parse_slots(slots):
+    """[{'start', 'end'}] -> sorted unique (start, end) pairs; raises ValueError"""
+    if not isinstance(slots, list):
+        raise ValueError('slots must be a list')
+    pairs = set()
+    for slot in slots:
+        if not isinstance(slot, dict) or not slot.get('start') or not slot.get('end'):
+            raise ValueError('Each slot needs start and end (HH:MM)')
+        try:
+            valid = parse_hhmm(slot['start']) < parse_hhmm(slot['end'])
+        except (AttributeError, ValueError):
+            raise ValueError(f"Invalid time in slot {slot['start']}-{slot['end']}. Use HH:MM")
+        if not valid:
+            raise ValueError(f"Slot {slot['start']}-{slot['end']} ends before it starts")
+        pairs.add((slot['start'], slot['end']))
+    return sorted(pairs)
+
+
+def _replace_slots(week):
+    """Make the stored slots of each day in week ({day: [(start, end)]}) match it
+
+    Slots already present keep their row and id; the rest of the change is
+    one DELETE and one bulk INSERT. Returns {day: [slot dicts]} built from
+    what was kept and inserted, without reading the table again.
+    """
+    kept = {day: [] for day in week}
+    wanted = {day: set(pairs) for day, pairs in week.items()}
+    stale_ids = []
+    for slot in Availability.query.filter(Availability.day.in_(list(week))):
+        key = (slot.start_time, slot.end_time)
+        if key in wanted[slot.day]:
+            wanted[slot.day].discard(key)
+            kept[slot.day].append(slot.to_dict())
+        else:
+            stale_ids.append(slot.id)
+
+    rows = [
+        {'day': day, 'start_time': start, 'end_time': end, 'occupied': False}
+        for day, pairs in wanted.items() for start, end in sorted(pairs)
+    ]
+    if stale_ids:
+        db.session.execute(
+            delete(Availability).where(Availability.id.in_(stale_ids)),
+            execution_options={'synchronize_session': False}
+        )
+        record_deletions(db.session.connection(), 'availability', stale_ids)
+    if rows:
+        new_ids = db.session.execute(
+            insert(Availability).returning(Availability.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        for row, new_id in zip(rows, new_ids):
+            kept[row['day']].append({
+                'id': new_id, 'start': row['start_time'], 'end': row['end_time'], 'occupied': False
+            })
+    if stale_ids or rows:
+        bump(db.session.connection(), ['availability'])
+        publish(db.session, ['availability'])
+    db.session.commit()
+
+    return {day: sorted(slots, key=lambda s: s['start']) for day, slots in kept.items()}
+
+
+@availability_bp.route('/availability', methods=['GET'])
+@conditional(*OCCUPANCY_TABLES, vary=_reference_date)
+def get_availability():
+    """Get all availability slots grouped by day, occupancy derived from bookings"""
+    try:
+        slots = Availability.query.order_by(Availability.day, Availability.start_time).all()
+        occupancy = _occupancy(slots)
+
+        # Group by day (a malformed stored day gets its own key rather than failing the read)
+        result = {day: [] for day in DAYS}
+        for slot in slots:
+            result.setdefault(slot.day, []).append(slot.to_dict(occupied=occupancy[slot.id]))
+
+        return jsonify(result), 200
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    except SQLAlchemyError as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@availability_bp.route('/availability/<string:day>', methods=['GET'])
+@conditional(*OCCUPANCY_TABLES, vary=_reference_date)
+def get_availability_by_day(day):
+    """Get availability slots for a specific day"""
+    try:
+        if day.lower() not in DAYS:
+            return jsonify({'error': 'Invalid day'}), 400
+
+        slots = Availability.query.filter_by(day=day.lower()).order_by(Availability.start_time).all()
+        occupancy = _occupancy(slots)
+        return jsonify([s.to_dict(occupied=occupancy[s.id]) for s in slots]), 200
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    except SQLAlchemyError as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@availability_bp.route('/availability/<string:day>', methods=['PUT'])
+def update_availability_by_day(day):
+    """Replace all availability slots for a specific day"""
+    try:
+        if day.lower() not in DAYS:
+            return jsonify({'error': 'Invalid day'}), 400
+
+        data = request.get_json() or {}
+        week = {day.lower(): _parse_slots(data.get('slots', []))}
+
+        return jsonify(_replace_slots(week)[day.lower()]), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@availability_bp.route('/availability', methods=['PUT'])
+def update_availability():
+    """Replace the whole week's slots: {day: [{'start', 'end'}]}, missing days become empty"""
+    try:
+        data = request.get_json() or {}
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected an object keyed by day'}), 400
+        unknown = [day for day in data if day.lower() not in DAYS]
+        if unknown:
+            return jsonify({'error': f"Invalid day: {', '.join(unknown)}"}), 400
+
+        given = {day.lower(): slots for day, slots in data.items()}
+        week = {day: _parse_slots(given.get(day, [])) for day in DAYS}
+
+        return jsonify(_replace_slots(week)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@availability_bp.route('/availability', methods=['POST'])
+def create_availability_slot():
+    """Create a single availability slot"""
+    try:
+        data = request.get_json() or {}
+
+        # Validate required fields
+        if not isinstance(data, dict) or not all(k in data for k in ['day', 'start_time', 'end_time']):
+            return jsonify({'error': 'day, start_time, and end_time are required'}), 400
+
+        if not isinstance(data['day'], str) or data['day'].lower() not in DAYS:
+            return jsonify({'error': 'Invalid day'}), 400
+
+        # Same HH:MM and ordering rules as the PUT endpoints
+        (start, end), = _parse_slots([{'start': data['start_time'], 'end': data['end_time']}])
+
+        slot = Availability(
+            day=data['day'].lower(),
+            start_time=start,
+            end_time=end
+        )
+
+        db.session.add(slot)
+        db.session.commit()
+
+        return jsonify(slot.to_dict()), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@availability_bp.route('/availability/<int:slot_id>', methods=['DELETE'])
+def delete_availability_slot(slot_id):
+    """Delete a specific availability slot"""
+    try:
+        slot = Availability.query.get_or_404(slot_id)
+        db.session.delete(slot)
+        db.session.commit()
+
+        return jsonify({'message': 'Availability slot deleted successfully'}), 200
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
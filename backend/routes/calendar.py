@@ -0,0 +1,87 @@
+"""
+Calendar API Route
+Everything the dashboard and week view need for a date window in one
+response: sessions, recurring-lesson occurrences, dated availability with
+occupancy, and the active rider/horse lookup tables. Six queries in total;
+occurrences, occupancy and the materialized flags are all derived from the
+same session rows. The cursor lets a client follow up with /api/changes
+instead of reloading the window.
+"""
+from flask import Blueprint, request, jsonify
+from models import db, Availability, Horse, Rider, Schedule, eager_names
+from conflicts import MAX_SESSION_LENGTH
+from routes.changes import feed_cursor
+from recurrence import load_occurrences, occurrence_to_dict, parse_window
+from slots import dated_occupancy
+from versioning import conditional
+from sqlalchemy import true
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime, time, timedelta
+
+calendar_bp = Blueprint('calendar', __name__)
+
+CALENDAR_TABLES = ('schedule', 'recurring_lessons', 'recurring_lesson_exceptions', 'availability', 'riders', 'horses')
+
+
+def _lookup(model):
+    """[{'id', 'name'}] of the model's active rows, by name"""
+    rows = (
+        db.session.query(model.id, model.name)
+        .filter(model.active == true())
+        .order_by(model.name)
+    )
+    return [{'id': row.id, 'name': row.name} for row in rows]
+
+
+def load_calendar(start, end):
+    """Calendar payload for the dates start..end (inclusive)"""
+    started = datetime.utcnow()
+    start_dt = datetime.combine(start, time.min)
+    end_dt = datetime.combine(end + timedelta(days=1), time.min)
+
+    # Sessions that began up to MAX_SESSION_LENGTH earlier can still occupy the first day's slots
+    nearby = (
+        Schedule.query
+        .options(*eager_names(Schedule))
+        .filter(Schedule.start_time > start_dt - MAX_SESSION_LENGTH, Schedule.start_time < end_dt)
+        .order_by(Schedule.start_time, Schedule.id)
+        .all()
+    )
+    sessions = [s for s in nearby if s.start_time >= start_dt]
+    materialized = {(s.lesson_id, s.start_time.date()) for s in sessions if s.lesson_id is not None}
+    occurrences = load_occurrences(start, end, materialized=materialized)
+
+    # Same bookings as slots.load_busy(), without querying them again
+    busy = [(s.start_time, s.end_time) for s in nearby if s.status != 'cancelled']
+    busy += [(o['start_time'], o['end_time']) for o in occurrences if not o['materialized']]
+    busy.sort()
+
+    slots = Availability.query.order_by(Availability.start_time).all()
+    availability = {
+        day.isoformat(): [slot.to_dict(occupied=occupied) for slot, occupied in day_slots]
+        for day, day_slots in dated_occupancy(slots, start, end, busy).items()
+    }
+
+    return {
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'sessions': [s.to_dict() for s in sessions],
+        'occurrences': [occurrence_to_dict(o) for o in occurrences],
+        'availability': availability,
+        'riders': _lookup(Rider),
+        'horses': _lookup(Horse),
+        'cursor': feed_cursor(started)
+    }
+
+
+@calendar_bp.route('/calendar', methods=['GET'])
+@conditional(*CALENDAR_TABLES)
+def get_calendar():
+    """Sessions, occurrences, availability and active riders/horses for ?start_date=&end_date="""
+    try:
+        start, end = parse_window(request.args)
+        return jsonify(load_calendar(start, end)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({'error': str(e)}), 500
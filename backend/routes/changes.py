@@ -0,0 +1,117 @@
+"""
+Changes API Route
+Delta feed for clients that keep a local mirror of riders, horses, recurring
+lessons and their per-date exceptions, availability and schedule. Without ?since= it returns every row
+(reset); with the cursor from the previous response it returns only rows
+whose updated_at moved past it plus the ids deleted since (tombstones.py).
+Applying a response is idempotent: upsert the rows, drop the deleted ids.
+"""
+from flask import Blueprint, current_app, request, jsonify
+from models import Availability, DeletedRow
+from fieldsets import RELATED_NAMES, Fieldset, available_fields
+from pagination import PaginationError, decode_cursor, encode_cursor
+from replicas import reads_from_replica, use_primary
+from tombstones import SYNCED_MODELS, SYNCED_TABLES
+from versioning import conditional
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime, timedelta
+
+changes_bp = Blueprint('changes', __name__)
+
+
+def _dump_availability(slot):
+    return {
+        'id': slot.id,
+        'day': slot.day,
+        'start': slot.start_time,
+        'end': slot.end_time
+    }
+
+
+def _serializer(model):
+    """(loader options, dump) for a synced model
+
+    Related names are left out: they go stale when a rider or horse is
+    renamed, and the mirror has the riders and horses tables to look them up.
+    """
+    if model is Availability:
+        return (), _dump_availability
+    fieldset = Fieldset(model, set(available_fields(model)) - set(RELATED_NAMES))
+    return fieldset.options(model.updated_at), fieldset.dump
+
+
+def _tombstones(since):
+    """{table: {row_id: deleted_at}} of deletions after since"""
+    deleted = {table: {} for table in SYNCED_TABLES}
+    rows = DeletedRow.query.filter(DeletedRow.deleted_at > since).order_by(DeletedRow.deleted_at)
+    for row in rows:
+        if row.table_name in deleted:
+            deleted[row.table_name][row.row_id] = row.deleted_at
+    return deleted
+
+
+def feed_cursor(started):
+    """Cursor for data read at or after started: it trails by CHANGES_SETTLE_SECONDS
+
+    A write stamped just before started but committed after the read is
+    then still picked up by the next pull. Data read from a replica may be
+    older than started by up to REPLICA_LAG_SECONDS.
+    """
+    settle = timedelta(seconds=current_app.config.get('CHANGES_SETTLE_SECONDS', 10))
+    if reads_from_replica():
+        settle += timedelta(seconds=current_app.config.get('REPLICA_LAG_SECONDS', 30))
+    return encode_cursor([started - settle])
+
+
+def load_changes(since):
+    """Feed payload for rows changed after since (None: everything)"""
+    # Taken before reading: anything committed later is at least this new
+    started = datetime.utcnow()
+    retention = timedelta(days=current_app.config.get('CHANGES_RETENTION_DAYS', 90))
+    reset = since is None or since < started - retention
+    deleted = {table: {} for table in SYNCED_TABLES} if reset else _tombstones(since)
+
+    changes = {}
+    removed = {}
+    for model in SYNCED_MODELS:
+        table = model.__tablename__
+        options, dump = _serializer(model)
+        query = model.query.options(*options)
+        if not reset:
+            query = query.filter(model.updated_at > since)
+
+        # A live row and a tombstone share an id only when the id was reused
+        # after the delete: the row wins unless the tombstone is strictly newer
+        tombstones = deleted[table]
+        rows = []
+        kept = set()
+        for row in query.order_by(model.updated_at, model.id):
+            deleted_at = tombstones.get(row.id)
+            if deleted_at is not None and deleted_at > row.updated_at:
+                continue
+            kept.add(row.id)
+            rows.append(dump(row))
+        changes[table] = rows
+        removed[table] = [row_id for row_id in tombstones if row_id not in kept]
+
+    return {
+        'reset': reset,
+        'changes': changes,
+        'deleted': removed,
+        'cursor': feed_cursor(started)
+    }
+
+
+@changes_bp.route('/changes', methods=['GET'])
+@use_primary
+@conditional(*SYNCED_TABLES)
+def get_changes():
+    """Rows created, updated or deleted since ?since=<cursor> (everything without it)"""
+    try:
+        cursor = request.args.get('since')
+        since = decode_cursor(cursor, [DeletedRow.deleted_at])[0] if cursor else None
+        return jsonify(load_changes(since)), 200
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({'error': str(e)}), 500
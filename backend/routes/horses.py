@@ -2,29 +2,57 @@
 Horses API Routes
 Handles CRUD operations for horses
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from models import db, Horse
+from pagination import is_paginated, paginate, PaginationError
+from versioning import conditional
+from cache import payload_cache, request_key, serialize
+from search import find, search_limit
+from fieldsets import dump, parse_fields, query_options
+from filters import apply_filters
 from sqlalchemy.exc import SQLAlchemyError
 
 horses_bp = Blueprint('horses', __name__)
 
 
 @horses_bp.route('/horses', methods=['GET'])
+@conditional('horses')
 def get_horses():
-    """Get all horses"""
+    """Get horses, filtered by ?active=&owner_id= (keyset-paginated with ?limit=&after=, cached)"""
     try:
-        horses = Horse.query.all()
-        return jsonify([h.to_dict() for h in horses]), 200
+        payload = payload_cache.get_or_set('horses', request_key(), _horses_payload)
+        return Response(payload, mimetype='application/json'), 200
+    except (PaginationError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
     except SQLAlchemyError as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _horses_payload():
+    """Serialized horses listing for the current request arguments"""
+    fieldset = parse_fields(Horse, request.args)
+    query = apply_filters(Horse.query.options(*query_options(Horse, fieldset)), Horse, request.args)
+
+    if is_paginated(request.args):
+        horses, next_cursor = paginate(query, request.args, [Horse.id])
+        return serialize({
+            'items': [dump(h, fieldset) for h in horses],
+            'next_cursor': next_cursor
+        })
+
+    return serialize([dump(h, fieldset) for h in query.all()])
+
+
 @horses_bp.route('/horses/<int:horse_id>', methods=['GET'])
+@conditional('horses')
 def get_horse(horse_id):
     """Get single horse by ID"""
     try:
-        horse = Horse.query.get_or_404(horse_id)
-        return jsonify(horse.to_dict()), 200
+        fieldset = parse_fields(Horse, request.args)
+        horse = Horse.query.options(*query_options(Horse, fieldset)).get_or_404(horse_id)
+        return jsonify(dump(horse, fieldset)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except SQLAlchemyError as e:
         return jsonify({'error': str(e)}), 404
 
@@ -49,6 +77,7 @@ def create_horse():
 
         db.session.add(horse)
         db.session.commit()
+        payload_cache.invalidate('horses', 'recurring_lessons')
 
         return jsonify(horse.to_dict()), 201
     except SQLAlchemyError as e:
@@ -76,6 +105,7 @@ def update_horse(horse_id):
             horse.active = data['active']
 
         db.session.commit()
+        payload_cache.invalidate('horses', 'recurring_lessons')
         return jsonify(horse.to_dict()), 200
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -91,6 +121,7 @@ def delete_horse(horse_id):
         # Soft delete
         horse.active = False
         db.session.commit()
+        payload_cache.invalidate('horses', 'recurring_lessons')
 
         return jsonify({'message': 'Horse deactivated successfully'}), 200
     except SQLAlchemyError as e:
@@ -99,19 +130,23 @@ def delete_horse(horse_id):
 
 
 @horses_bp.route('/horses/search', methods=['GET'])
+@conditional('horses')
 def search_horses():
-    """Search horses by name or type"""
+    """Search horses by name or type: ?q=&mode=fuzzy|prefix&limit=, ranked (see search.py)"""
     try:
         query = request.args.get('q', '')
 
         if not query:
             return jsonify([]), 200
 
-        horses = Horse.query.filter(
-            (Horse.name.ilike(f'%{query}%')) |
-            (Horse.type.ilike(f'%{query}%'))
-        ).all()
+        fieldset = parse_fields(Horse, request.args)
+        horses = find(
+            Horse, query, request.args.get('mode', 'fuzzy'), search_limit(request.args.get('limit')),
+            options=query_options(Horse, fieldset)
+        )
 
-        return jsonify([h.to_dict() for h in horses]), 200
+        return jsonify([dump(h, fieldset) for h in horses]), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except SQLAlchemyError as e:
         return jsonify({'error': str(e)}), 500
@@ -2,60 +2,116 @@
 Recurring Lessons API Routes
 Handles CRUD operations for recurring lessons
 """
-from flask import Blueprint, request, jsonify
-from models import db, RecurringLesson
+from flask import Blueprint, Response, request, jsonify
+from models import db, Horse, RecurringLesson, RecurringLessonException, Schedule
+from pagination import is_paginated, paginate, PaginationError
+from recurrence import WEEKDAYS, load_occurrences, occurrence_to_dict, parse_hhmm, parse_window
+from rollup import add_sessions
+from conflicts import pending_conflicts
+from stream import publish
+from versioning import bump, conditional
+from cache import payload_cache, request_key, serialize
+from fieldsets import dump, parse_fields, query_options
+from filters import apply_filters
+from sqlalchemy import insert
 from sqlalchemy.exc import SQLAlchemyError
+from datetime import date
+from types import SimpleNamespace
 
 recurring_lessons_bp = Blueprint('recurring_lessons', __name__)
 
 
 @recurring_lessons_bp.route('/recurring-lessons', methods=['GET'])
+@conditional('recurring_lessons', 'riders', 'horses')
 def get_recurring_lessons():
-    """Get all recurring lessons"""
+    """Get recurring lessons, filtered by ?active=&day=&lesson_type= (keyset-paginated with ?limit=&after=, cached)"""
     try:
-        lessons = RecurringLesson.query.all()
-        return jsonify([l.to_dict() for l in lessons]), 200
+        payload = payload_cache.get_or_set('recurring_lessons', request_key(), _lessons_payload)
+        return Response(payload, mimetype='application/json'), 200
+    except (PaginationError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
     except SQLAlchemyError as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _lessons_payload():
+    """Serialized recurring lessons listing for the current request arguments"""
+    fieldset = parse_fields(RecurringLesson, request.args)
+    query = apply_filters(RecurringLesson.query.options(*query_options(RecurringLesson, fieldset)), RecurringLesson, request.args)
+
+    if is_paginated(request.args):
+        lessons, next_cursor = paginate(query, request.args, [RecurringLesson.id])
+        return serialize({
+            'items': [dump(l, fieldset) for l in lessons],
+            'next_cursor': next_cursor
+        })
+
+    return serialize([dump(l, fieldset) for l in query.all()])
+
+
 @recurring_lessons_bp.route('/recurring-lessons/<int:lesson_id>', methods=['GET'])
+@conditional('recurring_lessons', 'riders', 'horses')
 def get_recurring_lesson(lesson_id):
     """Get single recurring lesson by ID"""
     try:
-        lesson = RecurringLesson.query.get_or_404(lesson_id)
-        return jsonify(lesson.to_dict()), 200
+        fieldset = parse_fields(RecurringLesson, request.args)
+        lesson = RecurringLesson.query.options(*query_options(RecurringLesson, fieldset)).get_or_404(lesson_id)
+        return jsonify(dump(lesson, fieldset)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except SQLAlchemyError as e:
         return jsonify({'error': str(e)}), 404
 
 
+# Writable RecurringLesson columns
+LESSON_FIELDS = ('rider_id', 'horse_id', 'day', 'time', 'duration', 'lesson_type', 'active', 'color')
+
+
+def _parse_duration(value):
+    """Positive whole number of minutes; raises ValueError"""
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError('duration must be a positive number of minutes')
+    return value
+
+
+def _lesson_values(data):
+    """Writable columns present in data, validated; raises ValueError"""
+    values = {field: data[field] for field in LESSON_FIELDS if field in data}
+    if 'day' in values:
+        values['day'] = str(values['day']).lower()
+        if values['day'] not in WEEKDAYS:
+            raise ValueError(f"day must be one of {', '.join(WEEKDAYS)}")
+    if 'time' in values:
+        try:
+            parse_hhmm(values['time'])
+        except (AttributeError, TypeError, ValueError):
+            raise ValueError('time must be HH:MM')
+    if 'duration' in values:
+        values['duration'] = _parse_duration(values['duration'])
+    return values
+
+
 @recurring_lessons_bp.route('/recurring-lessons', methods=['POST'])
 def create_recurring_lesson():
     """Create new recurring lesson"""
     try:
-        data = request.get_json()
+        data = request.get_json() or {}
 
         # Validate required fields
-        required = ['name', 'day', 'time', 'duration']
+        required = ['rider_id', 'day', 'time', 'duration']
         for field in required:
             if not data.get(field):
                 return jsonify({'error': f'{field} is required'}), 400
 
-        lesson = RecurringLesson(
-            name=data['name'],
-            day=data['day'],
-            time=data['time'],
-            duration=data['duration'],
-            max_riders=data.get('max_riders'),
-            level=data.get('level'),
-            notes=data.get('notes'),
-            active=data.get('active', True)
-        )
+        lesson = RecurringLesson(**_lesson_values(data))
 
         db.session.add(lesson)
         db.session.commit()
+        payload_cache.invalidate('recurring_lessons')
 
         return jsonify(lesson.to_dict()), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -66,28 +122,17 @@ def update_recurring_lesson(lesson_id):
     """Update existing recurring lesson"""
     try:
         lesson = RecurringLesson.query.get_or_404(lesson_id)
-        data = request.get_json()
+        data = request.get_json() or {}
 
         # Update fields
-        if 'name' in data:
-            lesson.name = data['name']
-        if 'day' in data:
-            lesson.day = data['day']
-        if 'time' in data:
-            lesson.time = data['time']
-        if 'duration' in data:
-            lesson.duration = data['duration']
-        if 'max_riders' in data:
-            lesson.max_riders = data['max_riders']
-        if 'level' in data:
-            lesson.level = data['level']
-        if 'notes' in data:
-            lesson.notes = data['notes']
-        if 'active' in data:
-            lesson.active = data['active']
+        for field, value in _lesson_values(data).items():
+            setattr(lesson, field, value)
 
         db.session.commit()
+        payload_cache.invalidate('recurring_lessons')
         return jsonify(lesson.to_dict()), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -102,8 +147,174 @@ def delete_recurring_lesson(lesson_id):
         # Soft delete
         lesson.active = False
         db.session.commit()
+        payload_cache.invalidate('recurring_lessons')
 
         return jsonify({'message': 'Recurring lesson deactivated successfully'}), 200
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
+
+
+@recurring_lessons_bp.route('/recurring-lessons/occurrences', methods=['GET'])
+@conditional('recurring_lessons', 'recurring_lesson_exceptions', 'schedule', 'riders', 'horses')
+def get_occurrences():
+    """Expand active recurring lessons into dated occurrences for a window"""
+    try:
+        start, end = parse_window(request.args)
+        occurrences = load_occurrences(start, end)
+        return jsonify([occurrence_to_dict(o) for o in occurrences]), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@recurring_lessons_bp.route('/recurring-lessons/occurrences/materialize', methods=['POST'])
+def materialize_occurrences():
+    """Create schedule sessions for every not-yet-materialized occurrence in one transaction
+
+    Body: {"start_date", "end_date", "allow_conflicts": false}. Occurrences
+    that would double-book a horse or rider (against stored sessions or each
+    other) fail the whole request with 409 unless allow_conflicts is set.
+    """
+    try:
+        data = request.get_json() or {}
+        start, end = parse_window(data)
+        expanded = load_occurrences(start, end)
+        occurrences = [o for o in expanded if not o['materialized']]
+        skipped = len(expanded) - len(occurrences)
+
+        rows = [{
+            'lesson_id': o['lesson_id'],
+            'rider_id': o['rider_id'],
+            'horse_id': o['horse_id'],
+            'lesson_type': o['lesson_type'],
+            'start_time': o['start_time'],
+            'end_time': o['end_time'],
+            'status': 'scheduled'
+        } for o in occurrences]
+
+        # {'index': i} entries refer to other occurrences of the same request
+        found = pending_conflicts([SimpleNamespace(index=i, **row) for i, row in enumerate(rows)])
+        conflicts = [
+            {'index': i, 'occurrence': occurrence_to_dict(occurrences[i]), 'conflicts': found[i]}
+            for i in sorted(found)
+        ]
+        if conflicts and not data.get('allow_conflicts', False):
+            return jsonify({
+                'error': 'Occurrences conflict with existing bookings; none were materialized',
+                'conflicts': conflicts
+            }), 409
+
+        if rows:
+            db.session.execute(insert(Schedule), rows)
+            add_sessions(db.session.connection(), rows)
+            bump(db.session.connection(), ['schedule'])
+            publish(db.session, ['schedule'])
+        db.session.commit()
+
+        return jsonify({
+            'created': len(rows),
+            'skipped': skipped,
+            'conflicts': conflicts
+        }), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@recurring_lessons_bp.route('/recurring-lessons/<int:lesson_id>/exceptions', methods=['GET'])
+@conditional('recurring_lesson_exceptions')
+def get_lesson_exceptions(lesson_id):
+    """List per-date cancellations and overrides of a recurring lesson"""
+    try:
+        fieldset = parse_fields(RecurringLessonException, request.args)
+        RecurringLesson.query.get_or_404(lesson_id)
+        exceptions = (
+            RecurringLessonException.query
+            .options(*query_options(RecurringLessonException, fieldset))
+            .filter_by(lesson_id=lesson_id)
+            .order_by(RecurringLessonException.date)
+            .all()
+        )
+        return jsonify([dump(e, fieldset) for e in exceptions]), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _exception_values(data):
+    """Columns of a cancellation/override from a JSON body, validated; raises ValueError
+
+    Bad values would otherwise be stored and break every later expansion of the window.
+    """
+    override_time = data.get('time') or None
+    if override_time is not None:
+        try:
+            parse_hhmm(override_time)
+        except (AttributeError, TypeError, ValueError):
+            raise ValueError('time must be HH:MM')
+
+    duration = data.get('duration')
+    if duration is not None:
+        duration = _parse_duration(duration)
+
+    horse_id = data.get('horse_id')
+    if horse_id is not None:
+        if isinstance(horse_id, bool) or not isinstance(horse_id, int) or db.session.get(Horse, horse_id) is None:
+            raise ValueError('horse_id must be an existing horse or null')
+
+    return {
+        'cancelled': bool(data.get('cancelled', False)),
+        'time': override_time,
+        'duration': duration,
+        'horse_id': horse_id
+    }
+
+
+@recurring_lessons_bp.route('/recurring-lessons/<int:lesson_id>/exceptions/<string:day>', methods=['PUT'])
+def set_lesson_exception(lesson_id, day):
+    """Cancel or override a single occurrence (day is YYYY-MM-DD)"""
+    try:
+        RecurringLesson.query.get_or_404(lesson_id)
+        occurrence_date = date.fromisoformat(day)
+        values = _exception_values(request.get_json() or {})
+
+        exception = RecurringLessonException.query.filter_by(
+            lesson_id=lesson_id, date=occurrence_date
+        ).first()
+        if exception is None:
+            exception = RecurringLessonException(lesson_id=lesson_id, date=occurrence_date)
+            db.session.add(exception)
+
+        for field, value in values.items():
+            setattr(exception, field, value)
+
+        db.session.commit()
+        return jsonify(exception.to_dict()), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@recurring_lessons_bp.route('/recurring-lessons/<int:lesson_id>/exceptions/<string:day>', methods=['DELETE'])
+def delete_lesson_exception(lesson_id, day):
+    """Remove a cancellation/override, restoring the regular occurrence"""
+    try:
+        exception = RecurringLessonException.query.filter_by(
+            lesson_id=lesson_id, date=date.fromisoformat(day)
+        ).first_or_404()
+        db.session.delete(exception)
+        db.session.commit()
+
+        return jsonify({'message': 'Lesson exception deleted successfully'}), 200
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
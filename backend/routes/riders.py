@@ -2,29 +2,57 @@
 Riders API Routes
 Handles CRUD operations for riders
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from models import db, Rider
+from pagination import is_paginated, paginate, PaginationError
+from versioning import conditional
+from cache import payload_cache, request_key, serialize
+from search import find, search_limit
+from fieldsets import dump, parse_fields, query_options
+from filters import apply_filters
 from sqlalchemy.exc import SQLAlchemyError
 
 riders_bp = Blueprint('riders', __name__)
 
 
 @riders_bp.route('/riders', methods=['GET'])
+@conditional('riders')
 def get_riders():
-    """Get all riders"""
+    """Get riders, filtered by ?active= (keyset-paginated with ?limit=&after=, cached)"""
     try:
-        riders = Rider.query.all()
-        return jsonify([r.to_dict() for r in riders]), 200
+        payload = payload_cache.get_or_set('riders', request_key(), _riders_payload)
+        return Response(payload, mimetype='application/json'), 200
+    except (PaginationError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
     except SQLAlchemyError as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _riders_payload():
+    """Serialized riders listing for the current request arguments"""
+    fieldset = parse_fields(Rider, request.args)
+    query = apply_filters(Rider.query.options(*query_options(Rider, fieldset)), Rider, request.args)
+
+    if is_paginated(request.args):
+        riders, next_cursor = paginate(query, request.args, [Rider.id])
+        return serialize({
+            'items': [dump(r, fieldset) for r in riders],
+            'next_cursor': next_cursor
+        })
+
+    return serialize([dump(r, fieldset) for r in query.all()])
+
+
 @riders_bp.route('/riders/<int:rider_id>', methods=['GET'])
+@conditional('riders')
 def get_rider(rider_id):
     """Get single rider by ID"""
     try:
-        rider = Rider.query.get_or_404(rider_id)
-        return jsonify(rider.to_dict()), 200
+        fieldset = parse_fields(Rider, request.args)
+        rider = Rider.query.options(*query_options(Rider, fieldset)).get_or_404(rider_id)
+        return jsonify(dump(rider, fieldset)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except SQLAlchemyError as e:
         return jsonify({'error': str(e)}), 404
 
@@ -43,13 +71,13 @@ def create_rider():
             name=data['name'],
             email=data.get('email'),
             phone=data.get('phone'),
-            level=data.get('level'),
             notes=data.get('notes'),
             active=data.get('active', True)
         )
 
         db.session.add(rider)
         db.session.commit()
+        payload_cache.invalidate('riders', 'recurring_lessons')
 
         return jsonify(rider.to_dict()), 201
     except SQLAlchemyError as e:
@@ -71,14 +99,13 @@ def update_rider(rider_id):
             rider.email = data['email']
         if 'phone' in data:
             rider.phone = data['phone']
-        if 'level' in data:
-            rider.level = data['level']
         if 'notes' in data:
             rider.notes = data['notes']
         if 'active' in data:
             rider.active = data['active']
 
         db.session.commit()
+        payload_cache.invalidate('riders', 'recurring_lessons')
         return jsonify(rider.to_dict()), 200
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -94,6 +121,7 @@ def delete_rider(rider_id):
         # Soft delete
         rider.active = False
         db.session.commit()
+        payload_cache.invalidate('riders', 'recurring_lessons')
 
         return jsonify({'message': 'Rider deactivated successfully'}), 200
     except SQLAlchemyError as e:
@@ -102,19 +130,23 @@ def delete_rider(rider_id):
 
 
 @riders_bp.route('/riders/search', methods=['GET'])
+@conditional('riders')
 def search_riders():
-    """Search riders by name or email"""
+    """Search riders by name or email: ?q=&mode=fuzzy|prefix&limit=, ranked (see search.py)"""
     try:
         query = request.args.get('q', '')
 
         if not query:
             return jsonify([]), 200
 
-        riders = Rider.query.filter(
-            (Rider.name.ilike(f'%{query}%')) |
-            (Rider.email.ilike(f'%{query}%'))
-        ).all()
+        fieldset = parse_fields(Rider, request.args)
+        riders = find(
+            Rider, query, request.args.get('mode', 'fuzzy'), search_limit(request.args.get('limit')),
+            options=query_options(Rider, fieldset)
+        )
 
-        return jsonify([r.to_dict() for r in riders]), 200
+        return jsonify([dump(r, fieldset) for r in riders]), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except SQLAlchemyError as e:
         return jsonify({'error': str(e)}), 500
@@ -3,21 +3,92 @@ Schedule API Routes
 Handles scheduled sessions (actual bookings)
 """
 from flask import Blueprint, request, jsonify
-from models import db, Schedule
+from models import db, Schedule, eager_names
+from pagination import is_paginated, paginate, PaginationError
+from fieldsets import FieldsetError, dump, parse_fields, query_options
+from versioning import bump, conditional
+from conflicts import MAX_SESSION_LENGTH, find_conflicts, pending_conflicts, session_intervals, sweep_overlaps, validate_interval
+from rollup import add_sessions, remove_sessions
+from tombstones import record_deletions
+from stream import publish
+from sqlalchemy import delete, insert, or_, select, update
 from sqlalchemy.exc import SQLAlchemyError
-from datetime import datetime
+from datetime import datetime, timezone
+from types import SimpleNamespace
 
 schedule_bp = Blueprint('schedule', __name__)
 
+# Largest number of operations accepted by POST /schedule/batch
+MAX_BATCH_OPERATIONS = 1000
+
+# Columns a batch operation may set
+BATCH_FIELDS = ('rider_id', 'horse_id', 'lesson_id', 'lesson_type', 'start_time', 'end_time', 'notes', 'status')
+
+
+def _parse_datetime(value):
+    """ISO datetime from the client, normalized to naive UTC when it carries an offset"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _check_booking(session, allow_conflicts):
+    """Validate a pending session's interval and look for double bookings
+
+    Returns (conflicts, error_response); error_response is None when the write
+    may proceed. Conflicts are only an error unless allow_conflicts is set,
+    in which case they are reported back alongside the saved session.
+    """
+    try:
+        validate_interval(session.start_time, session.end_time)
+    except ValueError as e:
+        return [], (jsonify({'error': str(e)}), 400)
+
+    if session.status == 'cancelled':
+        return [], None
+
+    conflicts = find_conflicts(
+        session.start_time, session.end_time,
+        horse_id=session.horse_id, rider_id=session.rider_id, exclude_id=session.id
+    )
+    if conflicts and not allow_conflicts:
+        return conflicts, (jsonify({
+            'error': 'Session conflicts with an existing booking',
+            'conflicts': [c.to_dict() for c in conflicts]
+        }), 409)
+    return conflicts, None
+
+
+def _schedule_query():
+    """(Schedule query loading what ?fields= needs, fieldset)"""
+    fieldset = parse_fields(Schedule, request.args)
+    # start_time is the pagination cursor's leading column
+    return Schedule.query.options(*query_options(Schedule, fieldset, Schedule.start_time)), fieldset
+
+
+def _schedule_response(query, fieldset):
+    """Serialize a schedule query, paging on (start_time, id) when requested"""
+    if is_paginated(request.args):
+        sessions, next_cursor = paginate(query, request.args, [Schedule.start_time, Schedule.id])
+        return jsonify({
+            'items': [dump(s, fieldset) for s in sessions],
+            'next_cursor': next_cursor
+        }), 200
+
+    sessions = query.order_by(Schedule.start_time).all()
+    return jsonify([dump(s, fieldset) for s in sessions]), 200
+
 
 @schedule_bp.route('/schedule', methods=['GET'])
+@conditional('schedule', 'riders', 'horses')
 def get_schedule():
     """Get schedule with optional date filtering"""
     try:
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
 
-        query = Schedule.query
+        query, fieldset = _schedule_query()
 
         if start_date:
             start_dt = datetime.fromisoformat(start_date)
@@ -27,8 +98,9 @@ def get_schedule():
             end_dt = datetime.fromisoformat(end_date + 'T23:59:59')
             query = query.filter(Schedule.start_time <= end_dt)
 
-        sessions = query.order_by(Schedule.start_time).all()
-        return jsonify([s.to_dict() for s in sessions]), 200
+        return _schedule_response(query, fieldset)
+    except (PaginationError, FieldsetError) as e:
+        return jsonify({'error': str(e)}), 400
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     except SQLAlchemyError as e:
@@ -36,11 +108,15 @@ def get_schedule():
 
 
 @schedule_bp.route('/schedule/<int:session_id>', methods=['GET'])
+@conditional('schedule', 'riders', 'horses')
 def get_schedule_item(session_id):
     """Get single schedule session by ID"""
     try:
-        session = Schedule.query.get_or_404(session_id)
-        return jsonify(session.to_dict()), 200
+        query, fieldset = _schedule_query()
+        session = query.get_or_404(session_id)
+        return jsonify(dump(session, fieldset)), 200
+    except FieldsetError as e:
+        return jsonify({'error': str(e)}), 400
     except SQLAlchemyError as e:
         return jsonify({'error': str(e)}), 404
 
@@ -58,8 +134,8 @@ def create_schedule_item():
                 return jsonify({'error': f'{field} is required'}), 400
 
         # Parse ISO datetime strings
-        start_time = datetime.fromisoformat(data['start_time'].replace('Z', '+00:00'))
-        end_time = datetime.fromisoformat(data['end_time'].replace('Z', '+00:00'))
+        start_time = _parse_datetime(data['start_time'])
+        end_time = _parse_datetime(data['end_time'])
 
         session = Schedule(
             rider_id=data.get('rider_id'),
@@ -71,10 +147,17 @@ def create_schedule_item():
             status=data.get('status', 'scheduled')
         )
 
+        conflicts, error = _check_booking(session, data.get('allow_conflicts', False))
+        if error:
+            return error
+
         db.session.add(session)
         db.session.commit()
 
-        return jsonify(session.to_dict()), 201
+        result = session.to_dict()
+        if conflicts:
+            result['conflicts'] = [c.to_dict() for c in conflicts]
+        return jsonify(result), 201
     except ValueError as e:
         return jsonify({'error': f'Invalid datetime format: {str(e)}'}), 400
     except SQLAlchemyError as e:
@@ -97,17 +180,29 @@ def update_schedule_item(session_id):
         if 'lesson_id' in data:
             session.lesson_id = data['lesson_id']
         if 'start_time' in data:
-            session.start_time = datetime.fromisoformat(data['start_time'].replace('Z', '+00:00'))
+            session.start_time = _parse_datetime(data['start_time'])
         if 'end_time' in data:
-            session.end_time = datetime.fromisoformat(data['end_time'].replace('Z', '+00:00'))
+            session.end_time = _parse_datetime(data['end_time'])
         if 'notes' in data:
             session.notes = data['notes']
         if 'status' in data:
             session.status = data['status']
 
+        # The conflict query must not flush the unchecked row
+        with db.session.no_autoflush:
+            conflicts, error = _check_booking(session, data.get('allow_conflicts', False))
+        if error:
+            db.session.rollback()
+            return error
+
         db.session.commit()
-        return jsonify(session.to_dict()), 200
+
+        result = session.to_dict()
+        if conflicts:
+            result['conflicts'] = [c.to_dict() for c in conflicts]
+        return jsonify(result), 200
     except ValueError as e:
+        db.session.rollback()
         return jsonify({'error': f'Invalid datetime format: {str(e)}'}), 400
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -128,7 +223,195 @@ def delete_schedule_item(session_id):
         return jsonify({'error': str(e)}), 500
 
 
+def _batch_values(operation, stored):
+    """Final column values of a create/update operation; raises ValueError"""
+    if stored is None:
+        for field in ('start_time', 'end_time'):
+            if not operation.get(field):
+                raise ValueError(f'{field} is required')
+        values = {field: None for field in BATCH_FIELDS}
+        values['status'] = 'scheduled'
+    else:
+        values = {field: stored[field] for field in BATCH_FIELDS}
+
+    for field in BATCH_FIELDS:
+        if field in operation:
+            values[field] = operation[field]
+    for field in ('start_time', 'end_time'):
+        if isinstance(values[field], str):
+            try:
+                values[field] = _parse_datetime(values[field])
+            except ValueError as e:
+                raise ValueError(f'Invalid datetime format: {str(e)}')
+        elif not isinstance(values[field], datetime):
+            raise ValueError(f'{field} must be an ISO datetime string')
+
+    validate_interval(values['start_time'], values['end_time'])
+    return values
+
+
+@schedule_bp.route('/schedule/batch', methods=['POST'])
+def batch_schedule():
+    """Apply many create/update/delete operations in one transaction
+
+    Body: {"operations": [{"op": "create", <fields>}, {"op": "update", "id": 1,
+    <fields>}, {"op": "delete", "id": 2}], "allow_conflicts": false}.
+    Every operation is validated first; either all are applied (one bulk
+    statement per kind, one commit) or none are. results[i] reports on
+    operations[i].
+    """
+    try:
+        data = request.get_json() or {}
+        operations = data.get('operations') if isinstance(data, dict) else data
+        allow_conflicts = isinstance(data, dict) and data.get('allow_conflicts', False)
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'error': 'operations must be a non-empty list'}), 400
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            return jsonify({'error': f'At most {MAX_BATCH_OPERATIONS} operations per batch'}), 400
+
+        target_ids = {
+            op.get('id') for op in operations
+            if isinstance(op, dict) and op.get('op') in ('update', 'delete') and isinstance(op.get('id'), int)
+        }
+        stored = {}
+        if target_ids:
+            rows = db.session.execute(select(*Schedule.__table__.c).where(Schedule.id.in_(target_ids)))
+            stored = {row['id']: dict(row) for row in rows.mappings()}
+
+        # Validate every operation before writing anything
+        results = []
+        pending = []
+        seen_ids = set()
+        for index, operation in enumerate(operations):
+            kind = operation.get('op') if isinstance(operation, dict) else None
+            result = {'index': index, 'op': kind, 'status': 'valid'}
+            results.append(result)
+            try:
+                if kind not in ('create', 'update', 'delete'):
+                    raise ValueError('op must be one of create, update, delete')
+                session_id = None
+                if kind != 'create':
+                    session_id = operation.get('id')
+                    if session_id not in stored:
+                        raise ValueError(f'Schedule session {session_id} not found')
+                    if session_id in seen_ids:
+                        raise ValueError(f'Schedule session {session_id} appears more than once')
+                    seen_ids.add(session_id)
+                    result['id'] = session_id
+                if kind != 'delete':
+                    values = _batch_values(operation, stored.get(session_id))
+                    pending.append(SimpleNamespace(index=index, kind=kind, id=session_id, **values))
+            except ValueError as e:
+                result.update(status='invalid', error=str(e))
+
+        conflicts = pending_conflicts(pending, seen_ids)
+        for index, found in conflicts.items():
+            results[index]['conflicts'] = found
+            if not allow_conflicts:
+                results[index].update(status='conflict', error='Session conflicts with an existing booking')
+
+        failed = {r['status'] for r in results} - {'valid'}
+        if failed:
+            return jsonify({
+                'error': 'No operations were applied',
+                'results': results
+            }), 400 if 'invalid' in failed else 409
+
+        # Apply: one statement per kind, rollup and version bump, one commit
+        now = datetime.utcnow()
+        creates = [p for p in pending if p.kind == 'create']
+        updates = [p for p in pending if p.kind == 'update']
+        delete_ids = [r['id'] for r in results if r['op'] == 'delete']
+        create_rows = [{field: getattr(p, field) for field in BATCH_FIELDS} for p in creates]
+        update_rows = [
+            {'id': p.id, 'updated_at': now, **{field: getattr(p, field) for field in BATCH_FIELDS}}
+            for p in updates
+        ]
+
+        if delete_ids:
+            db.session.execute(
+                delete(Schedule).where(Schedule.id.in_(delete_ids)),
+                execution_options={'synchronize_session': False}
+            )
+            # Before the insert, so a create reusing a deleted id is stamped after its tombstone
+            record_deletions(db.session.connection(), 'schedule', delete_ids)
+        if update_rows:
+            db.session.execute(update(Schedule), update_rows)
+        if create_rows:
+            new_ids = db.session.execute(
+                insert(Schedule).returning(Schedule.id, sort_by_parameter_order=True), create_rows
+            ).scalars().all()
+            for p, new_id in zip(creates, new_ids):
+                p.id = new_id
+                results[p.index]['id'] = new_id
+
+        connection = db.session.connection()
+        remove_sessions(connection, [stored[p.id] for p in updates] + [stored[i] for i in delete_ids])
+        add_sessions(connection, create_rows + update_rows)
+        bump(connection, ['schedule'])
+        publish(db.session, ['schedule'])
+        db.session.commit()
+
+        saved = {
+            s.id: s for s in Schedule.query
+            .options(*eager_names(Schedule))
+            .execution_options(populate_existing=True)
+            .filter(Schedule.id.in_([p.id for p in pending]))
+        } if pending else {}
+        for result in results:
+            result['status'] = {'create': 'created', 'update': 'updated', 'delete': 'deleted'}[result['op']]
+        # By operation, not id: SQLite can hand a deleted id to a session created in the same batch
+        for p in pending:
+            results[p.index]['session'] = saved[p.id].to_dict()
+
+        return jsonify({'results': results}), 200
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@schedule_bp.route('/schedule/conflicts', methods=['GET'])
+def get_schedule_conflicts():
+    """Report every double booking in a date window (sort-and-sweep)"""
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        if not start_date or not end_date:
+            return jsonify({'error': 'start_date and end_date are required'}), 400
+
+        start_dt = datetime.fromisoformat(start_date)
+        end_dt = datetime.fromisoformat(end_date + 'T23:59:59')
+
+        # Reach back far enough to catch sessions still running at start_dt
+        sessions = (
+            Schedule.query
+            .options(*eager_names(Schedule))
+            .filter(Schedule.start_time > start_dt - MAX_SESSION_LENGTH)
+            .filter(Schedule.start_time <= end_dt)
+            .filter(or_(Schedule.status.is_(None), Schedule.status != 'cancelled'))
+            .order_by(Schedule.start_time)
+            .all()
+        )
+
+        conflicts = []
+        for (resource, resource_id), first, second in sweep_overlaps(session_intervals(sessions)):
+            if min(first.end_time, second.end_time) <= start_dt:
+                continue
+            conflicts.append({
+                'resource': resource,
+                'resource_id': resource_id,
+                'sessions': [first.to_dict(), second.to_dict()]
+            })
+
+        return jsonify(conflicts), 200
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    except SQLAlchemyError as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @schedule_bp.route('/schedule/rider', methods=['GET'])
+@conditional('schedule', 'riders', 'horses')
 def get_rider_schedule():
     """Get schedule for a specific rider"""
     try:
@@ -139,7 +422,8 @@ def get_rider_schedule():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
 
-        query = Schedule.query.filter_by(rider_id=rider_id)
+        query, fieldset = _schedule_query()
+        query = query.filter_by(rider_id=rider_id)
 
         if start_date:
             start_dt = datetime.fromisoformat(start_date)
@@ -149,8 +433,9 @@ def get_rider_schedule():
             end_dt = datetime.fromisoformat(end_date + 'T23:59:59')
             query = query.filter(Schedule.start_time <= end_dt)
 
-        sessions = query.order_by(Schedule.start_time).all()
-        return jsonify([s.to_dict() for s in sessions]), 200
+        return _schedule_response(query, fieldset)
+    except (PaginationError, FieldsetError) as e:
+        return jsonify({'error': str(e)}), 400
     except ValueError:
         return jsonify({'error': 'Invalid date format'}), 400
     except SQLAlchemyError as e:
@@ -158,6 +443,7 @@ def get_rider_schedule():
 
 
 @schedule_bp.route('/schedule/horse', methods=['GET'])
+@conditional('schedule', 'riders', 'horses')
 def get_horse_schedule():
     """Get schedule for a specific horse"""
     try:
@@ -168,7 +454,8 @@ def get_horse_schedule():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
 
-        query = Schedule.query.filter_by(horse_id=horse_id)
+        query, fieldset = _schedule_query()
+        query = query.filter_by(horse_id=horse_id)
 
         if start_date:
             start_dt = datetime.fromisoformat(start_date)
@@ -178,8 +465,9 @@ def get_horse_schedule():
             end_dt = datetime.fromisoformat(end_date + 'T23:59:59')
             query = query.filter(Schedule.start_time <= end_dt)
 
-        sessions = query.order_by(Schedule.start_time).all()
-        return jsonify([s.to_dict() for s in sessions]), 200
+        return _schedule_response(query, fieldset)
+    except (PaginationError, FieldsetError) as e:
+        return jsonify({'error': str(e)}), 400
     except ValueError:
         return jsonify({'error': 'Invalid date format'}), 400
     except SQLAlchemyError as e:
@@ -0,0 +1,47 @@
+"""
+Free Slots API Routes
+Finds bookable gaps between availability windows and existing bookings
+"""
+from flask import Blueprint, request, jsonify
+from slots import DEFAULT_GRANULARITY, free_slots
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import date
+
+slots_bp = Blueprint('slots', __name__)
+
+# Longest window a single free-slot query may cover
+MAX_SLOT_SEARCH_DAYS = 92
+
+
+@slots_bp.route('/slots/free', methods=['GET'])
+def get_free_slots():
+    """Get bookable gaps of at least `duration` minutes for a horse and/or rider"""
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        duration = request.args.get('duration', type=int)
+        horse_id = request.args.get('horse_id', type=int)
+        rider_id = request.args.get('rider_id', type=int)
+        granularity = request.args.get('granularity', DEFAULT_GRANULARITY, type=int)
+
+        if not start_date or not end_date or not duration:
+            return jsonify({'error': 'start_date, end_date and duration are required'}), 400
+        if duration < 1 or not 1 <= granularity <= 60:
+            return jsonify({'error': 'duration must be positive and granularity between 1 and 60'}), 400
+
+        start = date.fromisoformat(start_date)
+        end = date.fromisoformat(end_date)
+        if end < start or (end - start).days > MAX_SLOT_SEARCH_DAYS:
+            return jsonify({'error': f'Date range must be 0-{MAX_SLOT_SEARCH_DAYS} days'}), 400
+
+        gaps = free_slots(start, end, duration, horse_id=horse_id, rider_id=rider_id, granularity=granularity)
+        return jsonify([{
+            'date': gap_start.date().isoformat(),
+            'start': gap_start.isoformat(),
+            'end': gap_end.isoformat(),
+            'minutes': int((gap_end - gap_start).total_seconds() // 60)
+        } for gap_start, gap_end in gaps]), 200
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    except SQLAlchemyError as e:
+        return jsonify({'error': str(e)}), 500
@@ -2,52 +2,61 @@
 Statistics API Routes
 Provides aggregated statistics and reports
 """
-from flask import Blueprint, request, jsonify
-from models import db, Schedule, Rider, Horse, RecurringLesson
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from models import db, Schedule, ScheduleDailyStat, Rider, Horse, RecurringLesson, eager_names
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import func
-from datetime import datetime
+from sqlalchemy import and_, case, cast, func, select, true
+from datetime import datetime, timedelta
+import csv
+import io
+import json
 
 stats_bp = Blueprint('stats', __name__)
 
+# Rows fetched per server-side cursor round trip and written per response chunk
+EXPORT_CHUNK_SIZE = 1000
 
-@stats_bp.route('/statistics', methods=['GET'])
-def get_statistics():
-    """Get general statistics"""
-    try:
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
+UTILIZATION_BUCKETS = ('day', 'week', 'month')
 
-        # Base counts
-        total_riders = Rider.query.filter_by(active=True).count()
-        total_horses = Horse.query.filter_by(active=True).count()
-        total_lessons = RecurringLesson.query.filter_by(active=True).count()
 
-        # Schedule query
-        schedule_query = Schedule.query
+def _rollup_range(query):
+    """Restrict a schedule_daily_stats query to ?start_date=&end_date= (inclusive)"""
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
 
-        if start_date:
-            start_dt = datetime.fromisoformat(start_date)
-            schedule_query = schedule_query.filter(Schedule.start_time >= start_dt)
+    if start_date:
+        query = query.filter(ScheduleDailyStat.date >= datetime.fromisoformat(start_date).date())
 
-        if end_date:
-            end_dt = datetime.fromisoformat(end_date + 'T23:59:59')
-            schedule_query = schedule_query.filter(Schedule.start_time <= end_dt)
+    if end_date:
+        query = query.filter(ScheduleDailyStat.date <= datetime.fromisoformat(end_date).date())
+
+    return query
 
-        total_sessions = schedule_query.count()
 
-        # Session status breakdown
-        status_breakdown = db.session.query(
-            Schedule.status,
-            func.count(Schedule.id)
-        ).group_by(Schedule.status).all()
+@stats_bp.route('/statistics', methods=['GET'])
+def get_statistics():
+    """Get general statistics (sessions read from the daily rollup)"""
+    try:
+        # Base counts, one round trip
+        total_riders, total_horses, total_lessons = db.session.execute(select(
+            select(func.count()).select_from(Rider).where(Rider.active == true()).scalar_subquery(),
+            select(func.count()).select_from(Horse).where(Horse.active == true()).scalar_subquery(),
+            select(func.count()).select_from(RecurringLesson).where(RecurringLesson.active == true()).scalar_subquery()
+        )).one()
+
+        # Session status breakdown for the date range
+        status_rows = _rollup_range(db.session.query(
+            ScheduleDailyStat.status,
+            func.sum(ScheduleDailyStat.session_count)
+        )).group_by(ScheduleDailyStat.status).all()
+        status_breakdown = {status or None: int(count) for status, count in status_rows if count}
 
         return jsonify({
             'total_riders': total_riders,
             'total_horses': total_horses,
             'total_lessons': total_lessons,
-            'total_sessions': total_sessions,
-            'status_breakdown': {status: count for status, count in status_breakdown}
+            'total_sessions': sum(status_breakdown.values()),
+            'status_breakdown': status_breakdown
         }), 200
     except ValueError:
         return jsonify({'error': 'Invalid date format'}), 400
@@ -61,26 +70,18 @@ def get_rider_statistics(rider_id):
     try:
         rider = Rider.query.get_or_404(rider_id)
 
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-
-        query = Schedule.query.filter_by(rider_id=rider_id)
-
-        if start_date:
-            start_dt = datetime.fromisoformat(start_date)
-            query = query.filter(Schedule.start_time >= start_dt)
-
-        if end_date:
-            end_dt = datetime.fromisoformat(end_date + 'T23:59:59')
-            query = query.filter(Schedule.start_time <= end_dt)
-
-        total_sessions = query.count()
-        completed_sessions = query.filter_by(status='completed').count()
+        total_sessions, completed_sessions = _rollup_range(db.session.query(
+            func.coalesce(func.sum(ScheduleDailyStat.session_count), 0),
+            func.coalesce(func.sum(case(
+                (ScheduleDailyStat.status == 'completed', ScheduleDailyStat.session_count),
+                else_=0
+            )), 0)
+        ).filter(ScheduleDailyStat.rider_id == rider_id)).one()
 
         return jsonify({
             'rider': rider.to_dict(),
-            'total_sessions': total_sessions,
-            'completed_sessions': completed_sessions
+            'total_sessions': int(total_sessions),
+            'completed_sessions': int(completed_sessions)
         }), 200
     except ValueError:
         return jsonify({'error': 'Invalid date format'}), 400
@@ -94,25 +95,17 @@ def get_horse_statistics(horse_id):
     try:
         horse = Horse.query.get_or_404(horse_id)
 
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-
-        query = Schedule.query.filter_by(horse_id=horse_id)
-
-        if start_date:
-            start_dt = datetime.fromisoformat(start_date)
-            query = query.filter(Schedule.start_time >= start_dt)
-
-        if end_date:
-            end_dt = datetime.fromisoformat(end_date + 'T23:59:59')
-            query = query.filter(Schedule.start_time <= end_dt)
-
-        total_sessions = query.count()
-        unique_riders = query.with_entities(Schedule.rider_id).distinct().count()
+        total_sessions, unique_riders = _rollup_range(db.session.query(
+            func.coalesce(func.sum(ScheduleDailyStat.session_count), 0),
+            func.count(func.distinct(case(
+                (and_(ScheduleDailyStat.rider_id != 0, ScheduleDailyStat.session_count > 0),
+                 ScheduleDailyStat.rider_id)
+            )))
+        ).filter(ScheduleDailyStat.horse_id == horse_id)).one()
 
         return jsonify({
             'horse': horse.to_dict(),
-            'total_sessions': total_sessions,
+            'total_sessions': int(total_sessions),
             'unique_riders': unique_riders
         }), 200
     except ValueError:
@@ -164,68 +157,247 @@ def get_report(report_type):
             return get_attendance_report()
         else:
             return jsonify({'error': 'Unknown report type'}), 400
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
     except SQLAlchemyError as e:
         return jsonify({'error': str(e)}), 500
 
 
 def get_utilization_report():
-    """Horse and rider utilization report"""
+    """Horse and rider utilization report
+
+    With ?bucket=day|week|month returns per-entity time series instead of
+    all-time totals (see _utilization_series).
+    """
+    if request.args.get('bucket'):
+        return _utilization_series(request.args['bucket'])
+
+    horse_sessions = _rollup_range(db.session.query(
+        ScheduleDailyStat.horse_id.label('horse_id'),
+        func.sum(ScheduleDailyStat.session_count).label('sessions')
+    )).group_by(ScheduleDailyStat.horse_id).subquery()
+
+    rider_sessions = _rollup_range(db.session.query(
+        ScheduleDailyStat.rider_id.label('rider_id'),
+        func.sum(ScheduleDailyStat.session_count).label('sessions')
+    )).group_by(ScheduleDailyStat.rider_id).subquery()
+
     horse_utilization = db.session.query(
         Horse.name,
-        func.count(Schedule.id).label('session_count')
-    ).outerjoin(Schedule).group_by(Horse.id).all()
+        func.coalesce(horse_sessions.c.sessions, 0)
+    ).outerjoin(horse_sessions, horse_sessions.c.horse_id == Horse.id).order_by(Horse.id).all()
 
     rider_utilization = db.session.query(
         Rider.name,
-        func.count(Schedule.id).label('session_count')
-    ).outerjoin(Schedule).group_by(Rider.id).all()
+        func.coalesce(rider_sessions.c.sessions, 0)
+    ).outerjoin(rider_sessions, rider_sessions.c.rider_id == Rider.id).order_by(Rider.id).all()
+
+    return jsonify({
+        'horses': [{'name': name, 'sessions': int(count)} for name, count in horse_utilization],
+        'riders': [{'name': name, 'sessions': int(count)} for name, count in rider_utilization]
+    }), 200
+
+
+def _bucket_expression(bucket):
+    """SQL expression labelling a rollup row with its bucket start (YYYY-MM-DD)"""
+    column = ScheduleDailyStat.date
+    if db.engine.dialect.name == 'postgresql':
+        # Cast first so date_trunc works on a plain timestamp, not timestamptz
+        return func.to_char(func.date_trunc(bucket, cast(column, db.DateTime)), 'YYYY-MM-DD')
+
+    # SQLite fallback: date modifiers ('weekday 1' moves forward to a Monday)
+    if bucket == 'day':
+        return func.date(column)
+    if bucket == 'week':
+        return func.date(column, '-6 days', 'weekday 1')
+    return func.strftime('%Y-%m-01', column)
+
+
+def _bucket_labels(bucket, start, end):
+    """Every bucket start between start and end, matching _bucket_expression"""
+    if bucket == 'week':
+        start -= timedelta(days=start.weekday())
+    elif bucket == 'month':
+        start = start.replace(day=1)
+
+    labels = []
+    current = start
+    while current <= end:
+        labels.append(current.isoformat())
+        if bucket == 'day':
+            current += timedelta(days=1)
+        elif bucket == 'week':
+            current += timedelta(days=7)
+        else:
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return labels
+
+
+def _utilization_series(bucket):
+    """Columnar per-horse and per-rider session counts and ridden minutes
+
+    {"bucket": "week", "buckets": [labels...],
+     "horses": [{"id", "name", "sessions": [...], "minutes": [...]}], "riders": [...]}
+    Value arrays line up with "buckets"; cancelled sessions are not counted.
+    """
+    if bucket not in UTILIZATION_BUCKETS:
+        return jsonify({'error': f'bucket must be one of {", ".join(UTILIZATION_BUCKETS)}'}), 400
+
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    if not start_date or not end_date:
+        return jsonify({'error': 'start_date and end_date are required with bucket'}), 400
+
+    labels = _bucket_labels(
+        bucket, datetime.fromisoformat(start_date).date(), datetime.fromisoformat(end_date).date()
+    )
+    positions = {label: i for i, label in enumerate(labels)}
+    label = _bucket_expression(bucket).label('bucket')
+
+    def series(id_column, model):
+        rows = _rollup_range(db.session.query(
+            label,
+            id_column,
+            func.sum(ScheduleDailyStat.session_count),
+            func.sum(ScheduleDailyStat.minutes)
+        )).filter(
+            id_column != 0,
+            ScheduleDailyStat.status != 'cancelled'
+        ).group_by(label, id_column).all()
+
+        entities = {}
+        for bucket_label, entity_id, sessions, minutes in rows:
+            if not sessions:
+                continue
+            entry = entities.get(entity_id)
+            if entry is None:
+                entry = entities[entity_id] = {
+                    'id': entity_id,
+                    'sessions': [0] * len(labels),
+                    'minutes': [0] * len(labels)
+                }
+            position = positions[bucket_label]
+            entry['sessions'][position] = int(sessions)
+            entry['minutes'][position] = int(minutes)
+
+        names = dict(db.session.query(model.id, model.name).filter(model.id.in_(list(entities)))) if entities else {}
+        return [
+            {**entry, 'name': names.get(entity_id)}
+            for entity_id, entry in sorted(entities.items())
+        ]
 
     return jsonify({
-        'horses': [{'name': name, 'sessions': count} for name, count in horse_utilization],
-        'riders': [{'name': name, 'sessions': count} for name, count in rider_utilization]
+        'bucket': bucket,
+        'buckets': labels,
+        'horses': series(ScheduleDailyStat.horse_id, Horse),
+        'riders': series(ScheduleDailyStat.rider_id, Rider)
     }), 200
 
 
 def get_attendance_report():
     """Attendance report by status"""
-    attendance = db.session.query(
-        Schedule.status,
-        func.count(Schedule.id).label('count')
-    ).group_by(Schedule.status).all()
+    attendance = _rollup_range(db.session.query(
+        ScheduleDailyStat.status,
+        func.sum(ScheduleDailyStat.session_count).label('count')
+    )).group_by(ScheduleDailyStat.status).all()
 
     return jsonify({
-        'attendance': [{'status': status, 'count': count} for status, count in attendance]
+        'attendance': [{'status': status or None, 'count': int(count)} for status, count in attendance if count]
     }), 200
 
 
 @stats_bp.route('/export/<string:data_type>', methods=['GET'])
 def export_data(data_type):
-    """Export data in specified format"""
+    """Export data as json, ndjson or csv, streamed in chunks
+
+    Rows are fetched with a server-side cursor (yield_per) and written out as
+    they arrive, so memory stays flat regardless of table size. The schedule
+    export honours start_date/end_date.
+    """
     try:
         format_type = request.args.get('format', 'json')
+        if format_type not in EXPORT_FORMATS:
+            return jsonify({'error': 'Format not supported'}), 400
 
         if data_type == 'riders':
-            data = Rider.query.all()
-            result = [r.to_dict() for r in data]
+            query = Rider.query.order_by(Rider.id)
         elif data_type == 'horses':
-            data = Horse.query.all()
-            result = [h.to_dict() for h in data]
+            query = Horse.query.order_by(Horse.id)
         elif data_type == 'schedule':
-            data = Schedule.query.all()
-            result = [s.to_dict() for s in data]
+            query = Schedule.query.options(*eager_names(Schedule))
+
+            start_date = request.args.get('start_date')
+            end_date = request.args.get('end_date')
+
+            if start_date:
+                start_dt = datetime.fromisoformat(start_date)
+                query = query.filter(Schedule.start_time >= start_dt)
+
+            if end_date:
+                end_dt = datetime.fromisoformat(end_date + 'T23:59:59')
+                query = query.filter(Schedule.start_time <= end_dt)
+
+            query = query.order_by(Schedule.start_time, Schedule.id)
         elif data_type == 'lessons':
-            data = RecurringLesson.query.all()
-            result = [l.to_dict() for l in data]
+            query = RecurringLesson.query.options(*eager_names(RecurringLesson)).order_by(RecurringLesson.id)
         else:
             return jsonify({'error': 'Unknown data type'}), 400
 
-        # For now, only JSON export is implemented
-        # CSV/Excel export can be added later
-        if format_type == 'json':
-            return jsonify(result), 200
-        else:
-            return jsonify({'error': 'Format not supported yet'}), 400
+        mimetype, encode = EXPORT_FORMATS[format_type]
+        rows = (row.to_dict() for row in query.yield_per(EXPORT_CHUNK_SIZE))
 
+        response = Response(stream_with_context(_chunked(encode(rows))), mimetype=mimetype)
+        if format_type == 'csv':
+            response.headers['Content-Disposition'] = f'attachment; filename={data_type}.csv'
+        return response
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
     except SQLAlchemyError as e:
         return jsonify({'error': str(e)}), 500
 
+
+def _json_lines(rows):
+    """Serialize rows as a single JSON array"""
+    yield '['
+    for i, row in enumerate(rows):
+        yield (',' if i else '') + json.dumps(row)
+    yield ']'
+
+
+def _ndjson_lines(rows):
+    """Serialize rows as newline-delimited JSON"""
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def _csv_lines(rows):
+    """Serialize rows as CSV, header taken from the first row"""
+    buffer = io.StringIO()
+    writer = None
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row))
+            writer.writeheader()
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _chunked(lines):
+    """Group serialized lines so each write to the socket carries a full chunk"""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+EXPORT_FORMATS = {
+    'json': ('application/json', _json_lines),
+    'ndjson': ('application/x-ndjson', _ndjson_lines),
+    'csv': ('text/csv', _csv_lines)
+}
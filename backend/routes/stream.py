@@ -0,0 +1,23 @@
+"""
+Stream API Route
+Server-Sent Events: one `change` event ({"tables": [...]}) per committed
+write to schedule, availability or recurring lessons (see stream.py).
+Under asgi.py the stream is served on the event loop instead of holding a
+thread per client.
+"""
+from flask import Blueprint, Response, current_app, request
+from stream import ENVIRON_KEY, Subscription
+
+stream_bp = Blueprint('stream', __name__)
+
+
+@stream_bp.route('/stream', methods=['GET'])
+def get_stream():
+    """Push change events until the client disconnects"""
+    subscription = Subscription(current_app.config.get('STREAM_HEARTBEAT_SECONDS', 15))
+    request.environ[ENVIRON_KEY] = subscription
+    return Response(iter(subscription), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop nginx-style proxies from buffering the stream
+        'X-Accel-Buffering': 'no'
+    })
@@ -0,0 +1,151 @@
+"""
+Rider and horse search
+Ranked, limited, accent-insensitive lookup. Postgres matches against a
+pg_trgm GIN index over the unaccented name/email/type; SQLite uses an FTS5
+table (unicode61, diacritics removed) kept in sync by triggers.
+
+Two modes: 'prefix' (autocomplete: every typed word starts a word of the
+record) and 'fuzzy' (any word may match; on Postgres typos are tolerated
+through trigram similarity). Results are ordered active first, then by rank.
+"""
+import re
+import unicodedata
+from sqlalchemy import and_, column, func, literal, literal_column, or_, select, table, text
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MODES = ('fuzzy', 'prefix')
+
+# Matches ranked per query (see find())
+RANK_CANDIDATES = 1000
+
+# Columns indexed per table
+SEARCHABLE = {
+    'riders': ('name', 'email'),
+    'horses': ('name', 'type')
+}
+
+
+def fold(value):
+    """Lower-case, accent-free, whitespace-collapsed copy of value ('Hélène' -> 'helene')"""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.lower().split())
+
+
+def search_limit(value):
+    """?limit= for search endpoints; raises ValueError"""
+    if value is None or value == '':
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise ValueError('limit must be a positive integer')
+    return min(limit, MAX_LIMIT)
+
+
+def _document(table_name):
+    """SQL expression of the folded search document (must match the index)"""
+    parts = " || ' ' || ".join(f"coalesce({name}, '')" for name in SEARCHABLE[table_name])
+    return f'search_fold({parts})'
+
+
+def install(connection):
+    """Create the search index structures for the connection's dialect"""
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        connection.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        connection.execute(text('CREATE EXTENSION IF NOT EXISTS unaccent'))
+        # unaccent() is only STABLE; an IMMUTABLE wrapper can back an index
+        connection.execute(text(
+            "CREATE OR REPLACE FUNCTION search_fold(text) RETURNS text AS "
+            "$$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$ "
+            "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT"
+        ))
+        for table_name in SEARCHABLE:
+            connection.execute(text(
+                f'CREATE INDEX IF NOT EXISTS ix_{table_name}_search_trgm ON {table_name} '
+                f'USING gin (({_document(table_name)}) gin_trgm_ops)'
+            ))
+    elif dialect == 'sqlite':
+        for table_name, columns in SEARCHABLE.items():
+            fts = f'{table_name}_search'
+            names = ', '.join(columns)
+            new_values = ', '.join(f'new.{c}' for c in columns)
+            old_values = ', '.join(f'old.{c}' for c in columns)
+            connection.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, "
+                f"content='{table_name}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2')"
+            ))
+            connection.execute(text(
+                f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN '
+                f'INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END'
+            ))
+            connection.execute(text(
+                f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN '
+                f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); END"
+            ))
+            connection.execute(text(
+                f'CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table_name} BEGIN '
+                f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); "
+                f'INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END'
+            ))
+            connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def _fts_query(terms, mode):
+    """FTS5 MATCH string: quoted prefix terms, AND-ed for prefix mode, OR-ed for fuzzy"""
+    quoted = ['"' + term.replace('"', '""') + '"*' for term in terms]
+    return (' OR ' if mode == 'fuzzy' else ' AND ').join(quoted)
+
+
+def find(model, q, mode='fuzzy', limit=DEFAULT_LIMIT, options=()):
+    """Top `limit` rows of model (Rider or Horse) matching q, best first
+
+    options: loader options for the rows (e.g. a fieldset's load_only)
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+    folded = fold(q)
+    terms = folded.split()
+    if not terms:
+        return []
+
+    table_name = model.__tablename__
+    query = model.query.options(*options)
+    dialect = query.session.get_bind().dialect.name
+
+    # Only the RANK_CANDIDATES best-scoring matches are joined back and
+    # sorted with the active flag; broader queries should be narrowed by typing more
+    if dialect == 'postgresql':
+        document = literal_column(_document(table_name))
+        if mode == 'prefix':
+            match = and_(*[document.op('~')(r'\m' + re.escape(term)) for term in terms])
+        else:
+            # <% (word similarity above pg_trgm.word_similarity_threshold) and
+            # LIKE '%q%' are both answered from the trigram index
+            match = or_(literal(folded).op('<%')(document), document.contains(folded, autoescape=True))
+        score = func.word_similarity(folded, document).label('score')
+        candidates = select(model.id, score).where(match).order_by(score.desc()).limit(RANK_CANDIDATES).subquery()
+        query = query.join(candidates, candidates.c.id == model.id)
+        rank = candidates.c.score.desc()
+    elif dialect == 'sqlite':
+        fts = table(f'{table_name}_search', column('rowid'), column('rank'))
+        candidates = (
+            select(fts.c.rowid, fts.c.rank)
+            .where(literal_column(f'{table_name}_search').op('MATCH')(_fts_query(terms, mode)))
+            .order_by(fts.c.rank)
+            .limit(RANK_CANDIDATES)
+            .subquery()
+        )
+        query = query.join(candidates, candidates.c.rowid == model.id)
+        rank = candidates.c.rank
+    else:
+        columns = [getattr(model, name) for name in SEARCHABLE[table_name]]
+        query = query.filter(or_(*[c.ilike(f'%{q}%') for c in columns]))
+        rank = model.name
+
+    return query.order_by(model.active.desc(), rank, model.name, model.id).limit(limit).all()
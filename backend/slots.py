@@ -0,0 +1,191 @@
+"""
+Free-slot computation
+Bookable time = weekly Availability windows minus bookings (schedule
+sessions plus recurring occurrences not yet materialized), computed with a
+single sweep over both sorted interval lists. Stored slots that do not
+parse (unknown day, times other than HH:MM, end before start) are left out
+of every computation and logged, instead of failing the whole read.
+"""
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from conflicts import MAX_SESSION_LENGTH
+from models import Availability, Schedule
+from recurrence import WEEKDAYS, load_occurrences, parse_hhmm
+
+DEFAULT_GRANULARITY = 15  # minutes
+
+logger = logging.getLogger(__name__)
+
+
+def merge(intervals):
+    """Union of (start, end) intervals, sorted and non-overlapping"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract(windows, busy):
+    """Parts of windows not covered by busy
+
+    windows: sorted, non-overlapping (start, end) list
+    busy: (start, end) list sorted by start, overlaps allowed
+    Both lists are walked once, so the cost is O(len(windows) + len(busy)).
+    """
+    free = []
+    first = 0
+    for window_start, window_end in windows:
+        cursor = window_start
+        # Bookings finishing before this window cannot touch it or any later one
+        while first < len(busy) and busy[first][1] <= cursor:
+            first += 1
+        i = first
+        while i < len(busy) and busy[i][0] < window_end:
+            busy_start, busy_end = busy[i]
+            if busy_start > cursor:
+                free.append((cursor, busy_start))
+            if busy_end > cursor:
+                cursor = busy_end
+            i += 1
+        if cursor < window_end:
+            free.append((cursor, window_end))
+    return free
+
+
+def align(gaps, granularity, duration=None):
+    """Snap gaps inward to the granularity grid, dropping those shorter than duration"""
+    step = timedelta(minutes=granularity)
+    minimum = timedelta(minutes=duration or granularity)
+    aligned = []
+    for start, end in gaps:
+        midnight = datetime.combine(start.date(), datetime.min.time())
+        start = midnight + -((midnight - start) // step) * step
+        end = midnight + ((end - midnight) // step) * step
+        if end - start >= minimum:
+            aligned.append((start, end))
+    return aligned
+
+
+def slot_times(slot):
+    """(start, end) times of an Availability row, or None when the stored row is malformed"""
+    try:
+        start, end = parse_hhmm(slot.start_time), parse_hhmm(slot.end_time)
+        valid = slot.day in WEEKDAYS and start < end
+    except (AttributeError, TypeError, ValueError):
+        valid = False
+    if not valid:
+        logger.warning('Ignoring malformed availability slot %s: %s %s-%s',
+                       slot.id, slot.day, slot.start_time, slot.end_time)
+        return None
+    return start, end
+
+
+def availability_windows(slots, start_date, end_date):
+    """Concrete (start, end) windows of weekly Availability slots over the dates"""
+    by_day = {}
+    for slot in slots:
+        times = slot_times(slot)
+        if times is not None:
+            by_day.setdefault(slot.day, []).append(times)
+
+    windows = []
+    day = start_date
+    while day <= end_date:
+        for start, end in by_day.get(WEEKDAYS[day.weekday()], []):
+            windows.append((datetime.combine(day, start), datetime.combine(day, end)))
+        day += timedelta(days=1)
+    return merge(windows)
+
+
+def load_busy(start_date, end_date, horse_id=None, rider_id=None):
+    """Booked intervals touching the dates, sorted by start
+
+    Restricted to the horse and/or rider when given; otherwise every booking
+    counts (the instructor's own calendar).
+    """
+    start_dt = datetime.combine(start_date, datetime.min.time())
+    end_dt = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+
+    query = Schedule.query.with_entities(Schedule.start_time, Schedule.end_time).filter(
+        Schedule.start_time > start_dt - MAX_SESSION_LENGTH,
+        Schedule.start_time < end_dt,
+        or_(Schedule.status.is_(None), Schedule.status != 'cancelled')
+    )
+    resources = []
+    if horse_id is not None:
+        resources.append(Schedule.horse_id == horse_id)
+    if rider_id is not None:
+        resources.append(Schedule.rider_id == rider_id)
+    if resources:
+        query = query.filter(or_(*resources))
+    busy = [(s, e) for s, e in query]
+
+    for occurrence in load_occurrences(start_date, end_date):
+        if occurrence['materialized']:
+            continue
+        if resources and occurrence['horse_id'] != horse_id and occurrence['rider_id'] != rider_id:
+            continue
+        busy.append((occurrence['start_time'], occurrence['end_time']))
+
+    busy.sort()
+    return busy
+
+
+def free_slots(start_date, end_date, duration, horse_id=None, rider_id=None,
+               granularity=DEFAULT_GRANULARITY):
+    """Bookable gaps of at least duration minutes, aligned to granularity"""
+    slots = Availability.query.all()
+    windows = availability_windows(slots, start_date, end_date)
+    busy = load_busy(start_date, end_date, horse_id, rider_id)
+    return align(subtract(windows, busy), granularity, duration)
+
+
+def _occupied(day, times, busy, granularity):
+    """Whether bookings leave no gap of at least one granularity step in the (start, end) times on day"""
+    window = [(datetime.combine(day, times[0]), datetime.combine(day, times[1]))]
+    return not align(subtract(window, busy), granularity)
+
+
+def slot_occupancy(slots, week_start, granularity=DEFAULT_GRANULARITY):
+    """{slot.id: occupied} for the slots' dates in the week starting week_start
+
+    A slot is occupied when bookings leave no gap of at least one
+    granularity step inside it; malformed slots map to None.
+    """
+    week_end = week_start + timedelta(days=6)
+    busy = load_busy(week_start, week_end)
+
+    occupancy = {}
+    for slot in slots:
+        times = slot_times(slot)
+        if times is None:
+            occupancy[slot.id] = None
+            continue
+        day = week_start + timedelta(days=WEEKDAYS.index(slot.day))
+        occupancy[slot.id] = _occupied(day, times, busy, granularity)
+    return occupancy
+
+
+def dated_occupancy(slots, start_date, end_date, busy, granularity=DEFAULT_GRANULARITY):
+    """{date: [(slot, occupied)]} for every date of the window, from already loaded busy intervals
+
+    Malformed slots cannot be placed on a date and are left out.
+    """
+    by_day = {}
+    for slot in slots:
+        times = slot_times(slot)
+        if times is not None:
+            by_day.setdefault(slot.day, []).append((slot, times))
+
+    result = {}
+    day = start_date
+    while day <= end_date:
+        weekly = by_day.get(WEEKDAYS[day.weekday()], [])
+        result[day] = [(slot, _occupied(day, times, busy, granularity)) for slot, times in weekly]
+        day += timedelta(days=1)
+    return result
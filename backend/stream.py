@@ -0,0 +1,202 @@
+"""
+Change notifications
+Every committed write to schedule, availability, recurring_lessons or
+recurring_lesson_exceptions publishes a compact event, {"tables": [...]}, which /api/stream pushes to
+connected browsers; they then pull the rows from /api/changes.
+
+With Postgres the event is a NOTIFY on CHANNEL issued inside the writing
+transaction, so only commits are announced. One LISTEN connection per
+process (started with its first subscriber) fans it out locally, so every
+gunicorn worker sees every write. Other databases (SQLite in development
+and tests) use an in-process fallback that delivers after commit to the
+subscribers of the writing process only.
+"""
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+CHANNEL = 'equestrian_changes'
+PUSHED_TABLES = ('schedule', 'availability', 'recurring_lessons', 'recurring_lesson_exceptions')
+
+# Events buffered per client; a client that falls further behind misses some
+# (its next pull from /api/changes still catches up)
+MAX_PENDING = 100
+RECONNECT_DELAY = 5  # seconds, after the LISTEN connection fails
+
+# WSGI environ key carrying the stream's Subscription (served natively by asgi.py)
+ENVIRON_KEY = 'equestrian.event_stream'
+
+_PENDING_KEY = 'stream_pending_tables'
+
+logger = logging.getLogger(__name__)
+
+
+class Broker:
+    """Subscribers of this process and, with Postgres, the LISTEN thread feeding them"""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._listen_url = None
+        self._listener = None
+
+    def configure(self, listen_url):
+        """libpq URL to LISTEN on, or None for the in-process fallback"""
+        self._listen_url = listen_url
+
+    @property
+    def uses_notify(self):
+        return self._listen_url is not None
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.add(callback)
+            # Threads do not survive fork: each worker starts its own
+            if self._listen_url and (self._listener is None or not self._listener.is_alive()):
+                self._listener = threading.Thread(target=self._listen, name='stream-listen', daemon=True)
+                self._listener.start()
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers.discard(callback)
+
+    def deliver(self, change):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(change)
+
+    def _listen(self):
+        import psycopg
+
+        while True:
+            try:
+                with psycopg.connect(self._listen_url, autocommit=True) as conn:
+                    conn.execute(f'LISTEN {CHANNEL}')
+                    for notify in conn.notifies():
+                        self.deliver(json.loads(notify.payload))
+            except Exception:
+                logger.exception('LISTEN %s failed; reconnecting in %ss', CHANNEL, RECONNECT_DELAY)
+                time.sleep(RECONNECT_DELAY)
+
+
+broker = Broker()
+
+
+def publish(session, tables):
+    """Announce writes to tables once session's transaction commits (call after Core bulk writes)"""
+    tables = sorted(set(tables).intersection(PUSHED_TABLES))
+    if not tables:
+        return
+    if broker.uses_notify:
+        # Delivered by Postgres on commit, dropped on rollback
+        payload = json.dumps({'tables': tables})
+        session.connection().execute(select(func.pg_notify(CHANNEL, payload)))
+    else:
+        session.info.setdefault(_PENDING_KEY, set()).update(tables)
+
+
+def _after_flush(session, flush_context):
+    touched = {
+        obj.__tablename__
+        for collection in (session.new, session.dirty, session.deleted)
+        for obj in collection
+        if getattr(obj, '__tablename__', None) in PUSHED_TABLES
+    }
+    if touched:
+        publish(session, touched)
+
+
+def _after_commit(session):
+    tables = session.info.pop(_PENDING_KEY, None)
+    if tables:
+        broker.deliver({'tables': sorted(tables)})
+
+
+def _after_transaction_end(session, transaction):
+    # Rolled back or closed without commit: nothing to announce
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+def _offer(events, change):
+    try:
+        events.put_nowait(change)
+    except (queue.Full, asyncio.QueueFull):
+        pass
+
+
+def format_event(change):
+    """One Server-Sent Events message"""
+    return f'event: change\ndata: {json.dumps(change, separators=(",", ":"))}\n\n'
+
+
+class Subscription:
+    """One client's event stream, consumed by a WSGI thread (iteration) or an event loop (aiter())
+
+    Yields SSE text: a reconnect hint, then a message per change and a
+    comment line every `heartbeat` seconds so proxies keep the connection
+    open and dead clients are noticed.
+    """
+
+    def __init__(self, heartbeat):
+        self.heartbeat = heartbeat
+        self._events = queue.Queue(MAX_PENDING)
+        self._loop = None
+
+    def put(self, change):
+        """Called by the broker from any thread"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(_offer, self._events, change)
+        else:
+            _offer(self._events, change)
+
+    def __iter__(self):
+        broker.subscribe(self.put)
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    change = self._events.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield format_event(change)
+        finally:
+            broker.unsubscribe(self.put)
+
+    async def aiter(self):
+        self._events = asyncio.Queue(MAX_PENDING)
+        self._loop = asyncio.get_running_loop()
+        broker.subscribe(self.put)
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    change = await asyncio.wait_for(self._events.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield format_event(change)
+        finally:
+            broker.unsubscribe(self.put)
+
+
+def init_app(app):
+    """Pick NOTIFY or the in-process fallback and hook publishing into ORM commits"""
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'postgresql' and app.config.get('STREAM_NOTIFY', True):
+        broker.configure(url.set(drivername='postgresql').render_as_string(hide_password=False))
+    else:
+        broker.configure(None)
+
+    for name, listener in (('after_flush', _after_flush), ('after_commit', _after_commit),
+                           ('after_transaction_end', _after_transaction_end)):
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
@@ -0,0 +1,82 @@
+"""
+Test fixtures: an app on a fresh, fully migrated SQLite file per test
+Run from backend/: python -m pytest -q
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from config import Config  # noqa: E402
+from migrations import run_migrations  # noqa: E402
+from models import db, Horse, RecurringLesson, Rider, Schedule  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        SQLALCHEMY_REPLICA_URIS = []
+        PROFILE_REQUESTS = False
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        run_migrations()
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def seed(app):
+    """seed(n): add n riders, horses, weekly lessons and sessions (one per hour from 2025-01-06 08:00)"""
+    def seed(n, start=datetime(2025, 1, 6, 8)):
+        riders = [Rider(name=f'Rider {i}') for i in range(n)]
+        horses = [Horse(name=f'Horse {i}') for i in range(n)]
+        db.session.add_all(riders + horses)
+        db.session.flush()
+        days = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+        db.session.add_all([
+            RecurringLesson(rider_id=rider.id, horse_id=horse.id, day=days[i % 7],
+                            time=f'{8 + i % 10:02d}:00', duration=60, lesson_type='private')
+            for i, (rider, horse) in enumerate(zip(riders, horses))
+        ])
+        sessions = [
+            Schedule(rider_id=rider.id, horse_id=horse.id, lesson_type='private',
+                     start_time=start + timedelta(hours=i), end_time=start + timedelta(hours=i, minutes=45))
+            for i, (rider, horse) in enumerate(zip(riders, horses))
+        ]
+        db.session.add_all(sessions)
+        db.session.commit()
+        return sessions
+    return seed
+
+
+@pytest.fixture
+def count_statements(app):
+    """count_statements(fn): (result of fn(), number of SQL statements it executed)"""
+    from sqlalchemy import event
+
+    def count_statements(fn):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            result = fn()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        return result, len(statements)
+    return count_statements
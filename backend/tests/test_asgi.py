@@ -0,0 +1,72 @@
+"""Async serving mode answers like the WSGI app"""
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from asgi import create_asgi_app, is_async_read
+from config import Config
+
+
+@pytest.fixture
+def asgi_app(app):
+    """ASGI app on the same database file as the `app` fixture"""
+    class AsyncTestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = app.config['SQLALCHEMY_DATABASE_URI']
+        PROFILE_REQUESTS = False
+
+    asgi_app = create_asgi_app(AsyncTestConfig)
+    yield asgi_app
+    asyncio.run(asgi_app.engine.dispose())
+
+
+def _asgi_get(asgi_app, url):
+    async def get():
+        transport = httpx.ASGITransport(app=asgi_app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+            return await client.get(url)
+    return asyncio.run(get())
+
+
+@pytest.mark.parametrize('url', [
+    '/api/schedule?start_date=2025-01-06&end_date=2025-01-12',
+    '/api/schedule/1',
+    '/api/availability?date=2025-01-06',
+    '/api/statistics',
+    '/api/calendar?start_date=2025-01-06&end_date=2025-01-12',
+    '/api/riders',
+])
+def test_asgi_body_matches_wsgi(client, seed, asgi_app, url):
+    seed(3)
+    client.put('/api/availability/monday', json={'slots': [{'start': '08:00', 'end': '12:00'}]})
+
+    expected = client.get(url)
+    async_statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        async_statements.append(statement)
+
+    event.listen(asgi_app.engine.sync_engine, 'before_cursor_execute', listener)
+    try:
+        response = _asgi_get(asgi_app, url)
+    finally:
+        event.remove(asgi_app.engine.sync_engine, 'before_cursor_execute', listener)
+    assert response.status_code == expected.status_code == 200
+    body, expected_body = response.json(), expected.get_json()
+    if isinstance(body, dict):
+        # Stamped with the time of the read
+        body.pop('cursor', None)
+        expected_body.pop('cursor', None)
+    assert body == expected_body
+    assert response.headers.get('etag') == expected.headers.get('ETag')
+    # Calendar reads query through the async engine, the rest through the sync one
+    assert bool(async_statements) == is_async_read('GET', url.split('?')[0])
+
+
+def test_only_calendar_reads_run_on_the_event_loop():
+    assert is_async_read('GET', '/api/schedule')
+    assert is_async_read('HEAD', '/api/availability/monday')
+    assert not is_async_read('POST', '/api/schedule')
+    assert not is_async_read('GET', '/api/schedules')
+    assert not is_async_read('GET', '/api/riders')
@@ -0,0 +1,77 @@
+"""Availability input validation and tolerance of malformed stored slots"""
+import pytest
+
+from models import db, Availability
+
+
+@pytest.mark.parametrize('body', [
+    {'day': 'monday', 'start_time': '9h00', 'end_time': '10:00'},
+    {'day': 'monday', 'start_time': '11:00', 'end_time': '10:00'},
+    {'day': 'someday', 'start_time': '09:00', 'end_time': '10:00'},
+    {'day': 'monday', 'start_time': '09:00'},
+])
+def test_post_rejects_invalid_slots(client, body):
+    response = client.post('/api/availability', json=body)
+    assert response.status_code == 400
+    assert Availability.query.count() == 0
+
+
+@pytest.mark.parametrize('slots', [[{'start': '9h00', 'end': '10:00'}], [{'start': '11:00', 'end': '10:00'}], 'all day'])
+def test_put_rejects_invalid_slots(client, slots):
+    client.put('/api/availability/monday', json={'slots': [{'start': '08:00', 'end': '09:00'}]})
+    response = client.put('/api/availability/monday', json={'slots': slots})
+    assert response.status_code == 400
+    assert [(s.start_time, s.end_time) for s in Availability.query] == [('08:00', '09:00')]
+
+
+def test_post_creates_valid_slot(client):
+    response = client.post('/api/availability', json={'day': 'Monday', 'start_time': '09:00', 'end_time': '10:00'})
+    assert response.status_code == 201
+    assert Availability.query.one().day == 'monday'
+
+
+def test_week_put_keeps_unchanged_slots(client):
+    first = client.put('/api/availability', json={
+        'monday': [{'start': '08:00', 'end': '09:00'}, {'start': '10:00', 'end': '11:00'}],
+        'tuesday': [{'start': '08:00', 'end': '09:00'}],
+    }).get_json()
+    kept_id = first['monday'][0]['id']
+
+    response = client.put('/api/availability', json={
+        'Monday': [{'start': '08:00', 'end': '09:00'}, {'start': '12:00', 'end': '13:00'}],
+    })
+    assert response.status_code == 200
+    week = response.get_json()
+    assert [(s['id'] == kept_id, s['start']) for s in week['monday']] == [(True, '08:00'), (False, '12:00')]
+    assert week['tuesday'] == []
+    assert sorted(week) == sorted(first)
+    assert client.get('/api/availability?date=2025-01-06').get_json() == week
+
+
+@pytest.mark.parametrize('body', [
+    {'someday': [{'start': '08:00', 'end': '09:00'}]},
+    {'monday': [{'start': '08:00', 'end': '09:00'}], 'tuesday': [{'start': '11:00', 'end': '10:00'}]},
+    [{'start': '08:00', 'end': '09:00'}],
+])
+def test_week_put_rejects_invalid_weeks(client, body):
+    client.put('/api/availability/friday', json={'slots': [{'start': '08:00', 'end': '09:00'}]})
+    response = client.put('/api/availability', json=body)
+    assert response.status_code == 400
+    assert [(s.day, s.start_time) for s in Availability.query] == [('friday', '08:00')]
+
+
+@pytest.mark.parametrize('url', [
+    '/api/availability?date=2025-01-06',
+    '/api/slots/free?start_date=2025-01-06&end_date=2025-01-12&duration=60',
+    '/api/calendar?start_date=2025-01-06&end_date=2025-01-12',
+])
+def test_malformed_stored_slot_does_not_fail_reads(client, url):
+    # Written before POST validated its input
+    db.session.add_all([
+        Availability(day='monday', start_time='9h00', end_time='10:00'),
+        Availability(day='monday', start_time='10:00', end_time='12:00'),
+    ])
+    db.session.commit()
+
+    response = client.get(url)
+    assert response.status_code == 200, response.get_json()
@@ -0,0 +1,29 @@
+"""Payload cache tiers"""
+import time
+
+from cache import LocalSharedTier
+
+
+def test_local_shared_tier_is_bounded():
+    tier = LocalSharedTier(max_entries=3)
+    for i in range(10):
+        tier.set(f'riders:0:/api/riders?page={i}', 'payload', ttl=300)
+    assert len(tier) == 3
+    assert tier.get('riders:0:/api/riders?page=9') == 'payload'
+    assert tier.get('riders:0:/api/riders?page=0') is None
+
+
+def test_local_shared_tier_prunes_expired_entries():
+    tier = LocalSharedTier(max_entries=100)
+    tier.set('a', 'old', ttl=0.01)
+    time.sleep(0.02)
+    tier.set('b', 'new', ttl=300)
+    assert len(tier) == 1
+
+
+def test_generations_survive_eviction():
+    tier = LocalSharedTier(max_entries=1)
+    tier.incr('gen:riders')
+    for i in range(5):
+        tier.set(f'key{i}', 'payload', ttl=300)
+    assert tier.get_int('gen:riders') == 1
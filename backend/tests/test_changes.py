@@ -0,0 +1,16 @@
+"""GET /changes delta feed"""
+
+
+def test_lesson_exceptions_are_synced(client, seed):
+    seed(1)
+    cursor = client.get('/api/changes').get_json()['cursor']
+
+    assert client.put('/api/recurring-lessons/1/exceptions/2025-01-13', json={'cancelled': True}).status_code == 200
+    feed = client.get('/api/changes', query_string={'since': cursor}).get_json()
+    (exception,) = feed['changes']['recurring_lesson_exceptions']
+    assert (exception['lesson_id'], exception['date'], exception['cancelled']) == (1, '2025-01-13', True)
+
+    assert client.delete('/api/recurring-lessons/1/exceptions/2025-01-13').status_code == 200
+    feed = client.get('/api/changes', query_string={'since': cursor}).get_json()
+    assert feed['changes']['recurring_lesson_exceptions'] == []
+    assert feed['deleted']['recurring_lesson_exceptions'] == [exception['id']]
@@ -0,0 +1,68 @@
+"""Conditional GETs from table versions"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+from werkzeug.http import http_date
+
+from models import db, Rider, TableVersion
+
+
+def _age_versions(seconds):
+    db.session.execute(update(TableVersion).values(updated_at=datetime.utcnow() - timedelta(seconds=seconds)))
+    db.session.commit()
+
+
+def test_etag_round_trip(client, seed):
+    seed(2)
+    first = client.get('/api/riders')
+    assert client.get('/api/riders', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    db.session.add(Rider(name='New'))
+    db.session.commit()
+    assert client.get('/api/riders', headers={'If-None-Match': first.headers['ETag']}).status_code == 200
+
+
+def test_api_write_bumps_the_etag(client, seed):
+    seed(2)
+    first = client.get('/api/horses')
+    assert client.get('/api/horses', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    assert client.post('/api/horses', json={'name': 'New'}).status_code == 201
+    second = client.get('/api/horses', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert client.get('/api/horses', headers={'If-None-Match': second.headers['ETag']}).status_code == 304
+
+
+def test_bulk_insert_bumps_the_schedule_etag(client, seed):
+    seed(2)
+    window = {'start_date': '2025-01-13', 'end_date': '2025-01-19'}
+    first = client.get('/api/schedule')
+    assert client.post('/api/recurring-lessons/occurrences/materialize', json=window).status_code == 201
+    response = client.get('/api/schedule', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+    assert len(response.get_json()) == 4
+
+
+def test_no_last_modified_within_the_second_of_a_write(client, seed):
+    seed(2)
+    assert 'Last-Modified' not in client.get('/api/riders').headers
+
+
+def test_if_modified_since_answers_304_for_settled_data(client, seed):
+    seed(2)
+    _age_versions(5)
+    last_modified = client.get('/api/riders').headers['Last-Modified']
+    assert client.get('/api/riders', headers={'If-Modified-Since': last_modified}).status_code == 304
+
+
+def test_if_modified_since_sees_a_write_in_the_same_second(client, seed):
+    seed(2)
+    since = http_date(datetime.now(timezone.utc).replace(microsecond=0))
+    # Stamped within the second `since` names: equal once truncated to an HTTP date
+    db.session.add(Rider(name='New'))
+    db.session.commit()
+
+    response = client.get('/api/riders', headers={'If-Modified-Since': since})
+    assert response.status_code == 200
+    assert len(response.get_json()) == 3
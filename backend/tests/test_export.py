@@ -0,0 +1,36 @@
+"""GET /export/<data_type> in every format"""
+import csv
+import io
+import json
+
+import pytest
+
+
+def test_formats_carry_the_same_rows(client, seed):
+    seed(3)
+    as_json = client.get('/api/export/schedule').get_json()
+
+    response = client.get('/api/export/schedule', query_string={'format': 'ndjson'})
+    assert response.mimetype == 'application/x-ndjson'
+    as_ndjson = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    response = client.get('/api/export/schedule', query_string={'format': 'csv'})
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'] == 'attachment; filename=schedule.csv'
+    as_csv = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+    assert [r['id'] for r in as_json] == [r['id'] for r in as_ndjson] == [1, 2, 3]
+    assert [r['id'] for r in as_csv] == ['1', '2', '3']
+    assert [r['rider_name'] for r in as_csv] == [r['rider_name'] for r in as_json] == ['Rider 0', 'Rider 1', 'Rider 2']
+
+
+def test_schedule_export_honours_the_dates(client, seed):
+    seed(3)
+    rows = client.get('/api/export/schedule', query_string={'format': 'ndjson', 'end_date': '2025-01-05'})
+    assert rows.get_data(as_text=True) == ''
+
+
+@pytest.mark.parametrize('url', ['/api/export/schedule?format=xml', '/api/export/unknown',
+                                 '/api/export/schedule?start_date=soon'])
+def test_bad_requests(client, url):
+    assert client.get(url).status_code == 400
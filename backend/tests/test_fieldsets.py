@@ -0,0 +1,76 @@
+"""?fields= sparse fieldsets and response compression"""
+import gzip
+import json
+
+import pytest
+from sqlalchemy import event
+
+from models import db
+
+
+def _project(rows, fields):
+    return [{key: row[key] for key in fields} for row in rows]
+
+
+@pytest.mark.parametrize('url, fields', [
+    ('/api/riders', ['id', 'name']),
+    ('/api/horses', ['name', 'id']),
+    ('/api/recurring-lessons', ['id', 'rider_name', 'time']),
+    ('/api/schedule', ['start_time', 'horse_name', 'id']),
+])
+def test_fields_project_the_full_listing(client, seed, url, fields):
+    seed(3)
+    full = client.get(url).get_json()
+    response = client.get(url, query_string={'fields': ','.join(fields)})
+    assert response.status_code == 200
+    assert response.get_json() == _project(full, fields)
+
+
+def test_fields_on_paginated_and_detail_reads(client, seed):
+    seed(3)
+    page = client.get('/api/schedule', query_string={'fields': 'id,end_time', 'limit': 2}).get_json()
+    assert [sorted(item) for item in page['items']] == [['end_time', 'id']] * 2
+    assert page['next_cursor']
+
+    item = client.get('/api/schedule/1', query_string={'fields': 'rider_name'}).get_json()
+    assert item == {'rider_name': 'Rider 0'}
+
+
+def test_unrequested_names_are_not_joined(client, seed):
+    seed(3)
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        assert client.get('/api/schedule', query_string={'fields': 'id,start_time'}).status_code == 200
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    listing = [s for s in statements if 'FROM schedule' in s]
+    assert listing and not any('JOIN' in s or 'riders' in s for s in listing)
+
+
+@pytest.mark.parametrize('url', [
+    '/api/riders', '/api/riders/1', '/api/horses', '/api/horses/1',
+    '/api/recurring-lessons', '/api/recurring-lessons/1', '/api/schedule', '/api/schedule/1',
+])
+@pytest.mark.parametrize('fields', ['id,colour', ' , '])
+def test_unknown_or_empty_fields_are_rejected(client, seed, url, fields):
+    seed(1)
+    response = client.get(url, query_string={'fields': fields})
+    assert response.status_code == 400
+    assert 'available: ' in response.get_json()['error']
+
+
+def test_large_responses_are_gzipped_on_request(client, seed):
+    seed(30)
+    plain = client.get('/api/schedule')
+    assert 'Content-Encoding' not in plain.headers
+
+    response = client.get('/api/schedule', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.get_data())) == plain.get_json()
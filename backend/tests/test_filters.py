@@ -0,0 +1,52 @@
+"""Server-side list filters"""
+import pytest
+
+from models import db, Horse, RecurringLesson, Rider
+
+
+@pytest.fixture
+def mixed(seed):
+    # 4 riders/horses/lessons (monday..thursday); the second of each inactive, horse 3 owned by rider 1
+    seed(4)
+    for model in (Rider, Horse, RecurringLesson):
+        db.session.get(model, 2).active = False
+    db.session.get(Horse, 3).owner_id = 1
+    db.session.get(RecurringLesson, 4).lesson_type = 'group'
+    db.session.commit()
+
+
+@pytest.mark.parametrize('url, ids', [
+    ('/api/riders?active=true', [1, 3, 4]),
+    ('/api/riders?active=0', [2]),
+    ('/api/horses?active=yes', [1, 3, 4]),
+    ('/api/horses?owner_id=1', [3]),
+    ('/api/horses?owner_id=1&active=false', []),
+    ('/api/recurring-lessons?active=true', [1, 3, 4]),
+    ('/api/recurring-lessons?day=Monday', [1]),
+    ('/api/recurring-lessons?lesson_type=group', [4]),
+    ('/api/recurring-lessons?lesson_type=private&active=false', [2]),
+])
+def test_filters_narrow_the_listing(client, mixed, url, ids):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert sorted(row['id'] for row in response.get_json()) == ids
+
+
+def test_filters_combine_with_pagination(client, mixed):
+    page = client.get('/api/riders?active=true&limit=2').get_json()
+    assert [row['id'] for row in page['items']] == [1, 3]
+    rest = client.get('/api/riders', query_string={'active': 'true', 'limit': 2, 'after': page['next_cursor']})
+    assert [row['id'] for row in rest.get_json()['items']] == [4]
+
+
+@pytest.mark.parametrize('url, error', [
+    ('/api/riders?active=maybe', 'active must be true or false'),
+    ('/api/horses?owner_id=first', 'owner_id must be an integer'),
+    ('/api/horses?active=', 'active must be true or false'),
+    ('/api/recurring-lessons?day=someday', 'day must be one of'),
+    ('/api/recurring-lessons?lesson_type=%20', 'lesson_type must not be empty'),
+])
+def test_bad_filter_values_return_400(client, mixed, url, error):
+    response = client.get(url)
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith(error)
@@ -0,0 +1,52 @@
+"""Schedule and recurring lesson listings load rider/horse names without N+1 queries"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Horse, Rider, Schedule
+
+LISTINGS = [
+    '/api/schedule',
+    '/api/schedule?start_date=2025-01-01&end_date=2025-12-31',
+    '/api/schedule/rider?rider_id=1',
+    '/api/schedule/horse?horse_id=1',
+    '/api/recurring-lessons',
+]
+
+
+def _book_rider_and_horse_one(n):
+    """n sessions for rider 1 with distinct horses and n for horse 1 with distinct riders"""
+    start = datetime(2025, 3, 3, 8)
+    for i in range(n):
+        horse, rider = Horse(name=f'Extra horse {i}'), Rider(name=f'Extra rider {i}')
+        db.session.add_all([horse, rider])
+        db.session.flush()
+        at = start + timedelta(days=i)
+        db.session.add_all([
+            Schedule(rider_id=1, horse_id=horse.id, start_time=at, end_time=at + timedelta(hours=1)),
+            Schedule(rider_id=rider.id, horse_id=1, start_time=at + timedelta(hours=2), end_time=at + timedelta(hours=3)),
+        ])
+    db.session.commit()
+
+
+@pytest.mark.parametrize('url', LISTINGS)
+def test_statement_count_is_independent_of_row_count(client, seed, count_statements, url):
+    seed(3)
+    small, small_count = count_statements(lambda: client.get(url))
+    seed(30)
+    _book_rider_and_horse_one(30)
+    # The writes moved the table versions, so neither the ETag nor the payload cache short-circuits
+    large, large_count = count_statements(lambda: client.get(url))
+
+    assert small.status_code == large.status_code == 200
+    assert len(large.get_json()) > len(small.get_json())
+    assert small_count == large_count
+
+
+def test_listings_include_names(client, seed):
+    seed(2)
+    sessions = client.get('/api/schedule').get_json()
+    assert {s['rider_name'] for s in sessions} == {'Rider 0', 'Rider 1'}
+    assert {s['horse_name'] for s in sessions} == {'Horse 0', 'Horse 1'}
+    lessons = client.get('/api/recurring-lessons').get_json()
+    assert {l['rider_name'] for l in lessons} == {'Rider 0', 'Rider 1'}
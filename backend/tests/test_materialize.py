@@ -0,0 +1,95 @@
+"""Recurring lesson occurrences, exceptions and materialization"""
+import pytest
+
+from models import Schedule
+
+WEEK = {'start_date': '2025-01-06', 'end_date': '2025-01-12'}
+NEXT_WEEK = {'start_date': '2025-01-13', 'end_date': '2025-01-19'}
+
+
+def _materialize(client, window=NEXT_WEEK, **options):
+    return client.post('/api/recurring-lessons/occurrences/materialize', json={**window, **options})
+
+
+def test_free_occurrences_materialize_once(client, seed):
+    seed(1)
+    response = _materialize(client)
+    assert response.status_code == 201
+    assert response.get_json() == {'created': 1, 'skipped': 0, 'conflicts': []}
+
+    assert _materialize(client).get_json() == {'created': 0, 'skipped': 1, 'conflicts': []}
+    assert Schedule.query.filter(Schedule.lesson_id == 1).count() == 1
+
+
+def test_conflicting_occurrence_blocks_materialize(client, seed):
+    # Rider 0 / Horse 0 already have an unlinked session on Monday 08:00, when their lesson is due
+    seed(1)
+    response = _materialize(client, WEEK)
+
+    assert response.status_code == 409
+    body = response.get_json()
+    assert len(body['conflicts']) == 1
+    assert body['conflicts'][0]['occurrence']['start_time'] == '2025-01-06T08:00:00'
+    assert body['conflicts'][0]['conflicts'][0]['id'] == 1
+    assert Schedule.query.count() == 1
+
+
+def test_allow_conflicts_materializes_and_reports(client, seed):
+    seed(1)
+    response = _materialize(client, WEEK, allow_conflicts=True)
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['created'] == 1
+    assert len(body['conflicts']) == 1
+    assert Schedule.query.count() == 2
+
+
+def test_time_override_after_materializing_creates_no_duplicate(client, seed):
+    seed(1)
+    _materialize(client)
+    response = client.put('/api/recurring-lessons/1/exceptions/2025-01-13', json={'time': '15:00'})
+    assert response.status_code == 200
+
+    occurrences = client.get('/api/recurring-lessons/occurrences', query_string=NEXT_WEEK).get_json()
+    assert [(o['start_time'], o['materialized']) for o in occurrences] == [('2025-01-13T15:00:00', True)]
+    assert _materialize(client).get_json() == {'created': 0, 'skipped': 1, 'conflicts': []}
+    assert Schedule.query.filter(Schedule.lesson_id == 1).count() == 1
+
+    # The calendar derives the flags from the sessions it already loaded
+    calendar = client.get('/api/calendar', query_string=NEXT_WEEK).get_json()
+    assert calendar['occurrences'] == occurrences
+
+
+def test_override_changes_the_occurrence(client, seed):
+    seed(2)
+    response = client.put('/api/recurring-lessons/1/exceptions/2025-01-13',
+                          json={'time': '09:30', 'duration': 30, 'horse_id': 2})
+    assert response.status_code == 200
+
+    (occurrence,) = [o for o in client.get('/api/recurring-lessons/occurrences', query_string=NEXT_WEEK).get_json()
+                     if o['lesson_id'] == 1]
+    assert (occurrence['start_time'], occurrence['end_time']) == ('2025-01-13T09:30:00', '2025-01-13T10:00:00')
+    assert (occurrence['horse_id'], occurrence['horse_name'], occurrence['overridden']) == (2, 'Horse 1', True)
+
+
+@pytest.mark.parametrize('body', [
+    {'time': '9h'},
+    {'duration': 'abc'},
+    {'duration': '30'},
+    {'duration': 0},
+    {'duration': True},
+    {'horse_id': 99},
+    {'horse_id': '1'},
+])
+def test_invalid_overrides_are_rejected(client, seed, body):
+    seed(1)
+    response = client.put('/api/recurring-lessons/1/exceptions/2025-01-13', json=body)
+    assert response.status_code == 400
+    assert client.get('/api/recurring-lessons/1/exceptions').get_json() == []
+    assert client.get('/api/recurring-lessons/occurrences', query_string=NEXT_WEEK).status_code == 200
+
+
+def test_invalid_date_is_rejected(client, seed):
+    seed(1)
+    assert client.put('/api/recurring-lessons/1/exceptions/13-01-2025', json={'cancelled': True}).status_code == 400
@@ -0,0 +1,42 @@
+"""Prometheus scrape after ordinary requests"""
+from prometheus_client.parser import text_string_to_metric_families
+
+
+def _scrape(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.get_data(as_text=True))
+        for sample in family.samples
+    }
+
+
+def _sample(samples, name, **labels):
+    return samples.get((name, tuple(sorted(labels.items()))), 0)
+
+
+def test_request_is_counted_and_timed(client, seed):
+    seed(2)
+    route = {'method': 'GET', 'route': '/api/riders'}
+    before = _scrape(client)
+    assert client.get('/api/riders').status_code == 200
+    after = _scrape(client)
+
+    assert _sample(after, 'http_requests_total', status='200', **route) == \
+        _sample(before, 'http_requests_total', status='200', **route) + 1
+    assert _sample(after, 'http_request_duration_seconds_count', **route) == \
+        _sample(before, 'http_request_duration_seconds_count', **route) + 1
+    assert _sample(after, 'http_request_duration_seconds_bucket', le='+Inf', **route) == \
+        _sample(after, 'http_request_duration_seconds_count', **route)
+    assert _sample(after, 'http_requests_in_progress', **route) == 0
+
+
+def test_scrapes_and_unmatched_routes(client):
+    before = _scrape(client)
+    assert client.get('/api/nowhere').status_code == 404
+    after = _scrape(client)
+
+    unmatched = {'method': 'GET', 'route': '<unmatched>', 'status': '404'}
+    assert _sample(after, 'http_requests_total', **unmatched) == _sample(before, 'http_requests_total', **unmatched) + 1
+    assert not any(dict(labels).get('route') == '/metrics' for _, labels in after)
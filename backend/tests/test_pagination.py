@@ -0,0 +1,40 @@
+"""Keyset pagination of the list endpoints"""
+import pytest
+
+from models import db, Schedule
+
+
+def _pages(client, url, limit):
+    items, cursor, pages = [], None, 0
+    while True:
+        query = {'limit': limit, **({'after': cursor} if cursor else {})}
+        page = client.get(url, query_string=query).get_json()
+        items += page['items']
+        pages += 1
+        cursor = page['next_cursor']
+        if cursor is None:
+            return items, pages
+
+
+@pytest.mark.parametrize('url', ['/api/riders', '/api/horses', '/api/recurring-lessons', '/api/schedule'])
+def test_pages_cover_the_listing_once(client, seed, url):
+    seed(5)
+    items, pages = _pages(client, url, limit=2)
+    assert pages == 3
+    assert [i['id'] for i in items] == [i['id'] for i in client.get(url).get_json()]
+
+
+def test_schedule_pages_break_start_time_ties_by_id(client, seed):
+    first = seed(3)[0]
+    db.session.add(Schedule(rider_id=2, horse_id=2, start_time=first.start_time, end_time=first.end_time))
+    db.session.commit()
+    items, _ = _pages(client, '/api/schedule', limit=1)
+    assert len({i['id'] for i in items}) == len(items) == 4
+
+
+@pytest.mark.parametrize('query', [{'after': 'not-a-cursor'}, {'after': 'WzFd'}, {'limit': 'x'}, {'limit': 0}])
+def test_malformed_page_arguments_are_rejected(client, seed, query):
+    seed(1)
+    response = client.get('/api/schedule', query_string=query)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
@@ -0,0 +1,92 @@
+"""The hot access paths and list filters use their indexes (SQLite EXPLAIN QUERY PLAN)"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, text
+
+from models import db, Schedule
+
+
+def _query_plans(fn, table='schedule'):
+    """EXPLAIN QUERY PLAN detail lines of every SELECT from table that fn() executes"""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and f'FROM {table}' in statement:
+            captured.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert captured, f'no {table} query was executed'
+    with db.engine.connect() as conn:
+        return [
+            ' | '.join(row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters))
+            for statement, parameters in captured
+        ]
+
+
+@pytest.mark.parametrize('url, index', [
+    ('/api/schedule?start_date=2025-01-06&end_date=2025-01-12', 'ix_schedule_start_time'),
+    ('/api/schedule/rider?rider_id=1&start_date=2025-01-06', 'ix_schedule_rider_start'),
+    ('/api/schedule/horse?horse_id=1&start_date=2025-01-06', 'ix_schedule_horse_start'),
+])
+def test_schedule_reads_use_their_index(client, seed, url, index):
+    seed(20)
+    plans = _query_plans(lambda: client.get(url))
+    assert all(f'USING INDEX {index}' in plan for plan in plans), plans
+
+
+def test_status_window_uses_status_index(app, seed):
+    seed(20)
+    plans = _query_plans(lambda: Schedule.query.filter(
+        Schedule.status == 'completed',
+        Schedule.start_time >= datetime(2025, 1, 6),
+        Schedule.start_time < datetime(2025, 1, 13)
+    ).all())
+    assert all('USING INDEX ix_schedule_status_start' in plan for plan in plans), plans
+
+
+@pytest.mark.parametrize('table, index', [
+    # The (active, id) filter indexes of migration 7 cover these counts
+    ('riders', 'COVERING INDEX ix_riders_active_id'),
+    ('horses', 'COVERING INDEX ix_horses_active_id'),
+    ('recurring_lessons', 'ix_recurring_lessons_active_day_time'),
+])
+def test_active_counts_use_indexes(client, seed, table, index):
+    seed(20)
+    plans = _query_plans(lambda: client.get('/api/statistics'), table)
+    assert all(index in plan for plan in plans), plans
+
+
+@pytest.mark.parametrize('url, table, index', [
+    ('/api/riders?active=true', 'riders', 'ix_riders_active_id'),
+    ('/api/riders?active=true&limit=5', 'riders', 'ix_riders_active_id'),
+    ('/api/horses?active=true', 'horses', 'ix_horses_active_id'),
+    ('/api/horses?active=false&limit=5', 'horses', 'ix_horses_active_id'),
+    ('/api/horses?owner_id=1', 'horses', 'ix_horses_owner_id'),
+    # The partial index holds only active lessons, already in (day, time) order
+    ('/api/recurring-lessons?active=true', 'recurring_lessons', 'ix_recurring_lessons_active_day_time'),
+    ('/api/recurring-lessons?day=monday', 'recurring_lessons', 'ix_recurring_lessons_day_time'),
+    ('/api/recurring-lessons?lesson_type=private&day=monday', 'recurring_lessons', 'ix_recurring_lessons_type_day_time'),
+])
+def test_filtered_listings_use_their_index(client, seed, url, table, index):
+    seed(20)
+    plans = _query_plans(lambda: client.get(url), table)
+    assert all(f'{table} USING INDEX {index}' in plan for plan in plans), plans
+
+
+@pytest.mark.parametrize('table, index', [
+    ('riders', 'ix_riders_active_name'),
+    ('horses', 'ix_horses_active_name'),
+])
+def test_active_lookups_by_name_use_partial_indexes(client, seed, table, index):
+    seed(20)
+    # Without statistics SQLite prefers the (active, id) equality match plus a sort
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+    plans = _query_plans(lambda: client.get('/api/calendar?start_date=2025-01-06&end_date=2025-01-12'), table)
+    assert all(f'USING INDEX {index}' in plan and 'TEMP B-TREE' not in plan for plan in plans), plans
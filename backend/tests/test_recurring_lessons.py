@@ -0,0 +1,34 @@
+"""Recurring lesson writes"""
+
+
+def test_create_from_model_columns(client, seed):
+    seed(1)
+    response = client.post('/api/recurring-lessons', json={
+        'rider_id': 1, 'horse_id': 1, 'day': 'Tuesday', 'time': '17:30', 'duration': 45,
+        'lesson_type': 'group', 'color': '#336699'
+    })
+    assert response.status_code == 201
+    lesson = response.get_json()
+    assert (lesson['day'], lesson['time'], lesson['duration'], lesson['lesson_type']) == ('tuesday', '17:30', 45, 'group')
+    assert lesson['active'] is True
+    assert len(client.get('/api/recurring-lessons').get_json()) == 2
+
+
+def test_create_rejects_bad_input(client, seed):
+    seed(1)
+    valid = {'rider_id': 1, 'day': 'monday', 'time': '10:00', 'duration': 60}
+    assert client.post('/api/recurring-lessons', json={**valid, 'day': 'someday'}).status_code == 400
+    assert client.post('/api/recurring-lessons', json={**valid, 'time': '25:99'}).status_code == 400
+    assert client.post('/api/recurring-lessons', json={**valid, 'time': 1000}).status_code == 400
+    assert client.post('/api/recurring-lessons', json={**valid, 'duration': -5}).status_code == 400
+    assert client.post('/api/recurring-lessons', json={**valid, 'duration': '60'}).status_code == 400
+    assert client.post('/api/recurring-lessons', json={**valid, 'rider_id': None}).status_code == 400
+
+
+def test_update(client, seed):
+    seed(1)
+    response = client.put('/api/recurring-lessons/1', json={'day': 'FRIDAY', 'horse_id': None, 'active': False})
+    assert response.status_code == 200
+    lesson = response.get_json()
+    assert (lesson['day'], lesson['horse_id'], lesson['active']) == ('friday', None, False)
+    assert client.put('/api/recurring-lessons/1', json={'day': 'fri'}).status_code == 400
@@ -0,0 +1,107 @@
+"""Read routing between the primary and read replicas"""
+import shutil
+
+import pytest
+from flask import current_app, g
+from sqlalchemy import select, update
+
+from app import create_app
+from config import Config
+from migrations import run_migrations
+from models import db, Rider
+from replicas import use_primary
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    """App whose replica is a snapshot of the primary in which rider 1 is renamed"""
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+
+    class ReplicaConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{primary}'
+        SQLALCHEMY_REPLICA_URIS = [f'sqlite:///{replica}']
+        PROFILE_REQUESTS = False
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        run_migrations()
+        db.session.add(Rider(name='Primary'))
+        db.session.commit()
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+        shutil.copy(primary, replica)
+        with db.engines['replica_1'].begin() as conn:
+            conn.execute(update(Rider).values(name='Replica'))
+
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def _request(method, path='/api/riders'):
+    return current_app.test_request_context(path, method=method)
+
+
+def _bind(method, statement):
+    """Engine db.session picks for statement, first thing in a request"""
+    with _request(method):
+        return db.session.get_bind(clause=statement)
+
+
+def test_get_selects_go_to_the_replica(replica_app):
+    assert _bind('GET', select(Rider)) is db.engines['replica_1']
+    assert _bind('HEAD', select(Rider)) is db.engines['replica_1']
+
+
+@pytest.mark.parametrize('method', ['POST', 'PUT', 'DELETE'])
+def test_other_methods_read_the_primary(replica_app, method):
+    assert _bind(method, select(Rider)) is db.engine
+
+
+def test_writes_and_the_reads_after_them_use_the_primary(replica_app):
+    with _request('GET'):
+        assert db.session.get_bind(clause=update(Rider).values(name='x')) is db.engine
+        assert db.session.get_bind(clause=select(Rider)) is db.engine
+        db.session.remove()
+
+
+def test_use_primary_keeps_reads_on_the_primary(replica_app):
+    @use_primary
+    def view():
+        return db.session.get_bind(clause=select(Rider))
+
+    with _request('GET', '/api/changes'):
+        assert view() is db.engine
+        assert g.read_primary
+
+
+def test_requests_read_from_the_routed_database(replica_app):
+    client = replica_app.test_client()
+    assert [r['name'] for r in client.get('/api/riders').get_json()] == ['Replica']
+
+    response = client.put('/api/riders/1', json={'name': 'Renamed'})
+    assert response.status_code == 200
+    assert response.get_json()['name'] == 'Renamed'
+    assert db.session.get(Rider, 1).name == 'Renamed'
+
+    # The primary's changes feed, not the stale replica
+    changes = client.get('/api/changes').get_json()
+    assert [r['name'] for r in changes['changes']['riders']] == ['Renamed']
+
+
+def test_unreachable_replica_falls_back_to_the_primary(tmp_path):
+    class DownConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+        SQLALCHEMY_REPLICA_URIS = [f"sqlite:///file:{tmp_path / 'missing' / 'replica.db'}?mode=ro&uri=true"]
+        PROFILE_REQUESTS = False
+
+    app = create_app(DownConfig)
+    with app.app_context():
+        run_migrations()
+        assert _bind('GET', select(Rider)) is db.engine
+        assert app.extensions['replicas'].candidates() == []
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
@@ -0,0 +1,55 @@
+"""Utilization and attendance reports over the daily rollup"""
+from datetime import datetime
+
+import pytest
+
+from models import db, Schedule
+
+
+@pytest.fixture
+def sessions(seed):
+    # Horse 0 / Rider 0 (ids 1): Monday 2025-01-06 08:00 (45 min) and Tuesday 2025-01-14 (60 min);
+    # Horse 1 / Rider 1 (ids 2): Monday 09:00 (45 min) and a cancelled session the next week
+    seed(2)
+    db.session.add_all([
+        Schedule(rider_id=1, horse_id=1, status='scheduled',
+                 start_time=datetime(2025, 1, 14, 10), end_time=datetime(2025, 1, 14, 11)),
+        Schedule(rider_id=2, horse_id=2, status='cancelled',
+                 start_time=datetime(2025, 1, 15, 10), end_time=datetime(2025, 1, 15, 11)),
+    ])
+    db.session.commit()
+
+
+def test_weekly_utilization_series(client, sessions):
+    response = client.get('/api/reports/utilization', query_string={
+        'bucket': 'week', 'start_date': '2025-01-08', 'end_date': '2025-01-19'
+    })
+    assert response.status_code == 200
+    report = response.get_json()
+    # Buckets start on Mondays; the range starts mid-week
+    assert report['buckets'] == ['2025-01-06', '2025-01-13']
+    assert [(h['id'], h['name'], h['sessions'], h['minutes']) for h in report['horses']] == [
+        (1, 'Horse 0', [0, 1], [0, 60])
+    ]
+
+
+def test_daily_and_monthly_buckets(client, sessions):
+    window = {'start_date': '2025-01-06', 'end_date': '2025-01-31'}
+    daily = client.get('/api/reports/utilization', query_string={**window, 'bucket': 'day'}).get_json()
+    assert len(daily['buckets']) == 26
+    assert [(r['id'], sum(r['sessions']), sum(r['minutes'])) for r in daily['riders']] == [(1, 2, 105), (2, 1, 45)]
+
+    monthly = client.get('/api/reports/utilization', query_string={**window, 'bucket': 'month'}).get_json()
+    assert monthly['buckets'] == ['2025-01-01']
+    assert [(h['id'], h['sessions']) for h in monthly['horses']] == [(1, [2]), (2, [1])]
+
+
+def test_totals_without_bucket(client, sessions):
+    report = client.get('/api/reports/utilization').get_json()
+    assert report['horses'] == [{'name': 'Horse 0', 'sessions': 2}, {'name': 'Horse 1', 'sessions': 2}]
+
+
+@pytest.mark.parametrize('query', [{'bucket': 'year', 'start_date': '2025-01-01', 'end_date': '2025-02-01'},
+                                   {'bucket': 'week', 'start_date': '2025-01-01'}])
+def test_bad_utilization_requests(client, query):
+    assert client.get('/api/reports/utilization', query_string=query).status_code == 400
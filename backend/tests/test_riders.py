@@ -0,0 +1,23 @@
+"""Rider writes and the cached listing"""
+from cache import payload_cache
+
+
+def test_create_invalidates_cached_listing(client, seed):
+    seed(2)
+    assert len(client.get('/api/riders').get_json()) == 2
+    generation = payload_cache.shared.get_int('gen:riders')
+
+    response = client.post('/api/riders', json={'name': 'New rider', 'email': 'new@example.com', 'level': 'ignored'})
+    assert response.status_code == 201
+    assert response.get_json()['name'] == 'New rider'
+
+    assert payload_cache.shared.get_int('gen:riders') == generation + 1
+    assert 'New rider' in {r['name'] for r in client.get('/api/riders').get_json()}
+
+
+def test_update_invalidates_cached_listing(client, seed):
+    seed(1)
+    client.get('/api/riders')
+    response = client.put('/api/riders/1', json={'name': 'Renamed', 'level': 'ignored'})
+    assert response.status_code == 200
+    assert [r['name'] for r in client.get('/api/riders').get_json()] == ['Renamed']
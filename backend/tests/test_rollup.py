@@ -0,0 +1,39 @@
+"""Rollup upserts on every supported dialect"""
+from datetime import date
+
+import pytest
+from sqlalchemy.dialects import mysql
+
+from models import db, ScheduleDailyStat
+from rollup import _update_then_insert, _upsert, apply_deltas
+
+KEY = (date(2025, 1, 6), 1, 2, 'scheduled')
+
+
+def _stats():
+    return {(s.date, s.rider_id, s.horse_id, s.status): (s.session_count, s.minutes)
+            for s in ScheduleDailyStat.query}
+
+
+@pytest.mark.parametrize('dialect', ['mysql', 'mariadb'])
+def test_mysql_upsert_adds_on_duplicate_key(dialect):
+    sql = str(_upsert(dialect, ScheduleDailyStat.__table__).compile(dialect=mysql.dialect()))
+    assert 'ON DUPLICATE KEY UPDATE' in sql
+    assert 'session_count = (schedule_daily_stats.session_count + ' in sql
+
+
+def test_unknown_dialect_falls_back_to_update_then_insert(app):
+    assert _upsert('mssql', ScheduleDailyStat.__table__) is None
+    table = ScheduleDailyStat.__table__
+    row = dict(zip(('date', 'rider_id', 'horse_id', 'status'), KEY), session_count=1, minutes=45)
+    with db.engine.begin() as conn:
+        _update_then_insert(conn, table, [row])
+        _update_then_insert(conn, table, [{**row, 'session_count': 2, 'minutes': 90}])
+    assert _stats() == {KEY: (3, 135)}
+
+
+def test_native_upsert_accumulates(app):
+    with db.engine.begin() as conn:
+        apply_deltas(conn, {KEY: (1, 45)})
+        apply_deltas(conn, {KEY: (-1, -45), (date(2025, 1, 7), 0, 0, ''): (1, 60)})
+    assert _stats() == {KEY: (0, 0), (date(2025, 1, 7), 0, 0, ''): (1, 60)}
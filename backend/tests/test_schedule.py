@@ -0,0 +1,80 @@
+"""Single schedule writes and the double-booking report"""
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, Schedule
+
+
+def _book(client, **fields):
+    body = {'rider_id': 1, 'horse_id': 1, 'start_time': '2025-01-06T08:30:00', 'end_time': '2025-01-06T09:30:00'}
+    return client.post('/api/schedule', json={**body, **fields})
+
+
+@pytest.mark.parametrize('fields', [{}, {'rider_id': 2}, {'horse_id': 2}])
+def test_overlapping_booking_is_refused(client, seed, fields):
+    # Session 1: Rider 0 (id 1) on Horse 0 (id 1), 2025-01-06 08:00-08:45
+    seed(2)
+    response = _book(client, start_time='2025-01-06T08:30:00', end_time='2025-01-06T08:50:00', **fields)
+    assert response.status_code == 409
+    assert [c['id'] for c in response.get_json()['conflicts']] == [1]
+    assert Schedule.query.count() == 2
+
+
+def test_adjacent_other_or_cancelled_bookings_do_not_conflict(client, seed):
+    seed(2)
+    assert _book(client, start_time='2025-01-06T08:45:00', end_time='2025-01-06T09:00:00').status_code == 201
+    assert _book(client, rider_id=2, horse_id=2, start_time='2025-01-06T10:00:00', end_time='2025-01-06T11:00:00').status_code == 201
+    assert _book(client, status='cancelled').status_code == 201
+
+
+def test_allow_conflicts_saves_and_reports(client, seed):
+    seed(1)
+    response = _book(client, allow_conflicts=True)
+    assert response.status_code == 201
+    assert [c['id'] for c in response.get_json()['conflicts']] == [1]
+
+
+def test_invalid_interval_is_refused(client, seed):
+    seed(1)
+    assert _book(client, end_time='2025-01-06T08:30:00').status_code == 400
+    assert _book(client, end_time='2025-01-07T08:30:00').status_code == 400
+
+
+def test_update_into_a_conflict_is_refused_without_flushing(client, seed):
+    # Session 2 (Rider 1 / Horse 1) 09:00-09:45 moved onto Horse 0 at 08:00
+    seed(2)
+    flushes = []
+
+    def count(session, flush_context):
+        flushes.append(session)
+
+    event.listen(Session, 'after_flush', count)
+    try:
+        response = client.put('/api/schedule/2', json={'horse_id': 1, 'start_time': '2025-01-06T08:15:00'})
+    finally:
+        event.remove(Session, 'after_flush', count)
+
+    assert response.status_code == 409
+    assert flushes == []
+    session = db.session.get(Schedule, 2)
+    assert (session.horse_id, session.start_time.isoformat()) == (2, '2025-01-06T09:00:00')
+
+
+def test_update_does_not_conflict_with_itself(client, seed):
+    seed(1)
+    response = client.put('/api/schedule/1', json={'end_time': '2025-01-06T09:00:00'})
+    assert response.status_code == 200
+    assert response.get_json()['end_time'] == '2025-01-06T09:00:00'
+
+
+def test_conflicts_report(client, seed):
+    seed(2)
+    _book(client, rider_id=2, end_time='2025-01-06T08:50:00', allow_conflicts=True)
+    _book(client, horse_id=2, start_time='2025-01-07T10:00:00', end_time='2025-01-07T11:00:00')
+
+    response = client.get('/api/schedule/conflicts', query_string={'start_date': '2025-01-06', 'end_date': '2025-01-12'})
+    assert response.status_code == 200
+    report = response.get_json()
+    assert [(c['resource'], c['resource_id'], [s['id'] for s in c['sessions']]) for c in report] == [('horse', 1, [1, 3])]
+    assert client.get('/api/schedule/conflicts', query_string={'start_date': '2025-01-06'}).status_code == 400
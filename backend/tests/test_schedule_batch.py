@@ -0,0 +1,37 @@
+"""POST /schedule/batch"""
+from models import Schedule
+
+
+def _batch(client, operations):
+    return client.post('/api/schedule/batch', json={'operations': operations})
+
+
+def test_delete_and_create_reusing_the_id(client, seed):
+    # Deleting the highest id lets SQLite give it to the session created in the same batch
+    seed(1)
+    response = _batch(client, [
+        {'op': 'delete', 'id': 1},
+        {'op': 'create', 'rider_id': 1, 'horse_id': 1,
+         'start_time': '2025-02-03T10:00:00', 'end_time': '2025-02-03T11:00:00'},
+    ])
+
+    assert response.status_code == 200
+    deleted, created = response.get_json()['results']
+    assert deleted == {'index': 0, 'op': 'delete', 'status': 'deleted', 'id': 1}
+    assert created['status'] == 'created'
+    assert created['session']['start_time'] == '2025-02-03T10:00:00'
+    assert Schedule.query.count() == 1
+
+
+def test_reused_id_stays_live_in_the_changes_feed(client, seed):
+    seed(1)
+    cursor = client.get('/api/changes').get_json()['cursor']
+    _batch(client, [
+        {'op': 'delete', 'id': 1},
+        {'op': 'create', 'rider_id': 1, 'horse_id': 1,
+         'start_time': '2025-02-03T10:00:00', 'end_time': '2025-02-03T11:00:00'},
+    ])
+
+    feed = client.get('/api/changes', query_string={'since': cursor}).get_json()
+    assert [(s['id'], s['start_time']) for s in feed['changes']['schedule']] == [(1, '2025-02-03T10:00:00')]
+    assert feed['deleted']['schedule'] == []
@@ -0,0 +1,21 @@
+"""Ranked rider search"""
+import search
+from models import db, Rider
+from search import find
+
+
+def test_best_match_beyond_the_candidate_cap_is_found(app, monkeypatch):
+    monkeypatch.setattr(search, 'RANK_CANDIDATES', 10)
+    # Weaker matches (long documents) fill the first rowids; the best one comes last
+    db.session.add_all([Rider(name=f'Martin Longname Filler Words {i}', email=f'filler{i}@example.com')
+                        for i in range(30)])
+    db.session.add(Rider(name='Martin'))
+    db.session.commit()
+
+    assert [r.name for r in find(Rider, 'martin', limit=1)] == ['Martin']
+
+
+def test_prefix_and_accents(app):
+    db.session.add_all([Rider(name='Hélène Dubois'), Rider(name='Henri Martin')])
+    db.session.commit()
+    assert [r.name for r in find(Rider, 'hele', mode='prefix')] == ['Hélène Dubois']
@@ -0,0 +1,56 @@
+"""Free-slot computation"""
+from datetime import date, datetime
+
+from slots import align, merge, subtract
+
+
+def at(hhmm):
+    hours, minutes = map(int, hhmm.split(':'))
+    return datetime(2025, 1, 6, hours, minutes)
+
+
+def span(start, end):
+    return at(start), at(end)
+
+
+def test_merge_joins_overlapping_and_touching_intervals():
+    assert merge([span('10:00', '11:00'), span('08:00', '09:00'), span('09:00', '09:30'), span('08:30', '08:45')]) == [
+        span('08:00', '09:30'), span('10:00', '11:00')
+    ]
+
+
+def test_subtract_adjacent_busy_intervals_leave_no_gap_between_them():
+    windows = [span('08:00', '12:00')]
+    busy = [span('09:00', '10:00'), span('10:00', '11:00')]
+    assert subtract(windows, busy) == [span('08:00', '09:00'), span('11:00', '12:00')]
+
+
+def test_subtract_overlapping_and_nested_busy_intervals():
+    windows = [span('08:00', '12:00')]
+    busy = [span('08:30', '09:30'), span('09:00', '10:00'), span('09:15', '09:45'), span('11:30', '13:00')]
+    assert subtract(windows, busy) == [span('08:00', '08:30'), span('10:00', '11:30')]
+
+
+def test_subtract_busy_interval_spanning_several_windows():
+    windows = [span('08:00', '09:00'), span('10:00', '11:00'), span('12:00', '13:00')]
+    busy = [span('07:00', '07:30'), span('08:30', '10:30')]
+    assert subtract(windows, busy) == [span('08:00', '08:30'), span('10:30', '11:00'), span('12:00', '13:00')]
+
+
+def test_align_snaps_inward_and_drops_short_gaps():
+    gaps = [span('08:05', '09:10'), span('10:00', '10:20')]
+    assert align(gaps, 15) == [span('08:15', '09:00'), span('10:00', '10:15')]
+    assert align(gaps, 15, duration=60) == []
+
+
+def test_free_slots_endpoint(client, seed):
+    # Session 1: Horse 0 (id 1), Monday 2025-01-06 08:00-08:45; its weekly lesson is on Mondays 08:00 too
+    seed(1)
+    client.put('/api/availability/monday', json={'slots': [{'start': '08:00', 'end': '12:00'}]})
+    response = client.get('/api/slots/free', query_string={
+        'start_date': '2025-01-06', 'end_date': '2025-01-06', 'duration': 60, 'horse_id': 1
+    })
+    assert response.status_code == 200
+    assert response.get_json() == [
+        {'date': '2025-01-06', 'start': '2025-01-06T09:00:00', 'end': '2025-01-06T12:00:00', 'minutes': 180}
+    ]
@@ -0,0 +1,28 @@
+"""Change events pushed to /stream subscribers"""
+import pytest
+from stream import broker
+
+
+@pytest.fixture
+def events(app):
+    received = []
+    broker.subscribe(received.append)
+    yield received
+    broker.unsubscribe(received.append)
+
+
+def test_lesson_exception_writes_are_published(client, seed, events):
+    seed(1)
+    events.clear()
+
+    client.put('/api/recurring-lessons/1/exceptions/2025-01-13', json={'cancelled': True})
+    client.put('/api/recurring-lessons/1/exceptions/2025-01-13', json={'time': '11:00'})
+    client.delete('/api/recurring-lessons/1/exceptions/2025-01-13')
+    assert events == [{'tables': ['recurring_lesson_exceptions']}] * 3
+
+
+def test_rolled_back_writes_are_not_published(client, seed, events):
+    seed(1)
+    events.clear()
+    assert client.put('/api/recurring-lessons/1/exceptions/2025-01-13', json={'time': 'noon'}).status_code == 400
+    assert events == []
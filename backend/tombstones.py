@@ -0,0 +1,49 @@
+"""
+Deletion log
+Hard deletes of rows served by the changes feed (routes/changes.py) leave a
+tombstone in deleted_rows, in the same transaction, so clients keeping a
+local mirror learn to drop them. ORM deletes are recorded by a flush
+listener; Core bulk deletes must call record_deletions() themselves.
+"""
+from datetime import datetime
+from sqlalchemy import delete, event, insert
+from sqlalchemy.orm import Session
+from models import DeletedRow, Rider, Horse, RecurringLesson, RecurringLessonException, Availability, Schedule
+
+# Tables whose rows the changes feed carries, in feed order
+SYNCED_MODELS = (Rider, Horse, RecurringLesson, RecurringLessonException, Availability, Schedule)
+SYNCED_TABLES = tuple(model.__tablename__ for model in SYNCED_MODELS)
+
+
+def record_deletions(connection, table, ids):
+    """Write a tombstone per deleted id of table (call after Core bulk deletes)"""
+    if not ids:
+        return
+    now = datetime.utcnow()
+    connection.execute(insert(DeletedRow.__table__), [
+        {'table_name': table, 'row_id': row_id, 'deleted_at': now} for row_id in ids
+    ])
+
+
+def _after_flush(session, flush_context):
+    """Tombstone every synced row deleted by this flush"""
+    deleted = {}
+    for obj in session.deleted:
+        table = getattr(obj, '__tablename__', None)
+        if table in SYNCED_TABLES:
+            deleted.setdefault(table, []).append(obj.id)
+    for table, ids in deleted.items():
+        record_deletions(session.connection(), table, ids)
+
+
+def register_listeners():
+    """Hook tombstone writing into every ORM flush (idempotent)"""
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+
+
+def prune(connection, before):
+    """Drop tombstones older than before; returns how many were removed"""
+    return connection.execute(
+        delete(DeletedRow.__table__).where(DeletedRow.deleted_at < before)
+    ).rowcount
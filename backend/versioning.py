@@ -0,0 +1,120 @@
+"""
+Per-table version counters and conditional GET
+Every ORM write bumps table_versions for the tables it touches (in the same
+transaction). Read endpoints decorated with @conditional derive a weak ETag
+and Last-Modified from those counters and answer a matching
+If-None-Match / If-Modified-Since with 304 before loading any rows.
+
+The ETag is authoritative; If-Modified-Since is only a fallback for clients
+that send no If-None-Match. HTTP dates have one-second resolution, so
+Last-Modified is only sent (and dates only trusted) once the second of the
+last write is over: any later write then lands in a later second.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import g, make_response, request
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from models import (
+    db, TableVersion, Rider, Horse, RecurringLesson, RecurringLessonException, Schedule, Availability
+)
+
+TRACKED_TABLES = tuple(model.__tablename__ for model in (
+    Rider, Horse, RecurringLesson, RecurringLessonException, Schedule, Availability
+))
+
+
+def bump(connection, tables):
+    """Increment the version of each table name (call after Core bulk writes)"""
+    tables = sorted(set(tables))
+    if not tables:
+        return
+    connection.execute(
+        update(TableVersion.__table__)
+        .where(TableVersion.__table__.c.name.in_(tables))
+        .values(version=TableVersion.__table__.c.version + 1, updated_at=datetime.utcnow())
+    )
+
+
+def _after_flush(session, flush_context):
+    """Bump every tracked table touched by this flush"""
+    touched = {
+        obj.__tablename__
+        for collection in (session.new, session.dirty, session.deleted)
+        for obj in collection
+        if getattr(obj, '__tablename__', None) in TRACKED_TABLES
+    }
+    if touched:
+        bump(session.connection(), touched)
+
+
+def register_listeners():
+    """Hook version bumping into every ORM flush (idempotent)"""
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+
+
+def current_versions(session, tables):
+    """({table: version}, newest updated_at) for the given table names"""
+    rows = session.execute(
+        select(TableVersion.name, TableVersion.version, TableVersion.updated_at)
+        .where(TableVersion.name.in_(tables))
+    ).all()
+    versions = {name: version for name, version, _ in rows}
+    stamps = [updated_at for _, _, updated_at in rows if updated_at]
+    return versions, max(stamps) if stamps else None
+
+
+def conditional(*tables, vary=None):
+    """Make a GET view answer conditional requests from table versions
+
+    tables: every table whose contents appear in the response (including
+    joined names, e.g. schedule rows carry rider and horse names).
+    vary: optional callable returning extra state the response depends on.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Read versions before rows: a concurrent write then yields a
+            # stale tag on fresh data (harmless), never the reverse
+            versions, last_modified = current_versions(db.session, tables)
+            fingerprint = '|'.join([
+                request.endpoint or '',
+                request.full_path,
+                ','.join(f'{t}:{versions.get(t, 0)}' for t in tables),
+                vary() if vary else ''
+            ])
+            etag = hashlib.sha1(fingerprint.encode()).hexdigest()[:20]
+            g.etag = etag
+            if last_modified is not None:
+                last_modified = last_modified.replace(microsecond=0)
+                # Another write could still land in this second with the same HTTP date
+                if datetime.utcnow() < last_modified + timedelta(seconds=1):
+                    last_modified = None
+                else:
+                    last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            elif vary is None:
+                # Dates alone cannot capture `vary` state, so only trust them without it
+                since = request.if_modified_since
+                not_modified = since is not None and last_modified is not None and last_modified <= since
+            else:
+                not_modified = False
+
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
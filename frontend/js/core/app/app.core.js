@@ -27,6 +27,7 @@
         this.setupRouting();
         this.loadInitialPage();
         this.setupErrorHandling();
+        this.setupLiveUpdates();
         console.log('Application initialized successfully');
       } catch (error) {
         console.error('Application initialization failed:', error);
@@ -235,11 +236,11 @@
           <h1>Dashboard</h1>
           <div class="dashboard-grid">
             <div class="dashboard-card">
-              <h3>Total Horses</h3>
+              <h3>Active Horses</h3>
               <div class="dashboard-value" id="total-horses">-</div>
             </div>
             <div class="dashboard-card">
-              <h3>Total Riders</h3>
+              <h3>Active Riders</h3>
               <div class="dashboard-value" id="total-riders">-</div>
             </div>
             <div class="dashboard-card">
@@ -313,7 +314,7 @@
               <button class="btn btn-primary" onclick="app.loadSchedule()">Load Schedule</button>
             </div>
           </div>
-          <div id="schedule-calendar"></div>
+          <div id="schedule-calendar" class="schedule-calendar"></div>
         </div>
       `;
     }
@@ -363,36 +364,71 @@
 
     async initializeDashboard() {
       try {
-        const [horses, riders] = await Promise.all([
-          DataService.getHorses(),
-          DataService.getRiders()
-        ]);
-        const horsesEl = document.getElementById('total-horses');
-        const ridersEl = document.getElementById('total-riders');
-        if (horsesEl) horsesEl.textContent = horses.length;
-        if (ridersEl) ridersEl.textContent = riders.length;
-        this.loadDashboardStats();
+        // One /calendar request for the week covers every card
+        this.renderDashboard(await this.loadWeekCalendar(new Date()));
       } catch (error) {
         console.error('Failed to initialize dashboard:', error);
       }
     }
 
-    async loadDashboardStats() {
-      try {
-        const today = Utils.DateUtils.formatDate(new Date());
-        const weekStart = Utils.DateUtils.getStartOfWeek(new Date());
-        const weekEnd = Utils.DateUtils.getEndOfWeek(new Date());
-        const [weekLessons, todaySlots] = await Promise.all([
-          DataService.getSchedule(Utils.DateUtils.formatDate(weekStart), Utils.DateUtils.formatDate(weekEnd)),
-          DataService.getAvailabilityByDay(this.getDayName(new Date()))
-        ]);
-
-        const weekEl = document.getElementById('week-lessons');
-        const slotsEl = document.getElementById('today-slots');
-        if (weekEl) weekEl.textContent = weekLessons.length;
-        if (slotsEl) slotsEl.textContent = todaySlots.filter(s => !s.occupied).length;
-      } catch (error) {
-        console.error('Failed to load dashboard stats:', error);
+    renderDashboard(calendar) {
+      const today = Utils.DateUtils.formatDate(new Date());
+      const todaySlots = calendar.availability[today] || [];
+
+      const horsesEl = document.getElementById('total-horses');
+      const ridersEl = document.getElementById('total-riders');
+      const weekEl = document.getElementById('week-lessons');
+      const slotsEl = document.getElementById('today-slots');
+      if (horsesEl) horsesEl.textContent = calendar.horses.length;
+      if (ridersEl) ridersEl.textContent = calendar.riders.length;
+      if (weekEl) weekEl.textContent = calendar.sessions.length;
+      if (slotsEl) slotsEl.textContent = todaySlots.filter(s => !s.occupied).length;
+    }
+
+    async loadWeekCalendar(date) {
+      const weekStart = Utils.DateUtils.getStartOfWeek(date);
+      const weekEnd = Utils.DateUtils.getEndOfWeek(date);
+      // Kept for live updates (refreshCalendar)
+      this.calendar = await DataService.getCalendar(
+        Utils.DateUtils.formatDate(weekStart),
+        Utils.DateUtils.formatDate(weekEnd)
+      );
+      return this.calendar;
+    }
+
+    setupLiveUpdates() {
+      // Changes pushed by the server; refreshes run one at a time
+      let refreshing = Promise.resolve();
+      Services.LiveUpdates.subscribe(change => {
+        refreshing = refreshing.then(() => this.refreshCalendar(change)).catch(error => {
+          console.error('Failed to refresh calendar:', error);
+        });
+      });
+    }
+
+    async refreshCalendar(change) {
+      const calendar = this.calendar;
+      if (!calendar || !['dashboard', 'schedule'].includes(this.currentPage)) return;
+
+      // Schedule-only changes are patched from the delta feed; availability,
+      // recurring lessons and their exceptions change occurrences, which only the server expands
+      let patched = null;
+      if (change.tables.every(table => table === 'schedule')) {
+        const feed = await DataService.getChanges(calendar.cursor);
+        patched = Services.LiveUpdates.patchCalendar(calendar, feed);
+      }
+      if (this.calendar !== calendar) return;  // page or week changed meanwhile
+      if (patched) {
+        this.calendar = patched;
+      } else {
+        await this.loadWeekCalendar(new Date(calendar.start_date + 'T00:00'));
+      }
+
+      if (this.currentPage === 'dashboard') {
+        this.renderDashboard(this.calendar);
+      } else {
+        const container = document.getElementById('schedule-calendar');
+        if (container) this.renderWeek(container, this.calendar);
       }
     }
 
@@ -426,6 +462,68 @@
       }
     }
 
+    initializeSchedulePage() {
+      const input = document.getElementById('schedule-date');
+      if (input && !input.value) input.value = Utils.DateUtils.formatDate(new Date());
+      this.loadSchedule();
+    }
+
+    async loadSchedule() {
+      const container = document.getElementById('schedule-calendar');
+      if (!container) return;
+      try {
+        const input = document.getElementById('schedule-date');
+        // new Date('YYYY-MM-DD') is UTC midnight, the previous day west of Greenwich: build a local date
+        let reference = new Date();
+        if (input?.value) {
+          const [y, m, d] = input.value.split('-').map(Number);
+          reference = new Date(y, m - 1, d);
+        }
+        const calendar = await this.loadWeekCalendar(reference);
+        this.renderWeek(container, calendar);
+      } catch (error) {
+        Utils.ErrorUtils.showError('Failed to load schedule');
+      }
+    }
+
+    renderWeek(container, calendar) {
+      // Booked sessions plus recurring occurrences that have no session yet
+      const entries = [
+        ...calendar.sessions,
+        ...calendar.occurrences.filter(o => !o.materialized)
+      ].sort((a, b) => a.start_time.localeCompare(b.start_time));
+
+      container.innerHTML = '';
+      Object.keys(calendar.availability).sort().forEach(date => {
+        const day = document.createElement('div');
+        day.className = 'schedule-day';
+        const title = document.createElement('h3');
+        title.textContent = `${this.getDayName(date + 'T00:00')} ${date}`;
+        day.appendChild(title);
+
+        entries.filter(e => e.start_time.startsWith(date)).forEach(e => {
+          const item = document.createElement('div');
+          item.className = e.lesson_id && !e.id ? 'schedule-entry recurring' : 'schedule-entry';
+          item.textContent = [
+            `${e.start_time.slice(11, 16)}-${e.end_time.slice(11, 16)}`,
+            e.rider_name,
+            e.horse_name,
+            e.lesson_type
+          ].filter(Boolean).join(' · ');
+          day.appendChild(item);
+        });
+
+        const free = calendar.availability[date].filter(s => !s.occupied);
+        if (free.length) {
+          const slots = document.createElement('div');
+          slots.className = 'schedule-free';
+          slots.textContent = 'Free: ' + free.map(s => `${s.start}-${s.end}`).join(', ');
+          day.appendChild(slots);
+        }
+        container.appendChild(day);
+      });
+    }
+
     updateNavigation(activePage) {
       document.querySelectorAll('[data-nav]').forEach(nav => {
         nav.classList.remove('active');
@@ -483,12 +581,10 @@
     showAddRiderModal() { console.log('Add rider modal'); }
     showAddLessonModal() { console.log('Add lesson modal'); }
     showEditAvailabilityModal() { console.log('Edit availability modal'); }
-    loadSchedule() { console.log('Load schedule'); }
     loadStatistics() { console.log('Load statistics'); }
     initializeRidersPage() { console.log('Initialize riders page'); }
     initializeLessonsPage() { console.log('Initialize lessons page'); }
     initializeAvailabilityPage() { console.log('Initialize availability page'); }
-    initializeSchedulePage() { console.log('Initialize schedule page'); }
     initializeStatisticsPage() { console.log('Initialize statistics page'); }
     showHorseDetails(horse) { console.log('Show horse details:', horse); }
   }
@@ -52,11 +52,32 @@
     return (h || 0) * 60 + (m || 0);
   };
 
+  // ---------- Pagination ----------
+  const PAGE_SIZE = 200;
+
+  /**
+   * Walk a keyset-paginated list endpoint ({ items, next_cursor })
+   * and return the concatenated items.
+   */
+  const fetchAllPages = async (endpoint, params = {}, pageSize = PAGE_SIZE) => {
+    const items = [];
+    let after = null;
+    do {
+      const page = await Http.get(endpoint, { ...params, limit: pageSize, after });
+      items.push(...page.items);
+      after = page.next_cursor;
+    } while (after);
+    return items;
+  };
+
   // ---------- Facade ----------
   const DataService = {
+    fetchAllPages,
+
     // ============ HORSES ============
-    async getHorses() {
-      const data = await Http.get('/horses');
+    async getHorses(filters = {}) {
+      // filters: { active, owner_id }, applied by the server
+      const data = await fetchAllPages('/horses', filters);
       return data.map(normalizeHorse);
     },
     async getHorse(id) {
@@ -72,20 +93,20 @@
       return await Http.delete(`/horses/${id}`);
     },
     async getActiveHorses() {
-      const list = await this.getHorses();
-      return list.filter(h => h.active);
+      return await this.getHorses({ active: true });
     },
     async getHorsesByOwner(ownerId) {
-      const list = await this.getHorses();
-      return list.filter(h => h.owner_id === ownerId);
+      return await this.getHorses({ owner_id: ownerId });
     },
-    async searchHorses(q) {
-      return await Http.get('/horses/search', { q });
+    async searchHorses(q, { mode = 'fuzzy', limit = null } = {}) {
+      // Ranked, accent-insensitive; mode 'prefix' is meant for autocomplete
+      return await Http.get('/horses/search', { q, mode, limit });
     },
 
     // ============ RIDERS ============
-    async getRiders() {
-      const data = await Http.get('/riders');
+    async getRiders(filters = {}) {
+      // filters: { active }, applied by the server
+      const data = await fetchAllPages('/riders', filters);
       return data.map(normalizeRider);
     },
     async getRider(id) {
@@ -101,19 +122,21 @@
       return await Http.delete(`/riders/${id}`);
     },
     async getActiveRiders() {
-      const list = await this.getRiders();
-      return list.filter(r => r.active);
+      return await this.getRiders({ active: true });
     },
-    async searchRiders(q) {
-      return await Http.get('/riders/search', { q });
+    async searchRiders(q, { mode = 'fuzzy', limit = null } = {}) {
+      // Ranked, accent-insensitive; mode 'prefix' is meant for autocomplete
+      return await Http.get('/riders/search', { q, mode, limit });
     },
 
     // ============ SCHEDULE ============
-    async getSchedule(startDate = null, endDate = null) {
+    async getSchedule(startDate = null, endDate = null, { fields = null } = {}) {
       const params = {};
       if (startDate) params.start_date = startDate;
       if (endDate) params.end_date = endDate;
-      const data = await Http.get('/schedule', params);
+      // e.g. ['id', 'start_time', 'end_time', 'rider_name']: only those keys come back
+      if (fields) params.fields = fields.join(',');
+      const data = await fetchAllPages('/schedule', params);
       return data.map(normalizeSession);
     },
     async getScheduleItem(id) {
@@ -128,28 +151,52 @@
     async deleteScheduleItem(id) {
       return await Http.delete(`/schedule/${id}`);
     },
+    async batchSchedule(operations, { allowConflicts = false } = {}) {
+      // operations: [{ op: 'create'|'update'|'delete', id?, ...fields }], applied all-or-nothing
+      const data = await Http.post('/schedule/batch', { operations, allow_conflicts: allowConflicts });
+      return data.results.map(r => (r.session ? { ...r, session: normalizeSession(r.session) } : r));
+    },
     async getSessionsByDate(date) {
       const schedule = await this.getSchedule(date, date);
       return schedule.filter(s => parseISODateOnly(s.start_time) === date);
     },
+    async getScheduleConflicts(startDate, endDate) {
+      // [{ resource: 'horse'|'rider', resource_id, sessions: [a, b] }]
+      return await Http.get('/schedule/conflicts', { start_date: startDate, end_date: endDate });
+    },
     async getRiderSchedule(riderId, startDate = null, endDate = null) {
       const params = { rider_id: riderId };
       if (startDate) params.start_date = startDate;
       if (endDate) params.end_date = endDate;
-      const data = await Http.get('/schedule/rider', params);
+      const data = await fetchAllPages('/schedule/rider', params);
       return data.map(normalizeSession);
     },
     async getHorseSchedule(horseId, startDate = null, endDate = null) {
       const params = { horse_id: horseId };
       if (startDate) params.start_date = startDate;
       if (endDate) params.end_date = endDate;
-      const data = await Http.get('/schedule/horse', params);
+      const data = await fetchAllPages('/schedule/horse', params);
       return data.map(normalizeSession);
     },
 
+    // ============ CALENDAR ============
+    async getCalendar(startDate, endDate) {
+      // One request for a date window:
+      // { sessions, occurrences, availability: { 'YYYY-MM-DD': [slot] }, riders, horses }
+      // riders/horses are the active ones as { id, name }
+      const data = await Http.get('/calendar', { start_date: startDate, end_date: endDate });
+      return { ...data, sessions: data.sessions.map(normalizeSession) };
+    },
+    async getChanges(since) {
+      // { reset, changes: { table: [row] }, deleted: { table: [id] }, cursor }
+      const data = await Http.get('/changes', { since });
+      return { ...data, changes: { ...data.changes, schedule: data.changes.schedule.map(normalizeSession) } };
+    },
+
     // ============ RECURRING LESSONS ============
-    async getRecurringLessons() {
-      const data = await Http.get('/recurring-lessons');
+    async getRecurringLessons(filters = {}) {
+      // filters: { active, day, lesson_type }, applied by the server
+      const data = await fetchAllPages('/recurring-lessons', filters);
       return data.map(normalizeLesson);
     },
     async getRecurringLesson(id) {
@@ -165,12 +212,10 @@
       return await Http.delete(`/recurring-lessons/${id}`);
     },
     async getActiveRecurringLessons() {
-      const list = await this.getRecurringLessons();
-      return list.filter(l => l.active);
+      return await this.getRecurringLessons({ active: true });
     },
     async getRecurringLessonsByDay(day) {
-      const list = await this.getRecurringLessons();
-      return list.filter(l => l.day === day);
+      return await this.getRecurringLessons({ day });
     },
 
     // ============ AVAILABILITY ============
@@ -185,6 +230,21 @@
     async updateAvailabilityByDay(day, slots) {
       return await Http.put(`/availability/${day}`, { slots });
     },
+    async updateAvailability(week) {
+      // week: { monday: [{ start, end }], ... }; days left out are cleared
+      return await Http.put('/availability', week);
+    },
+    async getFreeSlots(startDate, endDate, duration, { horseId = null, riderId = null, granularity = null } = {}) {
+      // [{ date, start, end, minutes }] gaps long enough for `duration` minutes
+      return await Http.get('/slots/free', {
+        start_date: startDate,
+        end_date: endDate,
+        duration,
+        horse_id: horseId,
+        rider_id: riderId,
+        granularity
+      });
+    },
 
     // ============ STATISTICS ============
     async getStatistics(startDate = null, endDate = null) {
@@ -219,6 +279,10 @@
       if (endDate) params.end_date = endDate;
       return await Http.get(`/reports/${reportType}`, params);
     },
+    async getUtilizationSeries(startDate, endDate, bucket = 'week') {
+      // Columnar: { buckets: [...], horses: [{ id, name, sessions: [...], minutes: [...] }], riders: [...] }
+      return await Http.get('/reports/utilization', { start_date: startDate, end_date: endDate, bucket });
+    },
     async exportData(dataType, format = 'json') {
       return await Http.get(`/export/${dataType}`, { format });
     },
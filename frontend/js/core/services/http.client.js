@@ -5,6 +5,22 @@
 (function(global){
   'use strict';
 
+  // Conditional GET: url -> { etag, lastModified, data }. Revalidated with
+  // If-None-Match so unchanged data costs a 304 instead of a full body.
+  const VALIDATOR_CACHE_SIZE = 100;
+  const validatorCache = new Map();
+
+  const remember = (url, resp, data) => {
+    const etag = resp.headers.get('ETag');
+    const lastModified = resp.headers.get('Last-Modified');
+    if (!etag && !lastModified) return;
+    validatorCache.delete(url);
+    validatorCache.set(url, { etag, lastModified, data });
+    if (validatorCache.size > VALIDATOR_CACHE_SIZE) {
+      validatorCache.delete(validatorCache.keys().next().value);
+    }
+  };
+
   const HttpClient = {
     get baseURL() {
       return global.Utils.APP_CONFIG.API_BASE_URL;
@@ -20,12 +36,23 @@
           }
         });
 
-        const resp = await fetch(url.toString(), {
+        const key = url.toString();
+        const cached = validatorCache.get(key);
+        const headers = { 'Content-Type': 'application/json' };
+        if (cached?.etag) headers['If-None-Match'] = cached.etag;
+        else if (cached?.lastModified) headers['If-Modified-Since'] = cached.lastModified;
+
+        const resp = await fetch(key, {
           method: 'GET',
-          headers: { 'Content-Type': 'application/json' }
+          headers,
+          // We revalidate ourselves; keep the browser cache from answering 200 for us
+          cache: 'no-store'
         });
+        if (resp.status === 304 && cached) return cached.data;
         if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
-        return await resp.json();
+        const data = await resp.json();
+        remember(key, resp, data);
+        return data;
       } catch (err) {
         console.error('GET error:', err);
         throw err;
@@ -62,6 +89,10 @@
       }
     },
 
+    clearValidators() {
+      validatorCache.clear();
+    },
+
     async delete(endpoint) {
       try {
         const resp = await fetch(this.baseURL + endpoint, {
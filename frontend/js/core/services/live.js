@@ -0,0 +1,118 @@
+/**
+ * LiveUpdates
+ * - Listens to /stream (Server-Sent Events) for writes by other users and devices
+ * - patchCalendar() applies a /changes delta to a /calendar payload in place of a reload
+ * Depends on: Utils.APP_CONFIG
+ */
+(function(global){
+  'use strict';
+
+  const GRANULARITY_MS = 15 * 60 * 1000;  // as slots.DEFAULT_GRANULARITY on the server
+
+  const listeners = new Set();
+  let source = null;
+
+  const dateOf = (iso) => (iso || '').slice(0, 10);
+  const timeOf = (iso) => Date.parse(iso);
+
+  /**
+   * Same rule as the server (slots.slot_occupancy): a slot is occupied when
+   * bookings leave no gap of one granularity step, aligned to the grid.
+   */
+  const isOccupied = (date, slot, busy) => {
+    const midnight = timeOf(`${date}T00:00:00`);
+    const end = timeOf(`${date}T${slot.end}:00`);
+    let cursor = timeOf(`${date}T${slot.start}:00`);
+    const gaps = [];
+    busy.forEach(([busyStart, busyEnd]) => {
+      if (busyEnd <= cursor || busyStart >= end) return;
+      if (busyStart > cursor) gaps.push([cursor, busyStart]);
+      cursor = Math.max(cursor, busyEnd);
+    });
+    if (cursor < end) gaps.push([cursor, end]);
+    return !gaps.some(([gapStart, gapEnd]) => {
+      const start = midnight + Math.ceil((gapStart - midnight) / GRANULARITY_MS) * GRANULARITY_MS;
+      const stop = midnight + Math.floor((gapEnd - midnight) / GRANULARITY_MS) * GRANULARITY_MS;
+      return stop - start >= GRANULARITY_MS;
+    });
+  };
+
+  const LiveUpdates = {
+    /** Call fn({ tables: [...] }) for every change event; returns an unsubscribe function */
+    subscribe(fn) {
+      listeners.add(fn);
+      if (!source && global.EventSource) {
+        // EventSource reconnects by itself (the server sends a retry hint)
+        source = new EventSource(`${global.Utils.APP_CONFIG.API_BASE_URL}/stream`);
+        source.addEventListener('change', (event) => {
+          const change = JSON.parse(event.data);
+          listeners.forEach(listener => listener(change));
+        });
+      }
+      return () => {
+        listeners.delete(fn);
+        if (!listeners.size && source) {
+          source.close();
+          source = null;
+        }
+      };
+    },
+
+    /**
+     * Apply a /changes feed to a /calendar payload (schedule rows only).
+     * Returns the patched calendar, or null when the client must reload it:
+     * a reset feed, or changes to availability, recurring lessons or their
+     * exceptions, whose occurrences are expanded by the server.
+     */
+    patchCalendar(calendar, feed) {
+      const reloaded = ['availability', 'recurring_lessons', 'recurring_lesson_exceptions'];
+      if (feed.reset || reloaded.some(t => feed.changes[t]?.length || feed.deleted[t]?.length)) {
+        return null;
+      }
+
+      const names = (list) => new Map(list.map(item => [item.id, item.name]));
+      const riders = names(calendar.riders);
+      const horses = names(calendar.horses);
+      const sessions = new Map(calendar.sessions.map(s => [s.id, s]));
+      feed.deleted.schedule.forEach(id => sessions.delete(id));
+      feed.changes.schedule.forEach(row => {
+        const date = dateOf(row.start_time);
+        if (date < calendar.start_date || date > calendar.end_date) {
+          sessions.delete(row.id);
+          return;
+        }
+        const previous = sessions.get(row.id);
+        const sameRider = previous && previous.rider_id === row.rider_id;
+        const sameHorse = previous && previous.horse_id === row.horse_id;
+        sessions.set(row.id, {
+          ...row,
+          rider_name: riders.get(row.rider_id) ?? (sameRider ? previous.rider_name : null),
+          horse_name: horses.get(row.horse_id) ?? (sameHorse ? previous.horse_name : null)
+        });
+      });
+      const patched = [...sessions.values()]
+        .sort((a, b) => a.start_time.localeCompare(b.start_time) || a.id - b.id);
+
+      // By date, as the server does: a time override after materializing keeps the occurrence booked
+      const booked = new Set(patched.filter(s => s.lesson_id).map(s => `${s.lesson_id}|${dateOf(s.start_time)}`));
+      const occurrences = calendar.occurrences.map(o => ({
+        ...o,
+        materialized: booked.has(`${o.lesson_id}|${dateOf(o.start_time)}`)
+      }));
+
+      const busy = [
+        ...patched.filter(s => s.status !== 'cancelled'),
+        ...occurrences.filter(o => !o.materialized)
+      ].map(b => [timeOf(b.start_time), timeOf(b.end_time)]).sort((a, b) => a[0] - b[0]);
+      const availability = Object.fromEntries(Object.entries(calendar.availability).map(([date, slots]) => [
+        date, slots.map(slot => ({ ...slot, occupied: isOccupied(date, slot, busy) }))
+      ]));
+
+      return { ...calendar, sessions: patched, occurrences, availability, cursor: feed.cursor };
+    }
+  };
+
+  global.Services = global.Services || {};
+  global.Services.LiveUpdates = LiveUpdates;
+
+})(window);
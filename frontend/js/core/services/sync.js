@@ -0,0 +1,78 @@
+/**
+ * SyncService
+ * - Local mirror of riders, horses, recurring lessons (and exceptions), availability and schedule
+ * - Kept current from /changes: only rows changed or deleted since the last pull
+ * - Persisted in localStorage, so a reload resumes from the stored cursor
+ * Depends on: Utils.StorageUtils, Services.HttpClient
+ */
+(function(global){
+  'use strict';
+
+  const Http = global.Services.HttpClient;
+  const { StorageUtils } = global.Utils;
+
+  const STORAGE_KEY = 'sync_mirror';
+  const TABLES = ['riders', 'horses', 'recurring_lessons', 'recurring_lesson_exceptions', 'availability', 'schedule'];
+
+  const emptyMirror = () => ({
+    cursor: null,
+    tables: Object.fromEntries(TABLES.map(t => [t, {}]))
+  });
+
+  let mirror = null;
+  let pending = null;
+
+  const load = () => {
+    if (!mirror) {
+      const stored = StorageUtils.get(STORAGE_KEY);
+      // A mirror stored before a table was synced lacks its rows: start over
+      mirror = stored?.tables && TABLES.every(t => stored.tables[t]) ? stored : emptyMirror();
+    }
+    return mirror;
+  };
+
+  const apply = (feed) => {
+    const current = feed.reset ? emptyMirror() : load();
+    TABLES.forEach(table => {
+      const rows = current.tables[table];
+      (feed.deleted[table] || []).forEach(id => { delete rows[id]; });
+      (feed.changes[table] || []).forEach(row => { rows[row.id] = row; });
+    });
+    current.cursor = feed.cursor;
+    mirror = current;
+    // Quota errors leave the mirror in memory only; the next load resets it
+    StorageUtils.set(STORAGE_KEY, mirror);
+  };
+
+  const SyncService = {
+    TABLES,
+
+    /** Pull changes since the stored cursor (everything on first use) */
+    async sync() {
+      // Concurrent callers share one request
+      if (!pending) {
+        const since = load().cursor;
+        pending = Http.get('/changes', { since })
+          .then(apply)
+          .finally(() => { pending = null; });
+      }
+      await pending;
+      return mirror;
+    },
+
+    /** Rows of one mirrored table, as an array */
+    get(table) {
+      return Object.values(load().tables[table] || {});
+    },
+
+    /** Forget the mirror; the next sync() downloads everything again */
+    reset() {
+      mirror = emptyMirror();
+      StorageUtils.remove(STORAGE_KEY);
+    }
+  };
+
+  global.Services = global.Services || {};
+  global.Services.SyncService = SyncService;
+
+})(window);